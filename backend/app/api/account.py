@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import select
+from sqlalchemy import delete, func
 from fastapi import status
 import os
 from supabase import create_client, Client
 
 # Import dependencies and models
 from app.database.session import SessionDep
-from app.database.models import Portfolio, Holding
+from app.database.models import Portfolio, Holding, PortfolioSnapshot
 from app.auth.security import get_current_user_id
 
 # Create a router for account management
@@ -36,30 +37,26 @@ def delete_account(
     This action cannot be undone.
     """
     try:
-        # Get all user's portfolios
-        user_portfolios = session.exec(
-            select(Portfolio).where(Portfolio.user_id == user_id)
-        ).all()
-        
-        # Delete all holdings first (cascading should handle this, but being explicit)
-        for portfolio in user_portfolios:
-            holdings = session.exec(
-                select(Holding).where(Holding.portfolio_id == portfolio.id)
-            ).all()
-            
-            for holding in holdings:
-                session.delete(holding)
+        user_portfolio_ids = select(Portfolio.id).where(Portfolio.user_id == user_id)
         
-        # Delete all portfolios
-        for portfolio in user_portfolios:
-            session.delete(portfolio)
+        # Delete all holdings and history first, then the portfolios: a fixed
+        # number of bulk statements regardless of how much data the user has
+        holdings_result = session.exec(
+            delete(Holding).where(Holding.portfolio_id.in_(user_portfolio_ids))
+        )
+        session.exec(
+            delete(PortfolioSnapshot).where(PortfolioSnapshot.portfolio_id.in_(user_portfolio_ids))
+        )
+        portfolios_result = session.exec(
+            delete(Portfolio).where(Portfolio.user_id == user_id)
+        )
         
         # Commit the deletions
         session.commit()
         
         print(f"✅ Account {user_id} and all associated data deleted successfully")
-        print(f"   - Deleted {len(user_portfolios)} portfolios")
-        print(f"   - Deleted holdings for all portfolios")
+        print(f"   - Deleted {portfolios_result.rowcount} portfolios")
+        print(f"   - Deleted {holdings_result.rowcount} holdings")
         
         # Delete the Supabase user account using admin client
         try:
@@ -91,27 +88,27 @@ def get_account_data_summary(
     Helps users understand what will be deleted.
     """
     try:
-        # Count user's portfolios
+        # Count holdings per portfolio in one grouped query
         portfolios = session.exec(
-            select(Portfolio).where(Portfolio.user_id == user_id)
+            select(Portfolio.id, Portfolio.name, func.count(Holding.id))
+            .outerjoin(Holding, Holding.portfolio_id == Portfolio.id)
+            .where(Portfolio.user_id == user_id)
+            .group_by(Portfolio.id, Portfolio.name)
+            .order_by(Portfolio.id)
         ).all()
         
         # Count total holdings across all portfolios
         total_holdings = 0
         portfolio_details = []
         
-        for portfolio in portfolios:
-            holdings = session.exec(
-                select(Holding).where(Holding.portfolio_id == portfolio.id)
-            ).all()
-            
+        for portfolio_id, name, holdings_count in portfolios:
             portfolio_details.append({
-                "name": portfolio.name,
-                "holdings_count": len(holdings),
-                "created_at": portfolio.id  # You might want to add created_at to Portfolio model
+                "name": name,
+                "holdings_count": holdings_count,
+                "created_at": portfolio_id  # You might want to add created_at to Portfolio model
             })
             
-            total_holdings += len(holdings)
+            total_holdings += holdings_count
         
         return {
             "portfolios_count": len(portfolios),
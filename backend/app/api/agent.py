@@ -1,33 +1,102 @@
+import json
+
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session
+from fastapi.responses import StreamingResponse
+from sqlmodel import select
+from sqlalchemy.orm import selectinload
 from pydantic import BaseModel
 
-from app.database.session import SessionDep
+from app.database.session import AsyncSessionDep
 from app.database.models import Portfolio
 from app.auth.security import get_current_user_id
 from app.services import agent_service
+from app.services.llm_limiter import LLMOverloadedError
 
 router = APIRouter()
 
+EMPTY_PORTFOLIO_ANALYSIS = "Your portfolio is empty. Add some stocks to get an analysis."
+OVERLOADED_DETAIL = "AI analysis is busy right now. Please try again shortly."
+
+def _overloaded() -> HTTPException:
+    retry_after = max(1, int(agent_service.LLM_QUEUE_TIMEOUT_SECONDS))
+    return HTTPException(status_code=503, detail=OVERLOADED_DETAIL, headers={"Retry-After": str(retry_after)})
+
 class AgentRequest(BaseModel):
     portfolio_id: int
+    # Skip the analysis cache and always ask the model (e.g. an explicit "refresh")
+    bypass_cache: bool = False
+
+async def get_owned_portfolio(session: AsyncSessionDep, portfolio_id: int, user_id: str) -> Portfolio:
+    # Ownership is part of the query; holdings are always needed, so load them eagerly
+    portfolio = (await session.exec(
+        select(Portfolio)
+        .where(Portfolio.id == portfolio_id, Portfolio.user_id == user_id)
+        .options(selectinload(Portfolio.holdings))
+    )).first()
+    if not portfolio:
+        raise HTTPException(status_code=404, detail="Portfolio not found")
+    return portfolio
 
 @router.post("/explain-performance", response_model=dict)
-def get_ai_analysis(
+async def get_ai_analysis(
     request: AgentRequest,
-    session: SessionDep,
+    session: AsyncSessionDep,
     user_id: str = Depends(get_current_user_id)
 ):
-    portfolio = session.get(Portfolio, request.portfolio_id)
-    if not portfolio or portfolio.user_id != user_id:
-        raise HTTPException(status_code=404, detail="Portfolio not found")
+    portfolio = await get_owned_portfolio(session, request.portfolio_id, user_id)
 
     if not portfolio.holdings:
-        return {"analysis": "Your portfolio is empty. Add some stocks to get an analysis."}
+        return {"analysis": EMPTY_PORTFOLIO_ANALYSIS}
+
+    # Holdings are loaded; don't hold a connection while the model writes
+    await session.close()
 
     try:
-        analysis_text = agent_service.run_analysis(portfolio, session)
+        analysis_text = await agent_service.run_analysis(portfolio, bypass_cache=request.bypass_cache)
         return {"analysis": analysis_text}
+    except LLMOverloadedError:
+        raise _overloaded()
     except Exception as e:
         print(f"Error running agent service: {e}")
-        raise HTTPException(status_code=500, detail="Failed to get analysis from AI.")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to get analysis from AI.")
+
+def _sse_event(event: str, text: str) -> str:
+    return f"event: {event}\ndata: {json.dumps({'text': text})}\n\n"
+
+async def _analysis_events(portfolio: Portfolio, bypass_cache: bool):
+    if not portfolio.holdings:
+        yield _sse_event("done", EMPTY_PORTFOLIO_ANALYSIS)
+        return
+    try:
+        async for event, text in agent_service.stream_analysis(portfolio, bypass_cache=bypass_cache):
+            yield _sse_event(event, text)
+    except LLMOverloadedError:
+        yield _sse_event("error", OVERLOADED_DETAIL)
+    except Exception as e:
+        print(f"Error streaming agent analysis: {e}")
+        yield _sse_event("error", "Failed to get analysis from AI.")
+
+@router.post("/explain-performance/stream")
+async def stream_ai_analysis(
+    request: AgentRequest,
+    session: AsyncSessionDep,
+    user_id: str = Depends(get_current_user_id)
+):
+    """
+    Server-sent events version of /explain-performance: "token" events carry
+    cleaned text as the model writes it, and a final "done" event carries
+    the complete analysis.
+    """
+    # Shed before the stream starts; once it has, errors can only be reported as events
+    if agent_service.llm_limiter.is_full():
+        raise _overloaded()
+
+    portfolio = await get_owned_portfolio(session, request.portfolio_id, user_id)
+    # Everything the stream needs is loaded; don't hold a connection while the model writes
+    await session.close()
+
+    return StreamingResponse(
+        _analysis_events(portfolio, request.bypass_cache),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,15 +1,27 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+import os
+import json
+import hashlib
+from datetime import date
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
 from sqlmodel import select
+from sqlalchemy import and_, delete
+from sqlalchemy.orm import selectinload
 from fastapi import status
+import numpy as np
 
 
 # Import dependencies and models from other files
-from app.database.session import SessionDep
-from app.database.models import Portfolio, Holding, SupportedTicker
-from app.models.portfolio import PortfolioCreate, PortfolioRead, PortfolioReadWithHoldings, PortfolioReadWithDetails
-from app.models.holding import HoldingRead, HoldingCreate, HoldingReadWithMarketData
-from app.services import finnhub_service
+from app.database.session import AsyncSessionDep
+from app.database.models import Portfolio, Holding, PortfolioSnapshot
+from app.models.portfolio import PortfolioCreate, PortfolioRead, PortfolioReadWithHoldings, PortfolioReadWithDetails, PortfolioDashboard, PortfolioValuationDelta, PortfolioHistory, PortfolioValuePoint
+from app.models.risk import PortfolioRisk
+from app.models.holding import HoldingRead, HoldingCreate, HoldingReadWithMarketData, HoldingBulkCreate, HoldingBulkRowResult, HoldingBulkResult
+from app.services import finnhub_service, holdings_import, ticker_registry, portfolio_snapshots, risk_analytics
+from app.services.quote_stream import quote_hub
+from app.services.valuation import value_portfolio
 
 from app.auth.security import get_current_user_id
 
@@ -17,28 +29,76 @@ from app.auth.security import get_current_user_id
 # The prefix and tags help organize the auto-generated API docs.
 router = APIRouter()
 
-def validate_ticker(ticker: str, session: SessionDep) -> bool:
+# Idle streams send an SSE comment this often so proxies keep the connection open
+STREAM_KEEPALIVE_SECONDS = float(os.getenv("PORTFOLIO_STREAM_KEEPALIVE_SECONDS", "15"))
+
+def validate_ticker(ticker: str) -> bool:
     """Validate if ticker exists in supported tickers."""
-    supported_ticker = session.exec(
-        select(SupportedTicker).where(SupportedTicker.ticker == ticker.upper())
-    ).first()
-    return supported_ticker is not None
+    return ticker_registry.get_registry().is_supported(ticker)
+
+def _portfolio_etag(portfolios: Sequence[Portfolio], quotes: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Strong ETag over everything a portfolio response is built from: the
+    portfolio and holding rows, plus the cached quote for each held ticker.
+    """
+    version = [
+        [portfolio.id, portfolio.name, sorted((h.id, h.ticker, h.quantity) for h in portfolio.holdings)]
+        for portfolio in portfolios
+    ]
+    if quotes is not None:
+        # Responses with quotes also carry stock names from the ticker registry
+        version.append(sorted(quotes.items()))
+        version.append(list(ticker_registry.get_registry().version))
+    digest = hashlib.sha256(json.dumps(version, default=str).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    # If-None-Match uses weak comparison, so a W/ prefix still matches
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+def _set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    # Let browsers keep the body but revalidate it with If-None-Match every time
+    response.headers["Cache-Control"] = "private, no-cache"
+
+async def get_owned_portfolio(portfolio_id: int, user_id: str, session: AsyncSessionDep) -> Optional[Portfolio]:
+    """Loads a portfolio with its holdings if it belongs to the user."""
+    return (await session.exec(
+        select(Portfolio)
+        .where(Portfolio.id == portfolio_id, Portfolio.user_id == user_id)
+        .options(selectinload(Portfolio.holdings))
+    )).first()
 
 @router.get("/", response_model=List[PortfolioRead])
-def get_portfolios_for_user(
-    session: SessionDep,
-    user_id: str = Depends(get_current_user_id)
+async def get_portfolios_for_user(
+    response: Response,
+    session: AsyncSessionDep,
+    user_id: str = Depends(get_current_user_id),
+    if_none_match: Optional[str] = Header(default=None)
 ):
     """Fetches all portfolios owned by the current user."""
-    portfolios = session.exec(
-        select(Portfolio).where(Portfolio.user_id == user_id)
-    ).all()
+    portfolios = (await session.exec(
+        select(Portfolio)
+        .where(Portfolio.user_id == user_id)
+        .options(selectinload(Portfolio.holdings))
+    )).all()
+    
+    etag = _portfolio_etag(portfolios)
+    if _etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+    _set_etag(response, etag)
     return portfolios
 
 @router.post("/", response_model=PortfolioRead, status_code=201)
-def create_portfolio(
+async def create_portfolio(
     portfolio_data: PortfolioCreate,
-    session: SessionDep,
+    session: AsyncSessionDep,
     user_id: str = Depends(get_current_user_id)
 ):
     """Creates a new portfolio for the current user."""
@@ -46,44 +106,43 @@ def create_portfolio(
     new_portfolio = Portfolio.model_validate(portfolio_data, update={"user_id": user_id})
     
     session.add(new_portfolio)
-    session.commit()
-    session.refresh(new_portfolio) # Refresh to get the new ID from the DB
+    await session.commit()
+    await session.refresh(new_portfolio) # Refresh to get the new ID from the DB
     
-    return new_portfolio
+    # A new portfolio has no holdings yet; avoid lazy-loading the relationship
+    return PortfolioRead(id=new_portfolio.id, name=new_portfolio.name, user_id=new_portfolio.user_id, holdings=[])
 
 @router.post("/{portfolio_id}/holdings", response_model=HoldingRead, status_code=status.HTTP_201_CREATED)
-def add_holding_to_portfolio(
+async def add_holding_to_portfolio(
     portfolio_id: int,
     holding_data: HoldingCreate,
-    session: SessionDep,
+    session: AsyncSessionDep,
     user_id: str = Depends(get_current_user_id)
 ):
     # Validate ticker first
     ticker_upper = holding_data.ticker.upper()
-    if not validate_ticker(ticker_upper, session):
+    if not validate_ticker(ticker_upper):
         raise HTTPException(status_code=400, detail=f"Ticker '{holding_data.ticker}' is not supported")
     
-    # First, verify the portfolio belongs to the current user
-    portfolio = session.get(Portfolio, portfolio_id)
-    if not portfolio:
+    # Verify the portfolio belongs to the current user and check if the
+    # holding already exists in a single query
+    row = (await session.exec(
+        select(Portfolio.user_id, Holding)
+        .outerjoin(Holding, and_(Holding.portfolio_id == Portfolio.id, Holding.ticker == ticker_upper))
+        .where(Portfolio.id == portfolio_id)
+    )).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Portfolio not found")
-    if portfolio.user_id != user_id:
+    owner_id, existing_holding = row
+    if owner_id != user_id:
         raise HTTPException(status_code=403, detail="Not authorized to access this portfolio")
-
-    # Check if holding already exists
-    existing_holding = session.exec(
-        select(Holding).where(
-            Holding.portfolio_id == portfolio_id,
-            Holding.ticker == ticker_upper
-        )
-    ).first()
     
     if existing_holding:
         # Update existing holding
         existing_holding.quantity += holding_data.quantity
         session.add(existing_holding)
-        session.commit()
-        session.refresh(existing_holding)
+        await session.commit()
+        await session.refresh(existing_holding)
         return existing_holding
     else:
         # Create new holding
@@ -92,38 +151,149 @@ def add_holding_to_portfolio(
             update={"portfolio_id": portfolio_id, "ticker": ticker_upper}
         )
         session.add(new_holding)
-        session.commit()
-        session.refresh(new_holding)
+        await session.commit()
+        await session.refresh(new_holding)
         return new_holding
 
+async def _read_body(request: Request, max_bytes: int) -> bytes:
+    """Reads the request body, answering 413 as soon as it is known to exceed max_bytes."""
+    too_large = HTTPException(status_code=413, detail=f"Request body must be at most {max_bytes} bytes")
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise too_large
+    
+    # Content-Length can be missing (chunked uploads) or wrong, so count while reading
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > max_bytes:
+            raise too_large
+    return bytes(body)
+
+@router.post("/{portfolio_id}/holdings/bulk", response_model=HoldingBulkResult)
+async def bulk_add_holdings_to_portfolio(
+    portfolio_id: int,
+    request: Request,
+    session: AsyncSessionDep,
+    user_id: str = Depends(get_current_user_id)
+):
+    """
+    Adds many holdings at once. Send JSON ({"holdings": [{"ticker", "quantity"}, ...]})
+    or a CSV export with Content-Type: text/csv. Quantities are added to
+    existing holdings, as with the single-holding endpoint. Valid rows are
+    written in one transaction; each row gets its own result.
+    """
+    body = await _read_body(request, holdings_import.MAX_BULK_BODY_BYTES)
+    content_type = request.headers.get("content-type", "")
+    try:
+        if content_type.startswith(("text/csv", "application/csv")):
+            rows = holdings_import.rows_from_csv(body.decode("utf-8"))
+        else:
+            rows = holdings_import.rows_from_json(HoldingBulkCreate.model_validate_json(body).holdings)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+    except (UnicodeDecodeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not read holdings: {e}")
+    
+    if len(rows) > holdings_import.MAX_BULK_HOLDINGS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {holdings_import.MAX_BULK_HOLDINGS} holdings can be imported at once"
+        )
+    
+    portfolio = await session.get(Portfolio, portfolio_id)
+    if not portfolio:
+        raise HTTPException(status_code=404, detail="Portfolio not found")
+    if portfolio.user_id != user_id:
+        raise HTTPException(status_code=403, detail="Not authorized to access this portfolio")
+    
+    # Validate every ticker against the registry, then find which are already held in one query
+    supported = {row.ticker for row in rows if row.error is None} & ticker_registry.get_registry().tickers
+    already_held = set((await session.exec(
+        select(Holding.ticker).where(Holding.portfolio_id == portfolio_id, Holding.ticker.in_(supported))
+    )).all()) if supported else set()
+    
+    rows = [
+        row._replace(error=f"Ticker '{row.ticker}' is not supported")
+        if row.error is None and row.ticker not in supported else row
+        for row in rows
+    ]
+    
+    # Rows repeating a ticker are summed so each holding is written once
+    quantities: Dict[str, float] = {}
+    for row in rows:
+        if row.error is None:
+            quantities[row.ticker] = quantities.get(row.ticker, 0.0) + row.quantity
+    
+    try:
+        holdings = await holdings_import.upsert_holdings(session, portfolio_id, quantities)
+        await session.commit()
+    except Exception as e:
+        await session.rollback()
+        print(f"❌ Error importing holdings into portfolio {portfolio_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to import holdings")
+    
+    result = HoldingBulkResult()
+    seen = set(already_held)
+    for row in rows:
+        if row.error is not None:
+            result.failed += 1
+            result.rows.append(HoldingBulkRowResult(
+                row=row.row, ticker=row.ticker, quantity=row.quantity, status="error", error=row.error
+            ))
+            continue
+        row_status = "updated" if row.ticker in seen else "created"
+        seen.add(row.ticker)
+        if row_status == "created":
+            result.created += 1
+        else:
+            result.updated += 1
+        holding = holdings[row.ticker]
+        result.rows.append(HoldingBulkRowResult(
+            row=row.row,
+            ticker=row.ticker,
+            quantity=row.quantity,
+            status=row_status,
+            holding=HoldingRead(id=holding.id, ticker=holding.ticker, quantity=holding.quantity)
+        ))
+    
+    print(f"📥 Imported holdings into portfolio {portfolio_id}: {result.created} created, {result.updated} updated, {result.failed} failed")
+    return result
+
 @router.delete("/holdings/{holding_id}", status_code=status.HTTP_204_NO_CONTENT)
-def remove_holding_from_portfolio(
+async def remove_holding_from_portfolio(
     holding_id: int,
-    session: SessionDep,
+    session: AsyncSessionDep,
     user_id: str = Depends(get_current_user_id)
 ):
     """Removes a specific holding from a portfolio."""
-    holding = session.get(Holding, holding_id)
-    if not holding:
+    # Load the holding together with its portfolio's owner in one query
+    row = (await session.exec(
+        select(Holding, Portfolio.user_id)
+        .join(Portfolio, Holding.portfolio_id == Portfolio.id)
+        .where(Holding.id == holding_id)
+    )).first()
+    if not row:
         # Return 204 even if not found to prevent leaking information
         return
         
     # Verify the holding belongs to a portfolio owned by the user
-    if holding.portfolio.user_id != user_id:
+    holding, owner_id = row
+    if owner_id != user_id:
         raise HTTPException(status_code=403, detail="Not authorized to delete this holding")
 
-    session.delete(holding)
-    session.commit()
+    await session.delete(holding)
+    await session.commit()
     return
 
 @router.delete("/{portfolio_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_portfolio(
+async def delete_portfolio(
     portfolio_id: int,
-    session: SessionDep,
+    session: AsyncSessionDep,
     user_id: str = Depends(get_current_user_id)
 ):
     """Deletes a specific portfolio and all its holdings."""
-    portfolio = session.get(Portfolio, portfolio_id)
+    portfolio = await session.get(Portfolio, portfolio_id)
     if not portfolio:
         raise HTTPException(status_code=404, detail="Portfolio not found")
     
@@ -132,36 +302,37 @@ def delete_portfolio(
         raise HTTPException(status_code=403, detail="Not authorized to delete this portfolio")
     
     try:
-        # Explicitly delete all holdings first (though cascade should handle this)
-        holdings_to_delete = session.exec(
-            select(Holding).where(Holding.portfolio_id == portfolio_id)
-        ).all()
-        
-        for holding in holdings_to_delete:
-            session.delete(holding)
-        
-        # Delete the portfolio
-        session.delete(portfolio)
-        session.commit()
+        # Bulk-delete the holdings and history, then the portfolio: a fixed number of statements
+        holdings_result = await session.exec(
+            delete(Holding).where(Holding.portfolio_id == portfolio_id)
+        )
+        await session.exec(delete(PortfolioSnapshot).where(PortfolioSnapshot.portfolio_id == portfolio_id))
+        await session.exec(delete(Portfolio).where(Portfolio.id == portfolio_id))
+        await session.commit()
         
-        print(f"✅ Portfolio {portfolio_id} and {len(holdings_to_delete)} holdings deleted successfully")
+        print(f"✅ Portfolio {portfolio_id} and {holdings_result.rowcount} holdings deleted successfully")
         return
         
     except Exception as e:
-        session.rollback()
+        await session.rollback()
         print(f"❌ Error deleting portfolio {portfolio_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to delete portfolio")
 
 @router.patch("/holdings/{holding_id}", response_model=HoldingRead)
-def update_holding_quantity(
+async def update_holding_quantity(
     holding_id: int,
     quantity: float,
-    session: SessionDep,
+    session: AsyncSessionDep,
     user_id: str = Depends(get_current_user_id)
 ):
     """Partially update the quantity of an existing holding."""
-    holding = session.get(Holding, holding_id)
-    if not holding or holding.portfolio.user_id != user_id:
+    # Ownership check as part of the lookup: one query
+    holding = (await session.exec(
+        select(Holding)
+        .join(Portfolio, Holding.portfolio_id == Portfolio.id)
+        .where(Holding.id == holding_id, Portfolio.user_id == user_id)
+    )).first()
+    if not holding:
         raise HTTPException(status_code=404, detail="Holding not found")
     
     if quantity <= 0:
@@ -169,105 +340,289 @@ def update_holding_quantity(
     
     holding.quantity = quantity
     session.add(holding)
-    session.commit()
-    session.refresh(holding)
+    await session.commit()
+    await session.refresh(holding)
     return holding
 
+def get_stock_names(tickers: List[str]) -> Dict[str, str]:
+    """Looks up stock names in the in-memory ticker registry; no database query."""
+    return ticker_registry.get_registry().names(tickers)
+
+def _round_percent(percent: Optional[float]) -> Optional[float]:
+    return round(percent, 2) if percent is not None else None
+
+def build_portfolio_details(
+    portfolio: Portfolio,
+    holdings: List[Holding],
+    quotes_map: Dict[str, Optional[dict]],
+    stock_names_map: Dict[str, str]
+) -> PortfolioReadWithDetails:
+    """Enriches a portfolio's holdings with market data from already-fetched quotes."""
+    # Value every holding at once with the shared valuation engine
+    tickers = [holding.ticker for holding in holdings]
+    valuation = value_portfolio(tickers, [holding.quantity for holding in holdings], quotes_map)
+    
+    enriched_holdings = [
+        HoldingReadWithMarketData(
+            id=holding.id,
+            ticker=holding.ticker,
+            quantity=holding.quantity,
+            stock_name=stock_names_map.get(holding.ticker),
+            current_price=valuation.at(valuation.prices, i) if valuation.priced[i] else None,
+            current_value=valuation.at(valuation.values, i),
+            day_change_percent=valuation.at(valuation.day_change_percents, i) if valuation.priced[i] else None,
+            total_day_change=valuation.at(valuation.day_changes, i)
+        )
+        for i, holding in enumerate(holdings)
+    ]
+    
+    return PortfolioReadWithDetails(
+        id=portfolio.id,
+        name=portfolio.name,
+        holdings=enriched_holdings,
+        total_value=valuation.total_value,
+        total_day_change_percent=_round_percent(valuation.total_day_change_percent),
+        total_day_change=valuation.total_day_change
+    )
+
+@router.get("/dashboard", response_model=PortfolioDashboard)
+async def get_portfolio_dashboard(
+    session: AsyncSessionDep,
+    user_id: str = Depends(get_current_user_id)
+):
+    """
+    Values every portfolio owned by the current user in one request.
+    Quotes and stock names are fetched once for the union of all tickers.
+    """
+    portfolios = (await session.exec(
+        select(Portfolio).where(Portfolio.user_id == user_id).order_by(Portfolio.id)
+    )).all()
+    
+    # Load the holdings of every portfolio in one query
+    holdings_by_portfolio: Dict[int, List[Holding]] = {portfolio.id: [] for portfolio in portfolios}
+    if portfolios:
+        all_holdings = (await session.exec(
+            select(Holding).where(Holding.portfolio_id.in_(list(holdings_by_portfolio)))
+        )).all()
+        for holding in all_holdings:
+            holdings_by_portfolio[holding.portfolio_id].append(holding)
+    
+    tickers = sorted({holding.ticker for holdings in holdings_by_portfolio.values() for holding in holdings})
+    quotes_map = await finnhub_service.fetch_multiple_stock_quotes(tickers)
+    stock_names_map = get_stock_names(tickers)
+    
+    portfolio_details = [
+        build_portfolio_details(portfolio, holdings_by_portfolio[portfolio.id], quotes_map, stock_names_map)
+        for portfolio in portfolios
+    ]
+    
+    # Aggregate across portfolios by valuing every position together
+    every_holding = [holding for holdings in holdings_by_portfolio.values() for holding in holdings]
+    overall = value_portfolio(
+        [holding.ticker for holding in every_holding],
+        [holding.quantity for holding in every_holding],
+        quotes_map
+    )
+    
+    return PortfolioDashboard(
+        portfolios=portfolio_details,
+        total_value=overall.total_value,
+        total_day_change_percent=_round_percent(overall.total_day_change_percent),
+        total_day_change=overall.total_day_change
+    )
+
 @router.get("/{portfolio_id}", response_model=PortfolioReadWithDetails)
-def get_portfolio_details(
+async def get_portfolio_details(
     portfolio_id: int,
-    session: SessionDep,
-    user_id: str = Depends(get_current_user_id)
+    response: Response,
+    session: AsyncSessionDep,
+    user_id: str = Depends(get_current_user_id),
+    if_none_match: Optional[str] = Header(default=None)
 ):
     """
     Fetches a specific portfolio and enriches its holdings with live market data.
-    Uses parallel API calls for improved performance.
+    Stock names come from the in-memory ticker registry.
+    Answers 304 Not Modified, before any enrichment, when the client's ETag
+    still matches the holdings and the cached quotes.
     """
-    portfolio = session.get(Portfolio, portfolio_id)
-    if not portfolio or portfolio.user_id != user_id:
+    portfolio = await get_owned_portfolio(portfolio_id, user_id, session)
+    if not portfolio:
         raise HTTPException(status_code=404, detail="Portfolio not found")
 
-    enriched_holdings = []
-    total_portfolio_value = 0.0
-    total_previous_day_value = 0.0
-    total_day_change = 0.0
+    holdings = portfolio.holdings
+    tickers = [holding.ticker for holding in holdings]
     
-    # Extract all tickers for parallel fetching
-    tickers = [holding.ticker for holding in portfolio.holdings]
+    if if_none_match:
+        # Only a complete, fresh cache snapshot says what the response would
+        # contain; stale quotes are revalidated and the response built as usual
+        quote_cache = finnhub_service.quote_cache
+        entries = await quote_cache.apeek_many(tickers)
+        stale = [ticker for ticker, entry in entries.items() if not quote_cache.is_fresh(entry)]
+        for ticker in stale:
+            finnhub_service.revalidate_stock_quote(ticker)
+        if not stale and len(entries) == len(set(tickers)):
+            etag = _portfolio_etag([portfolio], {ticker: entry.value for ticker, entry in entries.items()})
+            if _etag_matches(if_none_match, etag):
+                return _not_modified(etag)
     
     # Fetch all quotes in parallel
-    quotes_map = finnhub_service.get_multiple_stock_quotes(tickers)
-    
-    # Fetch stock names for all tickers in a single query to avoid N+1 problem
-    stock_names_map = {}
-    if tickers:
-        supported_tickers = session.exec(
-            select(SupportedTicker).where(SupportedTicker.ticker.in_(tickers))
-        ).all()
-        stock_names_map = {ticker.ticker: ticker.name for ticker in supported_tickers}
-    
-    for holding in portfolio.holdings:
-        try:
-            quote = quotes_map.get(holding.ticker)
-            
-            current_value = None
-            if quote and quote.get("current_price") is not None:
-                current_price = quote["current_price"]
-                current_value = holding.quantity * current_price
-                total_portfolio_value += current_value
-            
-            if quote and quote.get("previous_close") is not None:
-                previous_close = quote["previous_close"]
-                total_previous_day_value += holding.quantity * previous_close
-            
-            if quote and quote.get("day_change") is not None:
-                day_change = quote["day_change"]
-                holding_day_change = holding.quantity * day_change
-                total_day_change += holding_day_change
-            else:
-                holding_day_change = None
+    quotes_map = await finnhub_service.fetch_multiple_stock_quotes(tickers)
+    
+    # Freshly fetched quotes may still be the ones the client already has
+    etag = _portfolio_etag([portfolio], {ticker: quotes_map.get(ticker) for ticker in tickers})
+    if _etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+    _set_etag(response, etag)
+    return build_portfolio_details(portfolio, holdings, quotes_map, get_stock_names(tickers))
+
+@router.get("/{portfolio_id}/history", response_model=PortfolioHistory)
+async def get_portfolio_history(
+    portfolio_id: int,
+    session: AsyncSessionDep,
+    user_id: str = Depends(get_current_user_id),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    max_points: int = Query(default=500, ge=2, le=5000)
+):
+    """
+    Returns the portfolio's end-of-day values between start and end
+    (inclusive). Long ranges are downsampled on the server to at most
+    max_points points, keeping the peaks and troughs.
+    """
+    # Ownership is part of the range scan, so the common case is one query
+    statement = (
+        select(PortfolioSnapshot.snapshot_date, PortfolioSnapshot.total_value, PortfolioSnapshot.total_day_change)
+        .join(Portfolio, Portfolio.id == PortfolioSnapshot.portfolio_id)
+        .where(PortfolioSnapshot.portfolio_id == portfolio_id, Portfolio.user_id == user_id)
+        .order_by(PortfolioSnapshot.snapshot_date)
+    )
+    if start:
+        statement = statement.where(PortfolioSnapshot.snapshot_date >= start)
+    if end:
+        statement = statement.where(PortfolioSnapshot.snapshot_date <= end)
+    rows = (await session.exec(statement)).all()
+    
+    if not rows:
+        # No history yet, or not the user's portfolio
+        owner_id = (await session.exec(select(Portfolio.user_id).where(Portfolio.id == portfolio_id))).first()
+        if owner_id != user_id:
+            raise HTTPException(status_code=404, detail="Portfolio not found")
+        return PortfolioHistory(portfolio_id=portfolio_id)
+    
+    downsampled = len(rows) > max_points
+    if downsampled:
+        days = np.array([row[0].toordinal() for row in rows], dtype=float)
+        values = np.array([row[1] for row in rows], dtype=float)
+        rows = [rows[i] for i in portfolio_snapshots.downsample_lttb(days, values, max_points)]
+    
+    return PortfolioHistory(
+        portfolio_id=portfolio_id,
+        points=[
+            PortfolioValuePoint(date=snapshot_date, total_value=total_value, total_day_change=total_day_change)
+            for snapshot_date, total_value, total_day_change in rows
+        ],
+        downsampled=downsampled
+    )
+
+@router.get("/{portfolio_id}/risk", response_model=PortfolioRisk)
+async def get_portfolio_risk(
+    portfolio_id: int,
+    session: AsyncSessionDep,
+    user_id: str = Depends(get_current_user_id)
+):
+    """
+    Risk metrics from stored daily price history as of the last completed
+    trading day: annualized volatility, beta against the benchmark, the
+    holdings' correlation matrix, one-day historical and parametric VaR,
+    and max drawdown. Computed once per trading day and set of holdings.
+    """
+    portfolio = await get_owned_portfolio(portfolio_id, user_id, session)
+    if not portfolio:
+        raise HTTPException(status_code=404, detail="Portfolio not found")
+    
+    holdings = list(portfolio.holdings)
+    # Price history may take a while to backfill; don't hold a connection meanwhile
+    await session.close()
+    return await risk_analytics.get_portfolio_risk(portfolio_id, holdings)
+
+def _sse_event(event: str, payload: BaseModel) -> str:
+    return f"event: {event}\ndata: {payload.model_dump_json()}\n\n"
+
+async def _cached_quotes(tickers: List[str]) -> Dict[str, dict]:
+    """Reads quotes straight from the cache, in one batch, without fetching or counting lookups."""
+    entries = await finnhub_service.quote_cache.apeek_many(tickers)
+    return {ticker: entry.value for ticker, entry in entries.items() if entry.value is not None}
+
+async def _portfolio_valuation_events(
+    portfolio: Portfolio,
+    holdings: List[Holding],
+    stock_names_map: Dict[str, str]
+) -> AsyncIterator[str]:
+    """
+    Yields a full snapshot, then a delta whenever a held ticker's cached
+    quote changes. Nothing is fetched after the snapshot: the quote cache
+    pushes changes through the quote hub.
+    """
+    tickers = sorted({holding.ticker for holding in holdings})
+    # Subscribe before the snapshot so no change between the two is missed
+    subscription = quote_hub.subscribe(tickers)
+    try:
+        quotes_map = await finnhub_service.fetch_multiple_stock_quotes(tickers)
+        details = build_portfolio_details(portfolio, holdings, quotes_map, stock_names_map)
+        yield _sse_event("snapshot", details)
+        
+        while True:
+            changed_quotes = await subscription.wait(timeout=STREAM_KEEPALIVE_SECONDS)
+            idle = not changed_quotes
+            if idle:
+                # With a shared cache backend other workers may have refreshed
+                # these quotes; notifications only cover this process's writes
+                changed_quotes = await _cached_quotes(tickers)
+            quotes_map.update(changed_quotes)
             
-            enriched_holdings.append(
-                HoldingReadWithMarketData(
-                    id=holding.id,
-                    ticker=holding.ticker,
-                    quantity=holding.quantity,
-                    stock_name=stock_names_map.get(holding.ticker),
-                    current_price=quote.get("current_price") if quote else None,
-                    current_value=current_value,
-                    day_change_percent=quote.get("day_change_percent") if quote else None,
-                    total_day_change=holding_day_change
-                )
-            )
-        except Exception as e:
-            # Log error but continue processing other holdings
-            print(f"Error processing holding {holding.ticker}: {e}")
-            # Add holding with null market data
-            enriched_holdings.append(
-                HoldingReadWithMarketData(
-                    id=holding.id,
-                    ticker=holding.ticker,
-                    quantity=holding.quantity,
-                    stock_name=stock_names_map.get(holding.ticker),
-                    current_price=None,
-                    current_value=None,
-                    day_change_percent=None,
-                    total_day_change=None
-                )
-            )
-            continue
+            previous = details
+            details = build_portfolio_details(portfolio, holdings, quotes_map, stock_names_map)
+            changed_holdings = [
+                holding for holding, before in zip(details.holdings, previous.holdings)
+                if holding != before
+            ]
+            if changed_holdings:
+                yield _sse_event("delta", PortfolioValuationDelta(
+                    id=details.id,
+                    holdings=changed_holdings,
+                    total_value=details.total_value,
+                    total_day_change_percent=details.total_day_change_percent,
+                    total_day_change=details.total_day_change
+                ))
+            elif idle:
+                yield ": keepalive\n\n"
+    finally:
+        quote_hub.unsubscribe(subscription)
+
+@router.get("/{portfolio_id}/stream")
+async def stream_portfolio_valuation(
+    portfolio_id: int,
+    session: AsyncSessionDep,
+    user_id: str = Depends(get_current_user_id)
+):
+    """
+    Server-Sent Events stream of a portfolio's live valuation. Sends a
+    `snapshot` event with the full portfolio details, then `delta` events
+    carrying only the holdings whose quotes changed plus the new totals.
+    The holding set is fixed for the life of the stream; reconnect after
+    editing the portfolio.
+    """
+    portfolio = await get_owned_portfolio(portfolio_id, user_id, session)
+    if not portfolio:
+        raise HTTPException(status_code=404, detail="Portfolio not found")
     
-    # Note: Calculating total day change is complex and requires more data.
-    total_day_change_percent = None
-    if total_previous_day_value > 0:
-        percent_change = ((total_portfolio_value - total_previous_day_value) / total_previous_day_value) * 100
-        total_day_change_percent = round(percent_change, 2)
-    # We will leave it as None for now.
-    return PortfolioReadWithDetails(
-        id=portfolio.id,
-        name=portfolio.name,
-        holdings=enriched_holdings,
-        total_value=total_portfolio_value,
-        total_day_change_percent=total_day_change_percent,
-        total_day_change=total_day_change
-    )
\ No newline at end of file
+    holdings = list(portfolio.holdings)
+    stock_names_map = get_stock_names([holding.ticker for holding in holdings])
+    # Return the connection to the pool now; a stream may stay open for hours
+    await session.close()
+    
+    return StreamingResponse(
+        _portfolio_valuation_events(portfolio, holdings, stock_names_map),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
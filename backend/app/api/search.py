@@ -1,34 +1,23 @@
 from typing import List
 from fastapi import APIRouter, Query
-from sqlmodel import  select
 
-from app.database.session import SessionDep
 from app.models.supported_ticker import SupportedTickerRead
-from app.database.models import SupportedTicker
+from app.services.search_index import search_stocks
 
 router = APIRouter()
 
 @router.get("/", response_model=List[SupportedTickerRead])
-def search_for_stocks(
+async def search_for_stocks(
     *,
-    session: SessionDep,
     query: str = Query(..., min_length=1, max_length=50)
 ):
     """
     Searches for supported stocks by ticker or name.
-    The search is case-insensitive and returns up to 10 results.
+    The search is case-insensitive, tolerates typos and returns up to 10
+    results ranked by exact ticker, ticker prefix, name words, then fuzzy
+    matches. It runs against an in-memory index, not the database.
     """
-    search_term = f"%{query}%" # Add wildcards for partial matching
-
-    statement = (
-        select(SupportedTicker)
-        .where(
-            # The | operator creates an "OR" condition
-            (SupportedTicker.ticker.ilike(search_term)) |
-            (SupportedTicker.name.ilike(search_term))
-        )
-        .limit(10) # Limit results for performance
-    )
-    
-    results = session.exec(statement).all()
-    return results
\ No newline at end of file
+    return [
+        SupportedTickerRead(ticker=ticker, name=name)
+        for ticker, name in search_stocks(query, limit=10)
+    ]
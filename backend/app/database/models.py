@@ -1,6 +1,7 @@
-from typing import Optional, List
+from datetime import date
+from typing import Optional, List, Dict
 from sqlmodel import Field, SQLModel, Relationship
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import JSON, Column, UniqueConstraint
 
 
 class SupportedTicker(SQLModel, table=True):
@@ -28,4 +29,17 @@ class Holding(SQLModel, table=True):
     # Add unique constraint
     __table_args__ = (UniqueConstraint("portfolio_id", "ticker"),)
     # The relationship back to the Portfolio model
-    portfolio: "Portfolio" = Relationship(back_populates="holdings")
\ No newline at end of file
+    portfolio: "Portfolio" = Relationship(back_populates="holdings")
+
+# End-of-day valuation of a portfolio. Rows are only ever appended.
+class PortfolioSnapshot(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    portfolio_id: int = Field(foreign_key="portfolio.id")
+    snapshot_date: date
+    total_value: float
+    total_day_change: float
+    # {ticker: [quantity, closing price]}; portfolios with an unpriced holding are not recorded
+    positions: Dict[str, List[Optional[float]]] = Field(default_factory=dict, sa_column=Column(JSON))
+
+    # One row per portfolio and day; the unique index also serves history range scans
+    __table_args__ = (UniqueConstraint("portfolio_id", "snapshot_date"),)
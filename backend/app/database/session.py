@@ -1,7 +1,11 @@
 from typing import Annotated
 from fastapi import Depends
 from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url, URL
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import SQLModel, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from dotenv import load_dotenv
 import os
 
@@ -10,8 +14,40 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("Please set DATABASE_URL in your .env file")
 
+# Sync engine: table creation, scripts and the remaining sync routers
 engine = create_engine(DATABASE_URL)
 
+def to_async_database_url(database_url: str) -> URL:
+    """
+    Maps DATABASE_URL onto an asyncio driver: asyncpg for PostgreSQL and
+    aiosqlite for SQLite. libpq's sslmode query option becomes asyncpg's ssl.
+    """
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend == "postgresql":
+        query = dict(url.query)
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        return url.set(drivername="postgresql+asyncpg", query=query)
+    if backend == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    return url
+
+# Async engine: used by the async routers so SQL never blocks the event loop
+async_engine = create_async_engine(to_async_database_url(DATABASE_URL), pool_pre_ping=True)
+
+def dialect_insert(session: AsyncSession):
+    """
+    Returns the INSERT construct for the session's database, which supports
+    ON CONFLICT (on_conflict_do_update / on_conflict_do_nothing).
+    """
+    dialect = session.bind.dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    raise ValueError(f"ON CONFLICT inserts need PostgreSQL or SQLite, not {dialect}")
+
 def create_db_tables():
     
     SQLModel.metadata.create_all(bind=engine)
@@ -20,4 +56,10 @@ def create_session():
     with Session(bind=engine) as session:
         yield session
 
-SessionDep =  Annotated[Session,Depends(create_session)]
\ No newline at end of file
+async def create_async_session():
+    # expire_on_commit=False so returned objects can be serialized after commit
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+SessionDep =  Annotated[Session,Depends(create_session)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(create_async_session)]
@@ -3,7 +3,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import os
 
-from app.database.session import create_db_tables
+from app.database.session import create_db_tables, async_engine
+from app.services import agent_service, finnhub_service, quote_prefetcher, quote_stream, ticker_registry, search_index, portfolio_snapshots
 from app.api import portfolios, search, agent, account # Import the routers
 
 
@@ -14,8 +15,19 @@ async def lifespan(app: FastAPI):
     """
     print("Starting up...")
     create_db_tables() # Create database tables on startup
+    await ticker_registry.load_registry() # Supported tickers are served from memory
+    ticker_registry.start_registry_reloader() # Pick up reruns of the ticker script
+    search_index.get_search_index() # Build the stock search index before the first keystroke
+    await finnhub_service.open_client() # Shared connection pool for market data
+    quote_prefetcher.start_prefetcher() # Keep quotes for held tickers warm
+    portfolio_snapshots.start_snapshot_scheduler() # Record each portfolio's value after the close
     yield
     print("Shutting down...")
+    await quote_prefetcher.stop_prefetcher()
+    await portfolio_snapshots.stop_snapshot_scheduler()
+    await ticker_registry.stop_registry_reloader()
+    await finnhub_service.close_client()
+    await async_engine.dispose()
 
 # Create the main FastAPI app instance
 app = FastAPI(
@@ -63,5 +75,10 @@ def health_check():
     return {
         "status": "healthy",
         "message": "XFoli AI Backend is running",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "quote_cache": finnhub_service.quote_cache.stats(),
+        "finnhub_scheduler": finnhub_service.scheduler_stats(),
+        "portfolio_streams": quote_stream.quote_hub.subscriber_count(),
+        "analysis_cache": agent_service.analysis_cache.stats(),
+        "llm_limiter": agent_service.llm_limiter.stats()
     }
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 class HoldingCreate(BaseModel):
     ticker: str
@@ -19,4 +19,21 @@ class HoldingReadWithMarketData(BaseModel):
     current_price: Optional[float] = None
     current_value: Optional[float] = None
     day_change_percent: Optional[float] = None
-    total_day_change: Optional[float] = None
\ No newline at end of file
+    total_day_change: Optional[float] = None
+
+class HoldingBulkCreate(BaseModel):
+    holdings: List[HoldingCreate]
+
+class HoldingBulkRowResult(BaseModel):
+    row: int
+    ticker: str
+    quantity: Optional[float] = None
+    status: str  # "created", "updated" or "error"
+    error: Optional[str] = None
+    holding: Optional[HoldingRead] = None
+
+class HoldingBulkResult(BaseModel):
+    created: int = 0
+    updated: int = 0
+    failed: int = 0
+    rows: List[HoldingBulkRowResult] = []
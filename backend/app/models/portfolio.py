@@ -1,3 +1,4 @@
+import datetime
 from pydantic import BaseModel
 from app.models.holding import HoldingRead,HoldingReadWithMarketData    
 from typing import List,Optional
@@ -24,4 +25,29 @@ class PortfolioReadWithDetails(BaseModel):
     holdings: List[HoldingReadWithMarketData] = []
     total_value: Optional[float] = None
     total_day_change_percent: Optional[float] = None
-    total_day_change: Optional[float] = None
\ No newline at end of file
+    total_day_change: Optional[float] = None
+
+class PortfolioDashboard(BaseModel):
+    portfolios: List[PortfolioReadWithDetails] = []
+    total_value: Optional[float] = None
+    total_day_change_percent: Optional[float] = None
+    total_day_change: Optional[float] = None
+
+class PortfolioValuationDelta(BaseModel):
+    id: int
+    # Only the holdings whose market data changed since the previous event
+    holdings: List[HoldingReadWithMarketData] = []
+    total_value: Optional[float] = None
+    total_day_change_percent: Optional[float] = None
+    total_day_change: Optional[float] = None
+
+class PortfolioValuePoint(BaseModel):
+    date: datetime.date
+    total_value: float
+    total_day_change: float
+
+class PortfolioHistory(BaseModel):
+    portfolio_id: int
+    points: List[PortfolioValuePoint] = []
+    # True when points were thinned out to fit max_points
+    downsampled: bool = False
@@ -0,0 +1,29 @@
+import datetime
+from pydantic import BaseModel
+from typing import List, Optional
+
+class HoldingRisk(BaseModel):
+    ticker: str
+    weight: float
+    annualized_volatility: Optional[float] = None
+    beta: Optional[float] = None
+
+class PortfolioRisk(BaseModel):
+    portfolio_id: int
+    as_of: datetime.date
+    benchmark: str
+    observations: int = 0  # Daily returns the figures are based on
+    confidence: float
+    annualized_volatility: Optional[float] = None
+    beta: Optional[float] = None
+    max_drawdown: Optional[float] = None  # Negative fraction, e.g. -0.23
+    # One-day value at risk, as a fraction of the portfolio and in dollars
+    var_historical: Optional[float] = None
+    var_parametric: Optional[float] = None
+    var_historical_amount: Optional[float] = None
+    var_parametric_amount: Optional[float] = None
+    holdings: List[HoldingRisk] = []
+    # Correlation of daily returns, rows and columns in the order of holdings
+    correlation: List[List[Optional[float]]] = []
+    # Tickers left out for too little stored price history or a gap too long to fill
+    missing_history: List[str] = []
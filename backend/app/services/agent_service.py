@@ -1,22 +1,64 @@
 # FILE: backend/app/services/agent_service.py
 # DESCRIPTION: LangChain-powered AI agent service using OpenRouter (Official Implementation)
 import os
-from typing import List, Dict, Any
+import json
+import math
+import asyncio
+import hashlib
+from typing import AsyncIterator, Awaitable, List, Dict, Optional, Tuple
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 import re
 
+import numpy as np
+
 # LangChain imports - proper OpenRouter implementation
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import Runnable
 from langchain.chains import LLMChain
 
-from app.database.models import Portfolio, SupportedTicker
-from app.services import finnhub_service
-from sqlmodel import select, Session
+from app.database.models import Portfolio
+from app.services import finnhub_service, news_store, ticker_registry
+from app.services.cache import FRESH, TTLCache
+from app.services.llm_limiter import LLMLimiter, LLMOverloadedError
+from app.services.valuation import value_portfolio
 
 load_dotenv()
 
+# Identical holdings seeing the same market snapshot and news get the same answer
+ANALYSIS_CACHE_SECONDS = float(os.getenv("ANALYSIS_CACHE_SECONDS", "300"))
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "200"))
+# Moves within the same bucket (in percentage points) count as the same snapshot
+ANALYSIS_CACHE_BUCKET_PERCENT = float(os.getenv("ANALYSIS_CACHE_BUCKET_PERCENT", "0.25"))
+
+analysis_cache = TTLCache(max_entries=ANALYSIS_CACHE_MAX_ENTRIES, ttl_seconds=ANALYSIS_CACHE_SECONDS)
+
+# One LLM call per cache key at a time, shared by concurrent requests
+_analyses_in_flight: Dict[str, "asyncio.Task[str]"] = {}
+# The streaming calls among them, which late subscribers can follow token by token
+_streams_in_flight: Dict[str, "StreamedAnalysis"] = {}
+
+ANALYSIS_HEADER = "🤖 AI Portfolio Analysis\n\n"
+
+# News for the likely biggest movers (the top movers by cached quote) is
+# fetched while the quotes are; each one costs a Finnhub call
+ANALYSIS_NEWS_CANDIDATES = int(os.getenv("ANALYSIS_NEWS_CANDIDATES", "3"))
+# How long the analysis waits for headlines before going ahead without them
+ANALYSIS_NEWS_TIMEOUT_SECONDS = float(os.getenv("ANALYSIS_NEWS_TIMEOUT_SECONDS", "3"))
+
+# LLM calls run a few at a time; a short queue waits for a slot and the rest are shed
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "16"))
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "10"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+
+llm_limiter = LLMLimiter(LLM_MAX_CONCURRENCY, LLM_MAX_QUEUE, LLM_QUEUE_TIMEOUT_SECONDS)
+
+# Built on first use and shared by every request
+_llm_chain: Optional[LLMChain] = None
+_stream_chain: Optional[Runnable] = None
+
 # Data models for portfolio analysis
 class StockPerformance(BaseModel):
     """Data model for a single stock's performance."""
@@ -35,75 +77,48 @@ class PortfolioPerformance(BaseModel):
     biggest_mover: StockPerformance = Field(description="The stock with the biggest percentage move.")
     holdings: List[StockPerformance] = Field(description="All portfolio holdings with performance data.")
 
-def get_portfolio_performance(portfolio: Portfolio, session: Session = None) -> PortfolioPerformance:
+async def get_portfolio_performance(portfolio: Portfolio) -> PortfolioPerformance:
     """Calculates comprehensive portfolio performance metrics."""
     try:
-        total_value = 0.0
-        total_prev_value = 0.0
-        biggest_change = 0.0
-        biggest_mover = None
-        holdings_performance = []
+        holdings = portfolio.holdings
+        tickers = [holding.ticker for holding in holdings]
         
-        # Fetch company names if session is available
-        stock_names_map = {}
-        if session:
-            tickers = [holding.ticker for holding in portfolio.holdings]
-            if tickers:
-                supported_tickers = session.exec(
-                    select(SupportedTicker).where(SupportedTicker.ticker.in_(tickers))
-                ).all()
-                stock_names_map = {ticker.ticker: ticker.name for ticker in supported_tickers}
+        # Company names come from the in-memory ticker registry
+        stock_names_map = ticker_registry.get_registry().names(tickers)
         
-        for holding in portfolio.holdings:
-            # Get current market data
-            quote = finnhub_service.get_stock_quote(holding.ticker)
-            if quote and quote.get("current_price"):
-                current_price = quote["current_price"]
-                current_value = holding.quantity * current_price
-                total_value += current_value
-                
-                day_change_pct = quote.get("day_change_percent", 0)
-                
-                # Create stock performance record
-                stock_perf = StockPerformance(
-                    ticker=holding.ticker,
-                    company_name=stock_names_map.get(holding.ticker, ""),
-                    day_change_percent=day_change_pct,
-                    current_price=current_price,
-                    quantity=holding.quantity,
-                    current_value=current_value
-                )
-                holdings_performance.append(stock_perf)
-                
-                # Track biggest mover
-                if abs(day_change_pct) > abs(biggest_change):
-                    biggest_change = day_change_pct
-                    biggest_mover = stock_perf
-                
-                # Calculate previous value
-                if quote.get("previous_close"):
-                    prev_value = holding.quantity * quote["previous_close"]
-                    total_prev_value += prev_value
+        # Get current market data and value every holding with the shared engine
+        quotes_map = await finnhub_service.fetch_multiple_stock_quotes(tickers)
+        valuation = value_portfolio(tickers, [holding.quantity for holding in holdings], quotes_map)
         
-        # Calculate total day change
-        total_day_change_pct = 0.0
-        total_day_change_amount = total_value - total_prev_value
-        if total_prev_value > 0:
-            total_day_change_pct = (total_day_change_amount / total_prev_value) * 100
+        # Only priced holdings are described to the agent
+        holdings_performance = []
+        biggest_mover = None
+        for i, holding in enumerate(holdings):
+            if not valuation.priced[i]:
+                continue
+            stock_perf = StockPerformance(
+                ticker=holding.ticker,
+                company_name=stock_names_map.get(holding.ticker, ""),
+                day_change_percent=valuation.at(valuation.day_change_percents, i) or 0.0,
+                current_price=valuation.at(valuation.prices, i),
+                quantity=holding.quantity,
+                current_value=valuation.at(valuation.values, i)
+            )
+            holdings_performance.append(stock_perf)
+            if i == valuation.biggest_mover_index:
+                biggest_mover = stock_perf
         
         # Default biggest mover if none found
-        if not biggest_mover and holdings_performance:
-            biggest_mover = holdings_performance[0]
-        elif not biggest_mover:
+        if not biggest_mover:
             biggest_mover = StockPerformance(
                 ticker="N/A", company_name="", day_change_percent=0.0, current_price=0.0, 
                 quantity=0.0, current_value=0.0
             )
         
         return PortfolioPerformance(
-            total_value=total_value,
-            total_day_change_percent=total_day_change_pct,
-            total_day_change_amount=total_day_change_amount,
+            total_value=valuation.total_value,
+            total_day_change_percent=valuation.total_day_change_percent or 0.0,
+            total_day_change_amount=valuation.total_day_change,
             biggest_mover=biggest_mover,
             holdings=holdings_performance
         )
@@ -120,48 +135,120 @@ def get_portfolio_performance(portfolio: Portfolio, session: Session = None) ->
             holdings=[]
         )
 
-def get_news_for_stock(ticker: str) -> List[Dict[str, Any]]:
-    """Gets recent news for a specific stock ticker."""
+async def get_news_for_stock(ticker: str, limit: int = 3) -> List[str]:
+    """Gets the most recent headlines for a specific stock ticker."""
     try:
-        # Using existing finnhub service for company news
-        return finnhub_service.get_company_news(ticker) if hasattr(finnhub_service, 'get_company_news') else []
+        # The news store only fetches articles newer than the ones it holds
+        return await news_store.news_store.get_headlines(ticker, limit)
     except Exception as e:
         print(f"Error fetching news for {ticker}: {e}")
         return []
 
-def run_analysis(portfolio: Portfolio, session: Session = None) -> str:
+async def _news_candidates(tickers: List[str], quantities: List[float]) -> List[str]:
     """
-    Main function to run LangChain + OpenRouter AI portfolio analysis.
-    Uses the official OpenRouter implementation pattern.
+    Tickers whose news is fetched alongside the quotes: the top
+    ANALYSIS_NEWS_CANDIDATES movers by cached quote. Holdings without a
+    cached quote are left out; if one turns out to be the biggest mover
+    its news is fetched after the quotes.
     """
+    entries = await finnhub_service.quote_cache.apeek_many(tickers)
+    cached_quotes = {ticker: entry.value for ticker, entry in entries.items() if entry.value is not None}
+    if not cached_quotes:
+        return []
+
+    valuation = value_portfolio(tickers, quantities, cached_quotes)
+    movement = np.where(valuation.priced, np.abs(np.nan_to_num(valuation.day_change_percents)), -1.0)
+    ranked = [tickers[i] for i in np.argsort(-movement, kind="stable") if valuation.priced[i]]
+    return list(dict.fromkeys(ranked))[:ANALYSIS_NEWS_CANDIDATES]
+
+async def _headlines_within_budget(headlines: Awaitable[List[str]], ticker: str) -> List[str]:
+    """Waits up to ANALYSIS_NEWS_TIMEOUT_SECONDS for headlines, else goes on without them."""
     try:
-        # Get portfolio performance data
-        performance = get_portfolio_performance(portfolio, session)
-        
-        # Check for OpenRouter API key
-        openrouter_api_key = os.getenv("OPENROUTER_API_KEY")
-        if not openrouter_api_key:
-            # Return basic analysis if no API key
-            return generate_basic_analysis(performance)
-        
-        # Get news for biggest mover
+        return await asyncio.wait_for(headlines, timeout=ANALYSIS_NEWS_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        print(f"⏱️ News for {ticker} took too long; analysing without it")
+        return []
+
+async def gather_analysis_inputs(portfolio: Portfolio) -> Tuple[PortfolioPerformance, List[str]]:
+    """
+    Gathers the performance snapshot and the biggest mover's headlines in
+    one pass. Headlines for every likely mover are fetched while the quotes
+    are, through the news store, so usually no fetch waits on another. Only
+    a mover outside the candidates costs a second fetch after the quotes.
+    The wait for headlines is capped by ANALYSIS_NEWS_TIMEOUT_SECONDS.
+    """
+    tickers = [holding.ticker for holding in portfolio.holdings]
+    candidates = await _news_candidates(tickers, [holding.quantity for holding in portfolio.holdings])
+    # The news store finishes a refresh even if its reader goes away, so the
+    # other candidates' fetches are not cancelled; their headlines stay in
+    # the store for the next analysis
+    news_tasks = {ticker: asyncio.create_task(get_news_for_stock(ticker, limit=3)) for ticker in candidates}
+    
+    performance = await get_portfolio_performance(portfolio)
+    mover = performance.biggest_mover.ticker
+    if mover in news_tasks:
+        news_headlines = await _headlines_within_budget(news_tasks[mover], mover)
+    elif mover != "N/A":
+        news_headlines = await _headlines_within_budget(get_news_for_stock(mover, limit=3), mover)
+    else:
         news_headlines = []
-        if performance.biggest_mover.ticker != "N/A":
-            news_data = get_news_for_stock(performance.biggest_mover.ticker)
-            news_headlines = [item.get('headline', '') for item in news_data[:3]]  # Top 3 headlines
-        
-        # Prepare holdings breakdown
-        holdings_breakdown = "\n".join([
-            f"• {h.ticker} ({h.company_name}): {h.quantity} shares @ ${h.current_price:.2f} = ${h.current_value:,.2f} ({h.day_change_percent:+.2f}%)"
-            if h.company_name else f"• {h.ticker}: {h.quantity} shares @ ${h.current_price:.2f} = ${h.current_value:,.2f} ({h.day_change_percent:+.2f}%)"
+    return performance, news_headlines
+
+def analysis_cache_key(portfolio_id: int, performance: PortfolioPerformance, news_headlines: List[str]) -> str:
+    """
+    Fingerprint of everything the analysis prompt is built from. Day moves
+    and prices are bucketed, so quotes ticking within a bucket reuse the
+    cached analysis instead of paying for a new LLM call.
+    """
+    bucket = ANALYSIS_CACHE_BUCKET_PERCENT
+    # Relative price buckets of the same width as the day-change buckets
+    price_bucket = math.log1p(bucket / 100)
+
+    def bucketed(percent: float) -> int:
+        return round(percent / bucket)
+
+    snapshot = {
+        "portfolio_id": portfolio_id,
+        "total_day_change": bucketed(performance.total_day_change_percent),
+        "holdings": sorted(
+            [h.ticker, h.quantity, bucketed(h.day_change_percent), round(math.log(h.current_price) / price_bucket) if h.current_price > 0 else 0]
             for h in performance.holdings
-        ])
-        
-        # Prepare news summary
-        news_summary = "\n".join([f"- {headline}" for headline in news_headlines]) if news_headlines else "No recent news available"
-        
-        # Create the LangChain prompt template
-        template = """You are a professional financial advisor and portfolio analyst. 
+        ),
+        "biggest_mover": performance.biggest_mover.ticker,
+        "news": news_headlines,
+    }
+    return hashlib.sha256(json.dumps(snapshot, sort_keys=True).encode()).hexdigest()
+
+def format_portfolio_data(performance: PortfolioPerformance, news_headlines: List[str]) -> str:
+    """Renders the performance snapshot and news into the prompt's portfolio data."""
+    # Prepare holdings breakdown
+    holdings_breakdown = "\n".join([
+        f"• {h.ticker} ({h.company_name}): {h.quantity} shares @ ${h.current_price:.2f} = ${h.current_value:,.2f} ({h.day_change_percent:+.2f}%)"
+        if h.company_name else f"• {h.ticker}: {h.quantity} shares @ ${h.current_price:.2f} = ${h.current_value:,.2f} ({h.day_change_percent:+.2f}%)"
+        for h in performance.holdings
+    ])
+    
+    # Prepare news summary
+    news_summary = "\n".join([f"- {headline}" for headline in news_headlines]) if news_headlines else "No recent news available"
+    
+    return f"""
+Portfolio Overview:
+• Total Value: ${performance.total_value:,.2f}
+• Total Day Change: {performance.total_day_change_percent:+.2f}% (${performance.total_day_change_amount:+,.2f})
+• Number of Holdings: {len(performance.holdings)}
+
+Biggest Mover:
+• {performance.biggest_mover.ticker} ({performance.biggest_mover.company_name}): {performance.biggest_mover.day_change_percent:+.2f}% (${performance.biggest_mover.current_price:.2f}/share, {performance.biggest_mover.quantity} shares)
+
+All Holdings:
+{holdings_breakdown}
+
+Recent News for {performance.biggest_mover.ticker}:
+{news_summary}
+        """
+
+# The analysis prompt; {portfolio_data} comes from format_portfolio_data
+ANALYSIS_PROMPT_TEMPLATE = """You are a professional financial advisor and portfolio analyst. 
 Provide insightful, actionable analysis of the user's portfolio performance in a clean, structured format.
 
 CRITICAL FORMATTING REQUIREMENTS:
@@ -202,54 +289,224 @@ NVDA was your top performer, adding $980 to your portfolio value. The rally was
 
 Remember: Use simple, clean formatting with section headers followed by colons."""
 
-        prompt = PromptTemplate(template=template, input_variables=["portfolio_data"])
-        
-        # Initialize OpenRouter LLM using official pattern
-        llm = ChatOpenAI(
-            api_key=os.getenv("OPENROUTER_API_KEY"),
-            base_url="https://openrouter.ai/api/v1",
-            model="deepseek/deepseek-chat",  # Free model
-            default_headers={
-                "HTTP-Referer": "https://xfoli.com",  # Replace with your app URL
-                "X-Title": "XFoli Portfolio Agent",
-            },
-            temperature=0.1  # Lower temperature for more consistent formatting
-        )
-        
-        # Create the LangChain chain
-        llm_chain = LLMChain(prompt=prompt, llm=llm)
-        
-        # Prepare the portfolio data for analysis
-        portfolio_data = f"""
-Portfolio Overview:
-• Total Value: ${performance.total_value:,.2f}
-• Total Day Change: {performance.total_day_change_percent:+.2f}% (${performance.total_day_change_amount:+,.2f})
-• Number of Holdings: {len(performance.holdings)}
-
-Biggest Mover:
-• {performance.biggest_mover.ticker} ({performance.biggest_mover.company_name}): {performance.biggest_mover.day_change_percent:+.2f}% (${performance.biggest_mover.current_price:.2f}/share, {performance.biggest_mover.quantity} shares)
-
-All Holdings:
-{holdings_breakdown}
-
-Recent News for {performance.biggest_mover.ticker}:
-{news_summary}
-        """
+ANALYSIS_PROMPT = PromptTemplate(template=ANALYSIS_PROMPT_TEMPLATE, input_variables=["portfolio_data"])
+
+def _create_llm() -> ChatOpenAI:
+    # Initialize OpenRouter LLM using official pattern
+    return ChatOpenAI(
+        api_key=os.getenv("OPENROUTER_API_KEY"),
+        base_url="https://openrouter.ai/api/v1",
+        model="deepseek/deepseek-chat",  # Free model
+        default_headers={
+            "HTTP-Referer": "https://xfoli.com",  # Replace with your app URL
+            "X-Title": "XFoli Portfolio Agent",
+        },
+        temperature=0.1,  # Lower temperature for more consistent formatting
+        timeout=LLM_TIMEOUT_SECONDS,
+        max_retries=1
+    )
+
+def _get_chains() -> Tuple[LLMChain, Runnable]:
+    """
+    Returns the shared (blocking, streaming) analysis chains. Both use one
+    client, so its HTTP connection pool is reused across requests.
+    """
+    global _llm_chain, _stream_chain
+    if _llm_chain is None:
+        llm = _create_llm()
+        _llm_chain = LLMChain(prompt=ANALYSIS_PROMPT, llm=llm)
+        _stream_chain = ANALYSIS_PROMPT | llm
+    return _llm_chain, _stream_chain
+
+async def generate_ai_analysis(portfolio_data: str) -> str:
+    """
+    Runs the LangChain + OpenRouter chain over prepared portfolio data.
+    Raises LLMOverloadedError when no slot is free in time.
+    """
+    llm_chain, _ = _get_chains()
+    
+    # Run the chain without blocking the event loop
+    async with llm_limiter.slot():
+        result = await asyncio.wait_for(llm_chain.arun(portfolio_data=portfolio_data), timeout=LLM_TIMEOUT_SECONDS)
+    
+    # Clean up any markdown formatting the AI might have added
+    clean_result = clean_markdown_formatting(result)
+    
+    return f"{ANALYSIS_HEADER}{clean_result}"
+
+def _cached_analysis(cache_key: str, portfolio_data: str) -> "asyncio.Task[str]":
+    """Starts the LLM call for cache_key, or joins the one already running."""
+    task = _analyses_in_flight.get(cache_key)
+    if task is None or task.done():
+        task = asyncio.create_task(generate_ai_analysis(portfolio_data))
+        _analyses_in_flight[cache_key] = task
+
+        def _finished(done: "asyncio.Task[str]", cache_key=cache_key) -> None:
+            if _analyses_in_flight.get(cache_key) is done:
+                del _analyses_in_flight[cache_key]
+            # Failures are not cached; the next request retries the LLM
+            if not done.cancelled() and done.exception() is None:
+                analysis_cache.set(cache_key, done.result())
+
+        task.add_done_callback(_finished)
+    return task
+
+async def run_analysis(portfolio: Portfolio, bypass_cache: bool = False) -> str:
+    """
+    Main function to run LangChain + OpenRouter AI portfolio analysis.
+    Uses the official OpenRouter implementation pattern. Results are cached
+    per portfolio and market snapshot unless bypass_cache is set.
+    """
+    performance = None
+    try:
+        # Check for OpenRouter API key
+        openrouter_api_key = os.getenv("OPENROUTER_API_KEY")
+        if not openrouter_api_key:
+            # Return basic analysis if no API key
+            performance = await get_portfolio_performance(portfolio)
+            return generate_basic_analysis(performance)
         
-        # Run the chain
-        result = llm_chain.run(portfolio_data=portfolio_data)
+        # Quotes and the biggest mover's news (top 3 headlines) are gathered together
+        performance, news_headlines = await gather_analysis_inputs(portfolio)
         
-        # Clean up any markdown formatting the AI might have added
-        clean_result = clean_markdown_formatting(result)
+        cache_key = analysis_cache_key(portfolio.id, performance, news_headlines)
+        if not bypass_cache:
+            state, cached = analysis_cache.lookup(cache_key)
+            if state == FRESH:
+                print(f"💾 Serving cached analysis for portfolio {portfolio.id}")
+                return cached
         
-        return f"🤖 AI Portfolio Analysis\n\n{clean_result}"
+        # Shielded so one client disconnecting does not cancel a call others are waiting on
+        return await asyncio.shield(_cached_analysis(cache_key, format_portfolio_data(performance, news_headlines)))
         
+    except LLMOverloadedError:
+        # Shed the request rather than queue it behind the calls already waiting
+        raise
     except Exception as e:
         print(f"Error running LangChain analysis: {e}")
-        # Fallback to basic analysis
-        performance = get_portfolio_performance(portfolio, session)
+        # Fallback to basic analysis over the snapshot already gathered
+        if performance is None:
+            performance = await get_portfolio_performance(portfolio)
         return generate_basic_analysis(performance)
 
+class StreamedAnalysis:
+    """
+    One streaming LLM call shared by every client asking for the same cache
+    key. Cleaned tokens are buffered, so a client that joins late replays
+    what was already sent and then follows the live stream. The call runs
+    in its own task, so clients disconnecting never cancel it.
+    """
+
+    def __init__(self, cache_key: str, performance: PortfolioPerformance, portfolio_data: str):
+        self.tokens: List[str] = []
+        self._updated = asyncio.Event()
+        self.task = asyncio.create_task(self._generate(cache_key, performance, portfolio_data))
+        self.task.add_done_callback(lambda _: self._publish())
+
+    def _publish(self, text: Optional[str] = None) -> None:
+        if text:
+            self.tokens.append(text)
+        updated, self._updated = self._updated, asyncio.Event()
+        updated.set()
+
+    async def _generate(self, cache_key: str, performance: PortfolioPerformance, portfolio_data: str) -> str:
+        chunks = []
+        cleaner = MarkdownStreamCleaner()
+        _, chain = _get_chains()
+        # LLMOverloadedError propagates; nothing has been streamed yet
+        async with llm_limiter.slot():
+            try:
+                self._publish(ANALYSIS_HEADER)
+                async with asyncio.timeout(LLM_TIMEOUT_SECONDS):
+                    async for chunk in chain.astream({"portfolio_data": portfolio_data}):
+                        chunks.append(chunk.content)
+                        self._publish(cleaner.feed(chunk.content))
+                self._publish(cleaner.flush())
+            except Exception as e:
+                print(f"Error streaming LangChain analysis: {e}")
+                # The fallback replaces whatever was streamed so far; it is not cached
+                return generate_basic_analysis(performance)
+        
+        analysis = f"{ANALYSIS_HEADER}{clean_markdown_formatting(''.join(chunks))}"
+        analysis_cache.set(cache_key, analysis)
+        return analysis
+
+    async def events(self) -> AsyncIterator[Tuple[str, str]]:
+        """Yields every token so far, then the live ones, then ("done", analysis)."""
+        sent = 0
+        while True:
+            updated = self._updated
+            while sent < len(self.tokens):
+                yield "token", self.tokens[sent]
+                sent += 1
+            if self.task.done():
+                break
+            await updated.wait()
+        yield "done", self.task.result()
+
+def _streamed_analysis(cache_key: str, performance: PortfolioPerformance, portfolio_data: str) -> StreamedAnalysis:
+    """Starts a streaming LLM call for cache_key that later requests can join."""
+    stream = StreamedAnalysis(cache_key, performance, portfolio_data)
+    _streams_in_flight[cache_key] = stream
+    # Blocking requests for the same key wait on this call too
+    _analyses_in_flight[cache_key] = stream.task
+
+    def _finished(done: "asyncio.Task[str]", cache_key=cache_key) -> None:
+        if _streams_in_flight.get(cache_key) is stream:
+            del _streams_in_flight[cache_key]
+        if _analyses_in_flight.get(cache_key) is done:
+            del _analyses_in_flight[cache_key]
+        # Every client may have gone by the time the call fails
+        if not done.cancelled() and done.exception() is not None:
+            print(f"Error streaming LangChain analysis: {done.exception()}")
+
+    stream.task.add_done_callback(_finished)
+    return stream
+
+async def stream_analysis(portfolio: Portfolio, bypass_cache: bool = False) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Streaming variant of run_analysis. Yields ("token", text) pieces of the
+    cleaned analysis as the model produces them, then ("done", analysis)
+    with the complete text, which is what clients should keep. Concurrent
+    requests for the same snapshot share one LLM call.
+    """
+    if not os.getenv("OPENROUTER_API_KEY"):
+        analysis = generate_basic_analysis(await get_portfolio_performance(portfolio))
+        yield "token", analysis
+        yield "done", analysis
+        return
+    
+    performance, news_headlines = await gather_analysis_inputs(portfolio)
+    
+    cache_key = analysis_cache_key(portfolio.id, performance, news_headlines)
+    if not bypass_cache:
+        state, cached = analysis_cache.lookup(cache_key)
+        if state == FRESH:
+            print(f"💾 Serving cached analysis for portfolio {portfolio.id}")
+            yield "token", cached
+            yield "done", cached
+            return
+    
+    stream = _streams_in_flight.get(cache_key)
+    if stream is None:
+        running = _analyses_in_flight.get(cache_key)
+        if running is not None and not running.done():
+            # A blocking call for the same snapshot is running; send its result whole
+            try:
+                analysis = await asyncio.shield(running)
+            except LLMOverloadedError:
+                raise
+            except Exception as e:
+                print(f"Error running LangChain analysis: {e}")
+                analysis = generate_basic_analysis(performance)
+            yield "token", analysis
+            yield "done", analysis
+            return
+        stream = _streamed_analysis(cache_key, performance, format_portfolio_data(performance, news_headlines))
+    
+    async for event in stream.events():
+        yield event
+
 def generate_basic_analysis(performance: PortfolioPerformance) -> str:
     """Generates a basic analysis when AI is not available."""
     basic_text = f"""
@@ -273,39 +530,113 @@ Consider monitoring your biggest movers for potential rebalancing opportunities.
     return clean_markdown_formatting(basic_text)
 
 def clean_markdown_formatting(text: str) -> str:
-    """Remove markdown formatting from AI output to ensure clean plain text."""
+    """
+    Remove markdown formatting from AI output to ensure clean plain text.
+    Each line is cleaned on its own, so streamed output can be cleaned the
+    same way one line at a time (see MarkdownStreamCleaner).
+    """
+    text = "\n".join(clean_markdown_line(line) for line in text.split("\n"))
+    
+    # Collapse runs of blank lines
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    
+    return text.strip()
+
+def clean_markdown_line(line: str) -> str:
+    """Removes markdown formatting from a single line of AI output."""
     # Remove markdown headers with bold (### **text** -> text)
-    text = re.sub(r'^#{1,6}\s*\*\*(.*?)\*\*\s*$', r'\1', text, flags=re.MULTILINE)
+    line = re.sub(r'^#{1,6}\s*\*\*(.*?)\*\*\s*$', r'\1', line)
     
     # Remove markdown headers (### text -> text)
-    text = re.sub(r'^#{1,6}\s*(.*?)$', r'\1', text, flags=re.MULTILINE)
+    line = re.sub(r'^#{1,6}\s*(.*?)$', r'\1', line)
     
     # Remove numbered headers with bold (#### **1. text** -> 1. text)
-    text = re.sub(r'^#{1,6}\s*\*\*(\d+\..*?)\*\*', r'\1', text, flags=re.MULTILINE)
+    line = re.sub(r'^#{1,6}\s*\*\*(\d+\..*?)\*\*', r'\1', line)
     
     # Remove bold formatting (**text** -> text)
-    text = re.sub(r'\*\*(.*?)\*\*', r'\1', text)
+    line = re.sub(r'\*\*(.*?)\*\*', r'\1', line)
     
     # Remove italic formatting (*text* -> text)
-    text = re.sub(r'\*([^*]+?)\*', r'\1', text)
+    line = re.sub(r'\*([^*]+?)\*', r'\1', line)
     
     # Clean up bullet points with emoji patterns (🔹 **text:** -> 🔹 text:)
-    text = re.sub(r'([🔹🔸•])\s*\*\*(.*?)\*\*', r'\1 \2', text)
+    line = re.sub(r'([🔹🔸•])\s*\*\*(.*?)\*\*', r'\1 \2', line)
     
     # Clean up markdown bullet points and convert to simple bullets
-    text = re.sub(r'^[\s]*[-*+]\s*', '• ', text, flags=re.MULTILINE)
+    line = re.sub(r'^[\s]*[-*+]\s*', '• ', line)
     
     # Clean up numbered lists that might have markdown
-    text = re.sub(r'^(\d+\.)\s*\*\*(.*?)\*\*', r'\1 \2', text, flags=re.MULTILINE)
+    line = re.sub(r'^(\d+\.)\s*\*\*(.*?)\*\*', r'\1 \2', line)
     
     # Remove check marks with bold (✅ **text** -> ✅ text)
-    text = re.sub(r'([✅⚠️❌])\s*\*\*(.*?)\*\*', r'\1 \2', text)
+    line = re.sub(r'([✅⚠️❌])\s*\*\*(.*?)\*\*', r'\1 \2', line)
     
     # Remove any remaining markdown-style formatting
-    text = re.sub(r'[_~`]+', '', text)
+    line = re.sub(r'[_~`]+', '', line)
     
-    # Clean up multiple spaces and line breaks
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    text = re.sub(r' {2,}', ' ', text)
+    # Clean up multiple spaces
+    line = re.sub(r' {2,}', ' ', line)
     
-    return text.strip()
+    return line.strip()
+
+class MarkdownStreamCleaner:
+    """
+    Applies clean_markdown_formatting to text that arrives in pieces, so the
+    streamed text reads the same as the final analysis. Finished lines are
+    cleaned whole. The unfinished line is released up to its last space as
+    long as that part holds no asterisks, since an open bold or italic
+    marker could still change how it cleans. Blank lines are collapsed and
+    trimmed the way the batch cleaner does.
+    """
+
+    def __init__(self):
+        self._line = ""       # Raw text of the unfinished line
+        self._line_sent = ""  # Cleaned text already emitted for that line
+        self._blank_lines = 0
+        self._started = False
+
+    def _separator(self) -> str:
+        if not self._started:
+            self._started = True
+            return ""
+        separator = "\n\n" if self._blank_lines else "\n"
+        self._blank_lines = 0
+        return separator
+
+    def _emit(self, cleaned: str) -> str:
+        """Returns the text still to send for the current line to read as cleaned."""
+        if not self._line_sent:
+            if not cleaned:
+                return ""
+            text = self._separator() + cleaned
+        elif cleaned.startswith(self._line_sent):
+            text = cleaned[len(self._line_sent):]
+        else:
+            # Sent text cannot be taken back; the final analysis corrects it
+            return ""
+        self._line_sent = cleaned
+        return text
+
+    def feed(self, chunk: str) -> str:
+        """Adds a piece of model output and returns the cleaned text that is now safe to send."""
+        self._line += chunk
+        *finished, self._line = self._line.split("\n")
+        out = []
+        for line in finished:
+            cleaned = clean_markdown_line(line)
+            if cleaned:
+                out.append(self._emit(cleaned))
+            elif not self._line_sent and self._started:
+                self._blank_lines += 1
+            self._line_sent = ""
+
+        cut = self._line.rfind(" ")
+        if cut > 0 and "*" not in self._line[:cut]:
+            out.append(self._emit(clean_markdown_line(self._line[:cut])))
+        return "".join(out)
+
+    def flush(self) -> str:
+        """Returns the rest of the unfinished line once the output is complete."""
+        text = self._emit(clean_markdown_line(self._line))
+        self._line, self._line_sent = "", ""
+        return text
@@ -0,0 +1,214 @@
+# FILE: backend/app/services/cache.py
+# DESCRIPTION: Bounded, thread-safe TTL + LRU cache used for market data.
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, NamedTuple, Optional, Tuple
+
+# Lookup states returned by TTLCache.lookup()
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+
+class CacheEntry(NamedTuple):
+    value: Any
+    expires_at: float   # Served as fresh until this monotonic time
+    stale_until: float  # Still servable as stale until this monotonic time
+
+
+# Called with (key, value) after a write that changed the cached value
+CacheListener = Callable[[Hashable, Any], None]
+
+
+class CacheListenersMixin:
+    """
+    Lets other components react to cache writes instead of polling the cache.
+    Listeners run synchronously on the writing thread, so they must be cheap
+    and must not block; a failing listener never fails the write.
+    """
+
+    _listeners: List[CacheListener]
+
+    def add_listener(self, listener: CacheListener) -> None:
+        self._listeners = [*getattr(self, "_listeners", []), listener]
+
+    def remove_listener(self, listener: CacheListener) -> None:
+        self._listeners = [l for l in getattr(self, "_listeners", []) if l is not listener]
+
+    def _notify(self, key: Hashable, value: Any) -> None:
+        for listener in getattr(self, "_listeners", []):
+            try:
+                listener(key, value)
+            except Exception as e:
+                print(f"⚠️ Cache listener failed for {key}: {e}")
+
+
+class TTLCache(CacheListenersMixin):
+    """
+    An in-memory cache with a hard entry limit and per-entry expiry.
+    The least recently used entry is evicted once max_entries is reached.
+    Entries may outlive their TTL by a stale window, during which lookup()
+    still returns them (flagged STALE) so callers can serve them while they
+    revalidate. All operations are guarded by a lock so worker threads can
+    share it.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, stale_seconds: float = 0):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def lookup(self, key: Hashable) -> Tuple[str, Any]:
+        """
+        Returns (state, value) where state is FRESH, STALE or MISS.
+        Unlike get(), this distinguishes a cached None from a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISS, None
+
+            now = time.monotonic()
+            if now >= entry.stale_until:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return MISS, None
+
+            self._entries.move_to_end(key)
+            if now >= entry.expires_at:
+                self.stale_hits += 1
+                return STALE, entry.value
+            self.hits += 1
+            return FRESH, entry.value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns the cached value, or default if it is missing or expired."""
+        state, value = self.lookup(key)
+        return value if state == FRESH else default
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl_seconds: Optional[float] = None,
+        stale_seconds: Optional[float] = None
+    ) -> None:
+        """Stores a value, evicting the least recently used entries if full."""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        stale = self.stale_seconds if stale_seconds is None else stale_seconds
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            previous = self._entries.get(key)
+            self._entries[key] = CacheEntry(value, expires_at, expires_at + stale)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        # Re-caching an identical value only extends its expiry; nobody needs to hear about it
+        if previous is None or previous.value != value:
+            self._notify(key, value)
+
+    def peek(self, key: Hashable) -> Optional[CacheEntry]:
+        """
+        Returns the raw entry (even if stale) without counting a lookup or
+        refreshing its LRU position.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() >= entry.stale_until:
+                return None
+            return entry
+
+    def peek_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, CacheEntry]:
+        """peek() for several keys at once; missing and dead keys are left out."""
+        now = time.monotonic()
+        with self._lock:
+            entries = {key: self._entries.get(key) for key in keys}
+        return {key: entry for key, entry in entries.items() if entry is not None and now < entry.stale_until}
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """True if a peeked entry has not yet expired."""
+        return time.monotonic() < entry.expires_at
+
+    def ttl_remaining(self, key: Hashable) -> Optional[float]:
+        """
+        Seconds until the entry expires, or None if it is missing or expired.
+        Does not count as a lookup and does not refresh the LRU position.
+        """
+        entry = self.peek(key)
+        if entry is None:
+            return None
+        remaining = entry.expires_at - time.monotonic()
+        return remaining if remaining > 0 else None
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    # Async variants, interchangeable with the shared backends' (see
+    # cache_backends); in memory there is no I/O to move off the event loop
+
+    async def alookup(self, key: Hashable) -> Tuple[str, Any]:
+        return self.lookup(key)
+
+    async def aset(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl_seconds: Optional[float] = None,
+        stale_seconds: Optional[float] = None
+    ) -> None:
+        self.set(key, value, ttl_seconds, stale_seconds)
+
+    async def apeek(self, key: Hashable) -> Optional[CacheEntry]:
+        return self.peek(key)
+
+    async def apeek_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, CacheEntry]:
+        return self.peek_many(keys)
+
+    async def adelete(self, key: Hashable) -> None:
+        self.delete(key)
+
+    async def attl_remaining_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, float]:
+        """Seconds until expiry for each key that is still fresh."""
+        now = time.monotonic()
+        return {key: entry.expires_at - now for key, entry in self.peek_many(keys).items() if entry.expires_at > now}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> dict:
+        """Returns counters used to size the cache and its TTL."""
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "backend": "memory",
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "stale_seconds": self.stale_seconds,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else None,
+            }
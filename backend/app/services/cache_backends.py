@@ -0,0 +1,439 @@
+# FILE: backend/app/services/cache_backends.py
+# DESCRIPTION: Cross-process cache backends with the same interface as TTLCache.
+#
+# The in-memory TTLCache is private to one process, so N uvicorn workers keep
+# N cold caches and call Finnhub N times. These backends let every worker
+# share one warm cache:
+#   - SQLiteCache: a WAL-mode SQLite file, shared by all workers on one host
+#   - RedisCache:  any Redis-protocol server (Redis, Valkey, KeyDB, ...)
+# Pick one with create_cache(); "memory" keeps the per-process TTLCache.
+#
+# Both backends do blocking I/O (a SQLite lock wait, a socket round trip), so
+# async code must use the a-prefixed methods, which run it in a worker
+# thread, and should read several keys with one apeek_many() call.
+
+import os
+import json
+import time
+import asyncio
+import socket
+import sqlite3
+import tempfile
+import threading
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from app.services.cache import TTLCache, CacheEntry, CacheListenersMixin, FRESH, STALE, MISS
+
+
+class _SharedCacheBase(CacheListenersMixin):
+    """
+    Shared bookkeeping for cross-process backends. Expiry times are wall-clock
+    (time.time) so that every process agrees on them. Hit/miss counters and
+    listeners are per process: listeners hear about this process's writes only.
+    """
+
+    backend_name = "shared"
+
+    def __init__(self, ttl_seconds: float, stale_seconds: float = 0):
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _count(self, state: str) -> None:
+        with self._stats_lock:
+            if state == FRESH:
+                self.hits += 1
+            elif state == STALE:
+                self.stale_hits += 1
+            else:
+                self.misses += 1
+
+    def _classify(self, entry: Optional[CacheEntry]) -> Tuple[str, Any]:
+        now = time.time()
+        if entry is None or now >= entry.stale_until:
+            state, value = MISS, None
+        elif now >= entry.expires_at:
+            state, value = STALE, entry.value
+        else:
+            state, value = FRESH, entry.value
+        self._count(state)
+        return state, value
+
+    def _expiry(self, ttl_seconds: Optional[float], stale_seconds: Optional[float]) -> Tuple[float, float]:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        stale = self.stale_seconds if stale_seconds is None else stale_seconds
+        expires_at = time.time() + ttl
+        return expires_at, expires_at + stale
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        state, value = self.lookup(key)
+        return value if state == FRESH else default
+
+    def peek(self, key: Hashable) -> Optional[CacheEntry]:
+        return self.peek_many([key]).get(key)
+
+    def _live(self, entries: Dict[Hashable, CacheEntry]) -> Dict[Hashable, CacheEntry]:
+        now = time.time()
+        return {key: entry for key, entry in entries.items() if now < entry.stale_until}
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """True if a peeked entry has not yet expired."""
+        return time.time() < entry.expires_at
+
+    # Async variants: the backend I/O runs in a worker thread so a slow lock
+    # or round trip never stalls the event loop
+
+    async def alookup(self, key: Hashable) -> Tuple[str, Any]:
+        return await asyncio.to_thread(self.lookup, key)
+
+    async def aset(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl_seconds: Optional[float] = None,
+        stale_seconds: Optional[float] = None
+    ) -> None:
+        await asyncio.to_thread(self.set, key, value, ttl_seconds, stale_seconds)
+
+    async def apeek(self, key: Hashable) -> Optional[CacheEntry]:
+        return await asyncio.to_thread(self.peek, key)
+
+    async def apeek_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, CacheEntry]:
+        return await asyncio.to_thread(self.peek_many, list(keys))
+
+    async def adelete(self, key: Hashable) -> None:
+        await asyncio.to_thread(self.delete, key)
+
+    def ttl_remaining_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, float]:
+        now = time.time()
+        return {key: entry.expires_at - now for key, entry in self.peek_many(keys).items() if entry.expires_at > now}
+
+    async def attl_remaining_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, float]:
+        """Seconds until expiry for each key that is still fresh."""
+        return await asyncio.to_thread(self.ttl_remaining_many, list(keys))
+
+    def ttl_remaining(self, key: Hashable) -> Optional[float]:
+        entry = self.peek(key)
+        if entry is None:
+            return None
+        remaining = entry.expires_at - time.time()
+        return remaining if remaining > 0 else None
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "backend": self.backend_name,
+                "ttl_seconds": self.ttl_seconds,
+                "stale_seconds": self.stale_seconds,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else None,
+            }
+
+
+class SQLiteCache(_SharedCacheBase):
+    """
+    Cache stored in a SQLite file in WAL mode, so concurrent readers in other
+    processes never block. The entry count is bounded with LRU eviction on
+    the last access time. Reads never write: the keys a process has read are
+    remembered in memory and their access times are flushed with its next
+    write, so recency is approximate but workers only contend on writes.
+    """
+
+    backend_name = "sqlite"
+
+    # Stay well under SQLite's bound-parameter limit in IN (...) reads
+    READ_BATCH_SIZE = 500
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: float, stale_seconds: float = 0):
+        super().__init__(ttl_seconds, stale_seconds)
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._touched: Dict[str, float] = {}
+        self._touched_lock = threading.Lock()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " stale_until REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_accessed_at ON cache (accessed_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _read_many(self, keys: List[Hashable]) -> Dict[Hashable, CacheEntry]:
+        by_text = {str(key): key for key in keys}
+        texts = list(by_text)
+        entries: Dict[Hashable, CacheEntry] = {}
+        try:
+            conn = self._connection()
+            for start in range(0, len(texts), self.READ_BATCH_SIZE):
+                batch = texts[start:start + self.READ_BATCH_SIZE]
+                rows = conn.execute(
+                    f"SELECT key, value, expires_at, stale_until FROM cache WHERE key IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                for key, value, expires_at, stale_until in rows:
+                    entries[by_text[key]] = CacheEntry(json.loads(value), expires_at, stale_until)
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"⚠️ SQLite cache read failed for {len(texts)} keys: {e}")
+            return {}
+        return entries
+
+    def lookup(self, key: Hashable) -> Tuple[str, Any]:
+        entry = self._read_many([key]).get(key)
+        if entry is not None:
+            with self._touched_lock:
+                self._touched[str(key)] = time.time()
+        return self._classify(entry)
+
+    def peek_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, CacheEntry]:
+        """Reads several entries (even if stale) in one query; missing and dead keys are left out."""
+        return self._live(self._read_many(list(keys)))
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl_seconds: Optional[float] = None,
+        stale_seconds: Optional[float] = None
+    ) -> None:
+        expires_at, stale_until = self._expiry(ttl_seconds, stale_seconds)
+        now = time.time()
+        with self._touched_lock:
+            touched, self._touched = self._touched, {}
+        try:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            if touched:
+                conn.executemany(
+                    "UPDATE cache SET accessed_at = max(accessed_at, ?) WHERE key = ?",
+                    [(accessed_at, touched_key) for touched_key, accessed_at in touched.items()]
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, stale_until, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (str(key), json.dumps(value), expires_at, stale_until, now)
+            )
+            # Drop dead entries first, then the least recently used ones over the limit
+            conn.execute("DELETE FROM cache WHERE stale_until <= ?", (now,))
+            conn.execute(
+                "DELETE FROM cache WHERE key IN ("
+                " SELECT key FROM cache ORDER BY accessed_at"
+                " LIMIT max((SELECT COUNT(*) FROM cache) - ?, 0))",
+                (self.max_entries,)
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"⚠️ SQLite cache write failed for {key}: {e}")
+            try:
+                self._connection().execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+        else:
+            self._notify(key, value)
+
+    def delete(self, key: Hashable) -> None:
+        try:
+            self._connection().execute("DELETE FROM cache WHERE key = ?", (str(key),))
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"⚠️ SQLite cache delete failed for {key}: {e}")
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["max_entries"] = self.max_entries
+        try:
+            stats["size"] = self._connection().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        except sqlite3.Error:
+            stats["size"] = None
+        return stats
+
+
+class RedisProtocolClient:
+    """
+    Minimal blocking client for the Redis serialization protocol (RESP2).
+    Only what the cache needs: one connection, a lock, and reconnect on error.
+    """
+
+    def __init__(self, url: str, timeout: float = 1.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> None:
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._sock.makefile("rb")
+        if self.password:
+            self._roundtrip("AUTH", self.password)
+        if self.db:
+            self._roundtrip("SELECT", str(self.db))
+
+    def close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._reader.close()
+                self._sock.close()
+            finally:
+                self._sock = None
+                self._reader = None
+
+    def _roundtrip(self, *args: str) -> Any:
+        parts: List[bytes] = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg.encode() if isinstance(arg, str) else arg
+            parts.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+        self._sock.sendall(b"".join(parts))
+        return self._read_reply()
+
+    def _read_reply(self) -> Any:
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        prefix, payload = line[:1], line[1:-2]
+        if prefix == b"+":
+            return payload.decode()
+        if prefix == b"-":
+            raise RuntimeError(payload.decode())
+        if prefix == b":":
+            return int(payload)
+        if prefix == b"$":
+            length = int(payload)
+            if length == -1:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if prefix == b"*":
+            count = int(payload)
+            return None if count == -1 else [self._read_reply() for _ in range(count)]
+        raise RuntimeError(f"Unexpected reply from server: {line!r}")
+
+    def execute(self, *args: str) -> Any:
+        """Sends one command, reconnecting once if the connection dropped."""
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    return self._roundtrip(*args)
+                except (OSError, ConnectionError):
+                    self.close()
+                    if attempt:
+                        raise
+
+
+class RedisCache(_SharedCacheBase):
+    """
+    Cache stored in a Redis-protocol server. Keys expire server-side at the
+    end of their stale window. The memory bound is enforced by the server's
+    maxmemory/eviction policy (use allkeys-lru).
+    """
+
+    backend_name = "redis"
+
+    def __init__(self, url: str, ttl_seconds: float, stale_seconds: float = 0, prefix: str = "xfoli:quote:"):
+        super().__init__(ttl_seconds, stale_seconds)
+        self.prefix = prefix
+        self._client = RedisProtocolClient(url)
+
+    def _decode(self, raw: Optional[bytes]) -> Optional[CacheEntry]:
+        if raw is None:
+            return None
+        payload = json.loads(raw)
+        return CacheEntry(payload["value"], payload["expires_at"], payload["stale_until"])
+
+    def _read_many(self, keys: List[Hashable]) -> Dict[Hashable, CacheEntry]:
+        if not keys:
+            return {}
+        try:
+            raws = self._client.execute("MGET", *(self.prefix + str(key) for key in keys))
+            decoded = {key: self._decode(raw) for key, raw in zip(keys, raws)}
+        except (OSError, ConnectionError, RuntimeError, ValueError, KeyError, TypeError) as e:
+            self.errors += 1
+            print(f"⚠️ Redis cache read failed for {len(keys)} keys: {e}")
+            return {}
+        return {key: entry for key, entry in decoded.items() if entry is not None}
+
+    def lookup(self, key: Hashable) -> Tuple[str, Any]:
+        return self._classify(self._read_many([key]).get(key))
+
+    def peek_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, CacheEntry]:
+        """Reads several entries (even if stale) with one MGET; missing and dead keys are left out."""
+        return self._live(self._read_many(list(dict.fromkeys(keys))))
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl_seconds: Optional[float] = None,
+        stale_seconds: Optional[float] = None
+    ) -> None:
+        expires_at, stale_until = self._expiry(ttl_seconds, stale_seconds)
+        payload = json.dumps({"value": value, "expires_at": expires_at, "stale_until": stale_until})
+        expire_ms = max(int((stale_until - time.time()) * 1000), 1)
+        try:
+            self._client.execute("SET", self.prefix + str(key), payload, "PX", str(expire_ms))
+        except (OSError, ConnectionError, RuntimeError) as e:
+            self.errors += 1
+            print(f"⚠️ Redis cache write failed for {key}: {e}")
+        else:
+            self._notify(key, value)
+
+    def delete(self, key: Hashable) -> None:
+        try:
+            self._client.execute("DEL", self.prefix + str(key))
+        except (OSError, ConnectionError, RuntimeError) as e:
+            self.errors += 1
+            print(f"⚠️ Redis cache delete failed for {key}: {e}")
+
+
+def create_cache(max_entries: int, ttl_seconds: float, stale_seconds: float = 0, name: str = "quotes"):
+    """
+    Builds the cache selected by QUOTE_CACHE_BACKEND ("memory", "sqlite" or
+    "redis"). Every backend exposes lookup/get/set/peek/peek_many/
+    ttl_remaining/stats and the async alookup/aset/apeek/apeek_many/adelete.
+    """
+    backend = os.getenv("QUOTE_CACHE_BACKEND", "memory").lower()
+    if backend == "sqlite":
+        path = os.getenv(
+            "QUOTE_CACHE_SQLITE_PATH",
+            os.path.join(tempfile.gettempdir(), f"xfoli_{name}_cache.sqlite3")
+        )
+        return SQLiteCache(path, max_entries=max_entries, ttl_seconds=ttl_seconds, stale_seconds=stale_seconds)
+    if backend == "redis":
+        url = os.getenv("QUOTE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+        return RedisCache(url, ttl_seconds=ttl_seconds, stale_seconds=stale_seconds, prefix=f"xfoli:{name}:")
+    if backend != "memory":
+        raise ValueError(f"Unknown QUOTE_CACHE_BACKEND '{backend}'")
+    return TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds, stale_seconds=stale_seconds)
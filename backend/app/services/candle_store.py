@@ -0,0 +1,129 @@
+# FILE: backend/app/services/candle_store.py
+# DESCRIPTION: Local columnar store of OHLCV price candles per ticker.
+#
+# Candles are kept as one NumPy structured array per (resolution, ticker),
+# sorted by timestamp and saved as .npy files. Reads memory-map the file and
+# binary-search the timestamp column, so a range read never hits Finnhub
+# and never copies more than the requested slice.
+
+import os
+import time
+import asyncio
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app.services import finnhub_service
+from app.services.finnhub_scheduler import Priority
+
+CANDLE_STORE_DIR = os.getenv(
+    "CANDLE_STORE_DIR",
+    str(Path(__file__).resolve().parents[2] / "data" / "candles")
+)
+CANDLE_BACKFILL_DAYS = int(os.getenv("CANDLE_BACKFILL_DAYS", "730"))
+
+CANDLE_DTYPE = np.dtype([
+    ("t", "<i8"),  # Bar open time, unix seconds
+    ("o", "<f8"),
+    ("h", "<f8"),
+    ("l", "<f8"),
+    ("c", "<f8"),
+    ("v", "<f8"),
+])
+
+# Finnhub resolutions we store; intraday ones are optional
+RESOLUTIONS = ("D", "60", "30", "15", "5", "1")
+
+
+class CandleStore:
+    """Reads, merges and backfills candle files under a root directory."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self._write_lock = threading.Lock()
+        # Reads run in worker threads (see risk_analytics), so the map cache is locked too
+        self._maps_lock = threading.Lock()
+        self._maps: Dict[Path, Tuple[int, np.ndarray]] = {}
+
+    def _path(self, ticker: str, resolution: str) -> Path:
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unsupported resolution '{resolution}'")
+        return self.root / resolution / f"{ticker.upper()}.npy"
+
+    def _load(self, path: Path) -> np.ndarray:
+        """Memory-maps a candle file, reusing the map until the file is replaced."""
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return np.empty(0, dtype=CANDLE_DTYPE)
+        with self._maps_lock:
+            cached = self._maps.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        candles = np.load(path, mmap_mode="r")
+        with self._maps_lock:
+            self._maps[path] = (mtime, candles)
+        return candles
+
+    def read(
+        self,
+        ticker: str,
+        resolution: str = "D",
+        start: Optional[int] = None,
+        end: Optional[int] = None
+    ) -> np.ndarray:
+        """Returns the candles with start <= t <= end (unix seconds)."""
+        candles = self._load(self._path(ticker, resolution))
+        lo = 0 if start is None else int(np.searchsorted(candles["t"], start, side="left"))
+        hi = len(candles) if end is None else int(np.searchsorted(candles["t"], end, side="right"))
+        return candles[lo:hi]
+
+    def last_timestamp(self, ticker: str, resolution: str = "D") -> Optional[int]:
+        candles = self._load(self._path(ticker, resolution))
+        return int(candles["t"][-1]) if len(candles) else None
+
+    def append(self, ticker: str, resolution: str, candles: np.ndarray) -> int:
+        """
+        Merges new candles into the stored series. Bars with an existing
+        timestamp replace the stored ones (the current bar keeps changing
+        until it closes). Returns the stored length.
+        """
+        path = self._path(ticker, resolution)
+        with self._write_lock:
+            existing = np.array(self._load(path))
+            merged = np.concatenate([existing, candles.astype(CANDLE_DTYPE)])
+            # Keep the last occurrence of each timestamp, i.e. the newest data
+            _, last_index = np.unique(merged["t"][::-1], return_index=True)
+            merged = merged[len(merged) - 1 - last_index]
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp.npy")
+            np.save(tmp_path, merged)
+            os.replace(tmp_path, path)  # Readers keep their old map until they reload
+            return len(merged)
+
+    async def backfill(self, ticker: str, resolution: str = "D", lookback_days: int = CANDLE_BACKFILL_DAYS) -> int:
+        """
+        Fetches candles from the last stored bar (inclusive, so a still-open
+        bar is refreshed) up to now, or the full lookback on first use.
+        Returns the number of bars received. File reads and writes run in a
+        worker thread so a large rewrite never stalls the event loop.
+        """
+        now = int(time.time())
+        last = await asyncio.to_thread(self.last_timestamp, ticker, resolution)
+        start = last if last is not None else now - lookback_days * 86400
+
+        columns = await finnhub_service.fetch_stock_candles(ticker, resolution, start, now, Priority.BACKGROUND)
+        if not columns or not columns["t"]:
+            return 0
+
+        candles = np.empty(len(columns["t"]), dtype=CANDLE_DTYPE)
+        for field in CANDLE_DTYPE.names:
+            candles[field] = columns[field]
+        await asyncio.to_thread(self.append, ticker, resolution, candles)
+        return len(candles)
+
+
+candle_store = CandleStore(CANDLE_STORE_DIR)
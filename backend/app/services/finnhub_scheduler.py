@@ -0,0 +1,263 @@
+# FILE: backend/app/services/finnhub_scheduler.py
+# DESCRIPTION: Central, rate-limit-aware scheduler for outbound Finnhub calls.
+
+import asyncio
+import itertools
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+import httpx
+
+
+class Priority(IntEnum):
+    """Lower values are dispatched first."""
+    INTERACTIVE = 0  # A user is waiting on the response (portfolio views)
+    NEWS = 1         # Company news for an analysis a user is waiting on
+    BACKGROUND = 2   # Cache refreshes nobody is waiting on
+
+
+class FinnhubRateLimitError(Exception):
+    """Raised when a call is still rate limited after all retries."""
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second up to `capacity`.
+    A 429 pauses the bucket so nothing is sent until the upstream
+    Retry-After window has passed.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        """Waits until a token is available and takes it."""
+        while True:
+            now = time.monotonic()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Stops handing out tokens for the given number of seconds."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0
+
+    @property
+    def tokens(self) -> float:
+        self._refill()
+        return self._tokens
+
+
+class SlidingWindow:
+    """
+    Allows at most `limit` acquisitions in any `window_seconds` span. A
+    token bucket alone lets a full bucket plus a window of refill through
+    right after an idle spell, which overshoots a per-minute plan limit.
+    """
+
+    def __init__(self, limit: int, window_seconds: float = 60.0):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self._times: "deque[float]" = deque()
+
+    def _expire(self, now: float) -> None:
+        while self._times and now - self._times[0] >= self.window_seconds:
+            self._times.popleft()
+
+    async def acquire(self) -> None:
+        """Waits until the window has room and records the acquisition."""
+        while True:
+            now = time.monotonic()
+            self._expire(now)
+            if len(self._times) < self.limit:
+                self._times.append(now)
+                return
+            await asyncio.sleep(self._times[0] + self.window_seconds - now)
+
+    @property
+    def available(self) -> int:
+        self._expire(time.monotonic())
+        return self.limit - len(self._times)
+
+
+class FinnhubScheduler:
+    """
+    Every Finnhub request is submitted here with a priority. A single
+    dispatcher pulls the most urgent job from a priority queue, waits for a
+    rate-limit token (the bucket smooths bursts; a 60-second sliding window
+    keeps every minute within the plan limit) and runs it, keeping at most
+    `max_concurrency` requests on the wire. 429 responses pause the bucket (honouring Retry-After) and
+    the job is re-queued instead of surfacing as an error. A job submitted
+    with a key can be promoted to a more urgent priority while it waits.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str, Dict[str, Any]], Awaitable[httpx.Response]],
+        calls_per_minute: int,
+        burst: int,
+        max_concurrency: int,
+        max_retries: int = 3,
+        max_backoff_seconds: float = 60.0,
+    ):
+        self._send = send
+        # The burst is a cap inside the per-minute limit, never on top of it
+        self._bucket = TokenBucket(rate=calls_per_minute / 60.0, capacity=min(burst, calls_per_minute))
+        self._window = SlidingWindow(calls_per_minute)
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._queue: "asyncio.PriorityQueue[tuple]" = asyncio.PriorityQueue()
+        self._sequence = itertools.count()
+        self._max_retries = max_retries
+        self._max_backoff_seconds = max_backoff_seconds
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._keyed_jobs: Dict[Hashable, dict] = {}
+        self._in_flight = 0
+        self.rate_limited_responses = 0
+
+    def start(self) -> None:
+        if self._dispatcher is None:
+            self._dispatcher = asyncio.create_task(self._dispatch_forever())
+
+    async def stop(self) -> None:
+        """Stops dispatching and cancels any jobs still waiting in the queue."""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+        while not self._queue.empty():
+            *_, job = self._queue.get_nowait()
+            job["queued"] = False
+            job["future"].cancel()
+
+    async def submit(
+        self,
+        path: str,
+        params: Dict[str, Any],
+        priority: Priority = Priority.INTERACTIVE,
+        key: Optional[Hashable] = None
+    ) -> Any:
+        """
+        Queues a GET request and returns its decoded JSON body. A key lets
+        promote() find the job while it is still waiting.
+        """
+        future = asyncio.get_running_loop().create_future()
+        job = {"path": path, "params": params, "future": future, "attempts": 0, "priority": int(priority), "queued": False}
+        if key is not None:
+            self._keyed_jobs[key] = job
+
+            def _forget(_, key=key, job=job) -> None:
+                if self._keyed_jobs.get(key) is job:
+                    del self._keyed_jobs[key]
+
+            future.add_done_callback(_forget)
+        self._enqueue(job, next(self._sequence))
+        return await future
+
+    def promote(self, key: Hashable, priority: Priority) -> None:
+        """Moves a waiting keyed job up to `priority` if that is more urgent."""
+        job = self._keyed_jobs.get(key)
+        if job is None or int(priority) >= job["priority"]:
+            return
+        job["priority"] = int(priority)
+        if job["queued"]:
+            # The old queue entry is skipped once it no longer matches the job's priority
+            self._enqueue(job, next(self._sequence))
+
+    def _enqueue(self, job: dict, sequence: int) -> None:
+        job["queued"] = True
+        self._queue.put_nowait((job["priority"], sequence, job))
+
+    def _superseded(self, item: tuple) -> bool:
+        """True for queue entries left behind by a promotion."""
+        priority, _, job = item
+        return not job["queued"] or priority != job["priority"]
+
+    async def _next_item(self) -> tuple:
+        item = await self._queue.get()
+        while self._superseded(item):
+            item = await self._queue.get()
+        return item
+
+    async def _dispatch_forever(self) -> None:
+        while True:
+            await self._slots.acquire()
+            item = await self._next_item()
+            await self._bucket.acquire()
+            await self._window.acquire()
+            # A more urgent job may have arrived while we waited for a token
+            if not self._queue.empty():
+                self._queue.put_nowait(item)
+                item = await self._next_item()
+
+            _, sequence, job = item
+            job["queued"] = False
+            if job["future"].done():  # Caller went away while queued
+                self._slots.release()
+                continue
+            asyncio.create_task(self._run(sequence, job))
+
+    async def _run(self, sequence: int, job: dict) -> None:
+        future = job["future"]
+        self._in_flight += 1
+        try:
+            response = await self._send(job["path"], job["params"])
+            if response.status_code == 429:
+                self.rate_limited_responses += 1
+                job["attempts"] += 1
+                backoff = self._retry_after_seconds(response, job["attempts"])
+                print(f"⏳ Finnhub rate limit hit on {job['path']}, backing off {backoff:.1f}s")
+                self._bucket.pause(backoff)
+                if job["attempts"] > self._max_retries:
+                    if not future.done():
+                        future.set_exception(FinnhubRateLimitError(f"Rate limited on {job['path']}"))
+                else:
+                    # Keep the original sequence so the job does not lose its place
+                    self._enqueue(job, sequence)
+                return
+            response.raise_for_status()
+            if not future.done():
+                future.set_result(response.json())
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+
+    def _retry_after_seconds(self, response: httpx.Response, attempt: int) -> float:
+        """Uses the Retry-After header when present, otherwise exponential backoff."""
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(float(retry_after), self._max_backoff_seconds)
+            except ValueError:
+                pass
+        return min(2 ** (attempt - 1), self._max_backoff_seconds)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "in_flight": self._in_flight,
+            "tokens_available": round(min(self._bucket.tokens, self._window.available), 2),
+            "rate_limited_responses": self.rate_limited_responses,
+        }
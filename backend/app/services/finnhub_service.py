@@ -1,65 +1,240 @@
 import os
 import time
-import requests
+import asyncio
+import httpx
 from dotenv import load_dotenv
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Optional
-from datetime import datetime, timedelta
+from typing import Any, List, Dict, Optional
+from datetime import date, datetime, timedelta, timezone
+
+from app.services.cache import FRESH, STALE
+from app.services.cache_backends import create_cache
+from app.services import market_hours
+from app.services.finnhub_scheduler import FinnhubScheduler, FinnhubRateLimitError, Priority
 
 
 load_dotenv()
 FINNHUB_API_KEY = os.getenv("FINNHUB_API_KEY")
 FINNHUB_API_URL = "https://finnhub.io/api/v1"
 
-def get_company_news(ticker: str) -> list:
-    """Fetches recent news for a given stock ticker from the last 7 days."""
+# --- SHARED ASYNC HTTP CLIENT ---
+# One pooled client lives for the whole app (opened/closed in main.lifespan),
+# so quote and news calls reuse keep-alive connections instead of paying a new
+# TLS handshake on every cache miss.
+FINNHUB_TIMEOUT_SECONDS = float(os.getenv("FINNHUB_TIMEOUT_SECONDS", "5"))
+FINNHUB_MAX_CONNECTIONS = int(os.getenv("FINNHUB_MAX_CONNECTIONS", "20"))
+FINNHUB_MAX_CONCURRENCY = int(os.getenv("FINNHUB_MAX_CONCURRENCY", "10"))
+# Plan limits: the free tier allows 60 calls/minute. FINNHUB_BURST caps how
+# many go out back to back; it never adds calls on top of the per-minute limit.
+FINNHUB_CALLS_PER_MINUTE = int(os.getenv("FINNHUB_CALLS_PER_MINUTE", "60"))
+FINNHUB_BURST = int(os.getenv("FINNHUB_BURST", "30"))
+
+_client: Optional[httpx.AsyncClient] = None
+_scheduler: Optional[FinnhubScheduler] = None
+
+async def open_client() -> None:
+    """Opens the pooled Finnhub client on the running event loop."""
+    global _client, _scheduler
+    if _client is not None:
+        return
+    _client = httpx.AsyncClient(
+        base_url=FINNHUB_API_URL,
+        timeout=httpx.Timeout(FINNHUB_TIMEOUT_SECONDS),
+        limits=httpx.Limits(
+            max_connections=FINNHUB_MAX_CONNECTIONS,
+            max_keepalive_connections=FINNHUB_MAX_CONNECTIONS,
+        ),
+    )
+    _scheduler = FinnhubScheduler(
+        send=_send_request,
+        calls_per_minute=FINNHUB_CALLS_PER_MINUTE,
+        burst=FINNHUB_BURST,
+        max_concurrency=FINNHUB_MAX_CONCURRENCY,
+    )
+    _scheduler.start()
+
+async def close_client() -> None:
+    """Closes the pooled Finnhub client and releases its connections."""
+    global _client, _scheduler
+    if _client is None:
+        return
+    await _scheduler.stop()
+    await _client.aclose()
+    _client = None
+    _scheduler = None
+
+async def _send_request(path: str, params: Dict[str, Any]) -> httpx.Response:
+    """Sends one GET over the shared client. Only the scheduler calls this."""
+    return await _client.get(path, params={**params, "token": FINNHUB_API_KEY})
+
+async def _get_json(
+    path: str,
+    params: Dict[str, Any],
+    priority: Priority = Priority.INTERACTIVE,
+    key: Optional[Any] = None
+) -> Any:
+    """Performs a GET against the Finnhub API through the rate-limit scheduler."""
+    return await _scheduler.submit(path, params, priority, key)
+
+def scheduler_stats() -> Optional[dict]:
+    """Returns queue and rate-limit counters for the Finnhub scheduler."""
+    return _scheduler.stats() if _scheduler else None
+
+async def fetch_company_news(ticker: str, since: Optional[date] = None) -> Optional[list]:
+    """
+    Fetches recent news for a given stock ticker from the last 7 days,
+    or only from the `since` date onwards when given.
+    Returns None when the news could not be fetched.
+    """
     if not FINNHUB_API_KEY:
         print("Finnhub API key not configured.")
-        return []
+        return None
 
-    # Get dates for the last 7 days
-    to_date = datetime.now().strftime('%Y-%m-%d')
-    from_date = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
+    # Get dates for the last 7 days, in UTC like the article timestamps `since` comes from
+    today = datetime.now(timezone.utc).date()
+    to_date = today.strftime('%Y-%m-%d')
+    from_date = (since or today - timedelta(days=7)).strftime('%Y-%m-%d')
 
     try:
-        url = f"{FINNHUB_API_URL}/company-news?symbol={ticker}&from={from_date}&to={to_date}&token={FINNHUB_API_KEY}"
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
+        return await _get_json(
+            "/company-news",
+            {"symbol": ticker, "from": from_date, "to": to_date},
+            Priority.NEWS
+        )
+    except (httpx.HTTPError, FinnhubRateLimitError) as e:
         print(f"Error fetching news for {ticker}: {e}")
-        return []
-# --- A SIMPLE IN-MEMORY CACHE ---
-# This dictionary will store our cached data and timestamps
-quote_cache = {}
-CACHE_DURATION_SECONDS = 60 # Cache data for 1 minute
+        return None
 
-def get_stock_quote(ticker: str) -> dict | None:
+async def fetch_stock_candles(
+    ticker: str,
+    resolution: str,
+    from_ts: int,
+    to_ts: int,
+    priority: Priority = Priority.BACKGROUND
+) -> Optional[Dict[str, list]]:
     """
-    Fetches a real-time quote for a given stock ticker, using a cache
-    to avoid redundant API calls.
+    Fetches OHLCV candles between two unix timestamps.
+    Returns the column lists keyed "t", "o", "h", "l", "c", "v" (empty when
+    Finnhub has no data for the range), or None on errors.
     """
-    current_time = time.time()
+    if not FINNHUB_API_KEY:
+        print("Finnhub API key not configured.")
+        return None
+
+    try:
+        data = await _get_json(
+            "/stock/candle",
+            {"symbol": ticker, "resolution": resolution, "from": from_ts, "to": to_ts},
+            priority
+        )
+    except (httpx.HTTPError, FinnhubRateLimitError) as e:
+        print(f"Error fetching candles for {ticker}: {e}")
+        return None
+
+    fields = ("t", "o", "h", "l", "c", "v")
+    if data.get("s") != "ok":
+        return {field: [] for field in fields}
+    return {field: data.get(field, []) for field in fields}
+
+# --- QUOTE CACHE ---
+# Bounded TTL + LRU cache. The backend is chosen by QUOTE_CACHE_BACKEND:
+# "memory" is private to this process, "sqlite" and "redis" are shared by
+# every uvicorn worker so they all read one warm cache.
+# Expired quotes stay servable for QUOTE_STALE_SECONDS while a background
+# refresh runs (stale-while-revalidate). Failed lookups and unknown symbols
+# are cached as short-lived negative (None) entries.
+# The TTL of a successful quote follows the market session (see market_hours);
+# CACHE_DURATION_SECONDS is only the cache-wide default.
+CACHE_DURATION_SECONDS = market_hours.QUOTE_TTL_REGULAR_SECONDS
+QUOTE_CACHE_MAX_ENTRIES = int(os.getenv("QUOTE_CACHE_MAX_ENTRIES", "2000"))
+QUOTE_STALE_SECONDS = float(os.getenv("QUOTE_STALE_SECONDS", "300"))
+NEGATIVE_CACHE_SECONDS = float(os.getenv("QUOTE_NEGATIVE_CACHE_SECONDS", "30"))
+UNKNOWN_SYMBOL_CACHE_SECONDS = float(os.getenv("QUOTE_UNKNOWN_SYMBOL_CACHE_SECONDS", "3600"))
+quote_cache = create_cache(
+    max_entries=QUOTE_CACHE_MAX_ENTRIES,
+    ttl_seconds=CACHE_DURATION_SECONDS,
+    stale_seconds=QUOTE_STALE_SECONDS
+)
 
-    # 1. Check if a valid cache entry exists
-    if ticker in quote_cache:
-        cached_data = quote_cache[ticker]
-        if current_time - cached_data['timestamp'] < CACHE_DURATION_SECONDS:
-            print(f"CACHE HIT for {ticker}")
-            return cached_data['data']
+# --- IN-FLIGHT REQUEST COALESCING ---
+# Maps ticker -> the task currently fetching it. Concurrent misses for the
+# same ticker await that one task instead of each calling Finnhub.
+# Only touched from the client's event loop, so no lock is needed.
+_inflight_quotes: Dict[str, "asyncio.Task[dict | None]"] = {}
+# The most urgent priority of anyone waiting on each in-flight fetch
+_inflight_quote_priorities: Dict[str, Priority] = {}
 
+async def fetch_stock_quote(ticker: str, priority: Priority = Priority.INTERACTIVE) -> dict | None:
+    """
+    Fetches a real-time quote for a given stock ticker, using a cache
+    to avoid redundant API calls. Concurrent cache misses for the same
+    ticker share a single upstream request, and expired entries are served
+    immediately while they are refreshed in the background.
+    """
+    # 1. Check if a cache entry exists (a cached None is a negative entry)
+    state, cached_data = await quote_cache.alookup(ticker)
+    if state == FRESH:
+        print(f"CACHE HIT for {ticker}")
+        return cached_data
+    if state == STALE:
+        print(f"STALE HIT for {ticker}. Revalidating in background...")
+        _start_quote_fetch(ticker, Priority.BACKGROUND)
+        return cached_data
+
+    # 2. Join a fetch that is already in flight, or start one
     print(f"CACHE MISS for {ticker}. Fetching from API...")
+    return await _fetch_quote_coalesced(ticker, priority)
+
+async def refresh_stock_quote(ticker: str, priority: Priority = Priority.BACKGROUND) -> dict | None:
+    """Fetches a fresh quote from Finnhub regardless of the cache and stores it."""
+    return await _fetch_quote_coalesced(ticker, priority)
+
+def revalidate_stock_quote(ticker: str) -> None:
+    """Refreshes a stale quote in the background, as fetch_stock_quote does on a stale hit."""
+    _start_quote_fetch(ticker, Priority.BACKGROUND)
+
+def _start_quote_fetch(ticker: str, priority: Priority) -> "asyncio.Task[dict | None]":
+    """
+    Starts an upstream fetch for the ticker unless one is already in flight.
+    A more urgent caller joining a fetch (say, a page view joining a
+    background refresh) moves its queued request up to the caller's priority.
+    """
+    task = _inflight_quotes.get(ticker)
+    if task is None:
+        _inflight_quote_priorities[ticker] = priority
+        task = asyncio.create_task(_fetch_quote_from_api(ticker, priority))
+        _inflight_quotes[ticker] = task
+
+        def _finished(_) -> None:
+            _inflight_quotes.pop(ticker, None)
+            _inflight_quote_priorities.pop(ticker, None)
+
+        task.add_done_callback(_finished)
+    elif priority < _inflight_quote_priorities[ticker]:
+        _inflight_quote_priorities[ticker] = priority
+        if _scheduler is not None:
+            _scheduler.promote(("/quote", ticker), priority)
+    return task
+
+async def _fetch_quote_coalesced(ticker: str, priority: Priority) -> dict | None:
+    """Starts an upstream fetch for the ticker, or joins the one in flight."""
+    task = _start_quote_fetch(ticker, priority)
+    # Shield so a cancelled caller does not cancel the fetch for the others
+    return await asyncio.shield(task)
+
+async def _fetch_quote_from_api(ticker: str, priority: Priority) -> dict | None:
+    """Calls the Finnhub quote endpoint and stores the result in the cache."""
     if not FINNHUB_API_KEY:
         print("Finnhub API key not configured.")
         return None
         
     try:
-        url = f"{FINNHUB_API_URL}/quote?symbol={ticker}&token={FINNHUB_API_KEY}"
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
+        # Callers who joined before the request was queued may have raised its priority
+        priority = _inflight_quote_priorities.get(ticker, priority)
+        data = await _get_json("/quote", {"symbol": ticker}, priority, key=("/quote", ticker))
         
         if data.get('c') == 0 and data.get('d') is None:
+            # Unknown symbol: remember that so it is not re-requested on every view
+            await quote_cache.aset(ticker, None, ttl_seconds=UNKNOWN_SYMBOL_CACHE_SECONDS, stale_seconds=0)
             return None
             
         quote_data = {
@@ -69,48 +244,48 @@ def get_stock_quote(ticker: str) -> dict | None:
             "previous_close": data.get("pc")
         }
         
-        # 2. Store the new data and timestamp in the cache
-        quote_cache[ticker] = {
-            'data': quote_data,
-            'timestamp': current_time
-        }
+        # 3. Store the new data in the cache until the price can next change
+        await quote_cache.aset(ticker, quote_data, ttl_seconds=market_hours.quote_ttl_seconds())
         
         return quote_data
-    except requests.exceptions.RequestException as e:
+    except (httpx.HTTPError, FinnhubRateLimitError) as e:
         print(f"Error fetching quote for {ticker}: {e}")
+        # Keep serving a stale quote if we have one, otherwise cache the failure briefly
+        stale_entry = await quote_cache.apeek(ticker)
+        if stale_entry is not None and stale_entry.value is not None:
+            return stale_entry.value
+        await quote_cache.aset(ticker, None, ttl_seconds=NEGATIVE_CACHE_SECONDS, stale_seconds=0)
         return None
 
-def get_multiple_stock_quotes(tickers: List[str], max_workers: int = 10) -> Dict[str, Optional[dict]]:
+async def fetch_multiple_stock_quotes(
+    tickers: List[str],
+    priority: Priority = Priority.INTERACTIVE
+) -> Dict[str, Optional[dict]]:
     """
-    Fetches quotes for multiple tickers in parallel using ThreadPoolExecutor.
+    Fetches quotes for multiple tickers concurrently over the shared client.
+    Upstream calls are paced by the rate-limit scheduler.
     Returns a dictionary mapping ticker -> quote_data (or None if failed).
     """
-    print(f"📈 Fetching quotes for {len(tickers)} stocks in parallel...")
+    print(f"📈 Fetching quotes for {len(tickers)} stocks concurrently...")
     start_time = time.time()
-    
+
+    unique_tickers = list(dict.fromkeys(tickers))
+    outcomes = await asyncio.gather(
+        *(fetch_stock_quote(ticker, priority) for ticker in unique_tickers),
+        return_exceptions=True
+    )
+
     results = {}
-    
-    # Use ThreadPoolExecutor to fetch quotes in parallel
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all tasks
-        future_to_ticker = {
-            executor.submit(get_stock_quote, ticker): ticker 
-            for ticker in tickers
-        }
-        
-        # Collect results as they complete
-        for future in as_completed(future_to_ticker):
-            ticker = future_to_ticker[future]
-            try:
-                quote_data = future.result()
-                results[ticker] = quote_data
-                status = "✅" if quote_data else "❌"
-                print(f"{status} {ticker}: Quote fetched")
-            except Exception as e:
-                print(f"❌ {ticker}: Error - {e}")
-                results[ticker] = None
-    
+    for ticker, outcome in zip(unique_tickers, outcomes):
+        if isinstance(outcome, Exception):
+            print(f"❌ {ticker}: Error - {outcome}")
+            results[ticker] = None
+        else:
+            results[ticker] = outcome
+            status = "✅" if outcome else "❌"
+            print(f"{status} {ticker}: Quote fetched")
+
     elapsed = time.time() - start_time
-    print(f"🚀 Parallel fetch completed in {elapsed:.2f}s (vs ~{len(tickers) * 0.3:.1f}s sequential)")
-    
-    return results
\ No newline at end of file
+    print(f"🚀 Concurrent fetch completed in {elapsed:.2f}s")
+
+    return results
@@ -0,0 +1,116 @@
+# FILE: backend/app/services/holdings_import.py
+# DESCRIPTION: Parses bulk holding imports and upserts them in one statement.
+
+import io
+import csv
+import math
+import os
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database.models import Holding
+from app.database.session import dialect_insert
+from app.models.holding import HoldingCreate
+
+MAX_BULK_HOLDINGS = int(os.getenv("MAX_BULK_HOLDINGS", "1000"))
+# Generous for MAX_BULK_HOLDINGS rows of a brokerage export, header rows included
+MAX_BULK_BODY_BYTES = int(os.getenv("MAX_BULK_BODY_BYTES", str(2 * 1024 * 1024)))
+
+# Column names used by common brokerage exports, compared case-insensitively
+TICKER_COLUMNS = {"ticker", "symbol", "ticker symbol", "instrument"}
+QUANTITY_COLUMNS = {"quantity", "qty", "shares", "units", "position"}
+# Exports often start with account details before the header row
+HEADER_SEARCH_ROWS = 10
+
+
+class ImportRow(NamedTuple):
+    row: int                  # 1-based position in the request (line number for CSV)
+    ticker: str
+    quantity: Optional[float]
+    error: Optional[str] = None
+
+
+def parse_quantity(raw: str) -> Optional[float]:
+    """Parses '1,250.5'-style quantities; returns None unless finite and positive."""
+    try:
+        quantity = float(raw.replace(",", "").strip())
+    except (AttributeError, ValueError):
+        return None
+    return quantity if math.isfinite(quantity) and quantity > 0 else None
+
+
+def _make_row(row: int, ticker: str, raw_quantity) -> ImportRow:
+    ticker = (ticker or "").strip().upper()
+    quantity = parse_quantity(str(raw_quantity)) if raw_quantity is not None else None
+    if not ticker:
+        return ImportRow(row, ticker, quantity, "Missing ticker")
+    if quantity is None:
+        return ImportRow(row, ticker, None, f"Invalid quantity '{raw_quantity}'")
+    return ImportRow(row, ticker, quantity)
+
+
+def rows_from_json(holdings: Sequence[HoldingCreate]) -> List[ImportRow]:
+    return [_make_row(i, holding.ticker, holding.quantity) for i, holding in enumerate(holdings, start=1)]
+
+
+def rows_from_csv(text: str) -> List[ImportRow]:
+    """
+    Reads holdings from a CSV export. The header row is located by its
+    ticker/symbol and quantity/shares columns; without one, the first two
+    columns are read as ticker and quantity. Raises ValueError if neither
+    layout fits.
+    """
+    lines = list(csv.reader(io.StringIO(text.lstrip("\ufeff"))))
+
+    header_index, ticker_col, quantity_col = None, 0, 1
+    for i, cells in enumerate(lines[:HEADER_SEARCH_ROWS]):
+        names = [cell.strip().lower() for cell in cells]
+        ticker_matches = [j for j, name in enumerate(names) if name in TICKER_COLUMNS]
+        quantity_matches = [j for j, name in enumerate(names) if name in QUANTITY_COLUMNS]
+        if ticker_matches and quantity_matches:
+            header_index, ticker_col, quantity_col = i, ticker_matches[0], quantity_matches[0]
+            break
+
+    if header_index is None:
+        first = next((cells for cells in lines if any(cell.strip() for cell in cells)), None)
+        if first is None:
+            return []
+        if len(first) < 2 or parse_quantity(first[1]) is None:
+            raise ValueError("CSV needs a header with ticker/symbol and quantity/shares columns")
+
+    rows = []
+    for i, cells in enumerate(lines):
+        if header_index is not None and i <= header_index:
+            continue
+        if not any(cell.strip() for cell in cells):
+            continue
+        ticker = cells[ticker_col] if ticker_col < len(cells) else ""
+        raw_quantity = cells[quantity_col] if quantity_col < len(cells) else ""
+        rows.append(_make_row(i + 1, ticker, raw_quantity))
+    return rows
+
+
+async def upsert_holdings(session: AsyncSession, portfolio_id: int, quantities: Dict[str, float]) -> Dict[str, Holding]:
+    """
+    Adds each quantity to the portfolio's holding of that ticker, creating
+    holdings that do not exist yet, in a single INSERT ... ON CONFLICT
+    statement. Does not commit. Returns the resulting holdings by ticker.
+    """
+    if not quantities:
+        return {}
+
+    statement = dialect_insert(session)(Holding).values([
+        {"portfolio_id": portfolio_id, "ticker": ticker, "quantity": quantity}
+        for ticker, quantity in quantities.items()
+    ])
+    statement = statement.on_conflict_do_update(
+        index_elements=[Holding.portfolio_id, Holding.ticker],
+        set_={"quantity": Holding.quantity + statement.excluded.quantity}
+    ).returning(Holding.id, Holding.ticker, Holding.quantity, Holding.portfolio_id)
+
+    result = await session.exec(statement)
+    return {
+        row.ticker: Holding(id=row.id, ticker=row.ticker, quantity=row.quantity, portfolio_id=row.portfolio_id)
+        for row in result.all()
+    }
@@ -0,0 +1,77 @@
+# FILE: backend/app/services/llm_limiter.py
+# DESCRIPTION: Bounded concurrency and queueing for outbound LLM calls.
+#
+# An analysis call can take tens of seconds. Without a bound, a burst of
+# clicks opens that many upstream requests at once and every one of them
+# gets slower. The limiter runs at most `max_concurrency` calls, lets up to
+# `max_queue` more wait for a slot for at most `queue_timeout` seconds, and
+# rejects everything beyond that immediately so the API can answer 503.
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+
+class LLMOverloadedError(Exception):
+    """Raised when an LLM call cannot get a slot; callers should shed the request."""
+
+
+class LLMLimiter:
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be positive")
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._running = 0
+        self._waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def is_full(self) -> bool:
+        """True when a new call would be rejected without waiting."""
+        # Waiters are counted before they await the semaphore, so a burst
+        # arriving in the same loop iteration still sees every earlier caller
+        return self._running + self._waiting >= self.max_concurrency + self.max_queue
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Holds one concurrency slot for the duration of the block. Raises
+        LLMOverloadedError if the queue is full or no slot frees up within
+        queue_timeout.
+        """
+        if self.is_full():
+            self.rejected += 1
+            raise LLMOverloadedError("Too many AI analyses in progress")
+
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise LLMOverloadedError("Timed out waiting for an AI analysis slot") from None
+        finally:
+            self._waiting -= 1
+
+        self._running += 1
+        try:
+            yield
+        finally:
+            self._running -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "running": self._running,
+            "waiting": self._waiting,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "queue_timeout_seconds": self.queue_timeout,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
@@ -0,0 +1,156 @@
+# FILE: backend/app/services/market_hours.py
+# DESCRIPTION: US equity market calendar and session hours, used to pick quote cache TTLs.
+
+import os
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Optional, Set
+from zoneinfo import ZoneInfo
+
+EASTERN = ZoneInfo("America/New_York")
+
+PRE_MARKET_OPEN = time(4, 0)
+REGULAR_OPEN = time(9, 30)
+REGULAR_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+AFTER_HOURS_CLOSE = time(20, 0)
+EARLY_AFTER_HOURS_CLOSE = time(17, 0)
+
+# Session names returned by market_session()
+REGULAR = "regular"
+PRE_MARKET = "pre_market"
+AFTER_HOURS = "after_hours"
+CLOSED = "closed"
+
+QUOTE_TTL_REGULAR_SECONDS = float(os.getenv("QUOTE_TTL_REGULAR_SECONDS", "60"))
+QUOTE_TTL_EXTENDED_SECONDS = float(os.getenv("QUOTE_TTL_EXTENDED_SECONDS", "300"))
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """The n-th given weekday (Mon=0) of a month."""
+    first = date(year, month, 1)
+    return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+def _last_weekday(year: int, month: int, weekday: int) -> date:
+    """The last given weekday (Mon=0) of a month."""
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    last = next_month - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+def _easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+def _observed(holiday: date) -> date:
+    """Saturday holidays are observed on Friday, Sunday holidays on Monday."""
+    if holiday.weekday() == 5:
+        return holiday - timedelta(days=1)
+    if holiday.weekday() == 6:
+        return holiday + timedelta(days=1)
+    return holiday
+
+@lru_cache(maxsize=16)
+def exchange_holidays(year: int) -> frozenset:
+    """Full-day NYSE/Nasdaq closures for a year."""
+    holidays: Set[date] = {
+        _nth_weekday(year, 1, 0, 3),        # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),        # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _last_weekday(year, 5, 0),          # Memorial Day
+        _observed(date(year, 7, 4)),        # Independence Day
+        _nth_weekday(year, 9, 0, 1),        # Labor Day
+        _nth_weekday(year, 11, 3, 4),       # Thanksgiving
+        _observed(date(year, 12, 25)),      # Christmas
+    }
+    # New Year's Day is not moved back into the previous year when it falls on a Saturday
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays.add(_observed(new_year))
+    if year >= 2022:
+        holidays.add(_observed(date(year, 6, 19)))  # Juneteenth
+    return frozenset(holidays)
+
+@lru_cache(maxsize=16)
+def early_close_days(year: int) -> frozenset:
+    """Days the regular session closes at 13:00 ET."""
+    candidates = [
+        date(year, 7, 3),                                  # Day before Independence Day
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1),  # Day after Thanksgiving
+        date(year, 12, 24),                                # Christmas Eve
+    ]
+    return frozenset(day for day in candidates if is_trading_day(day))
+
+def is_trading_day(day: date) -> bool:
+    return day.weekday() < 5 and day not in exchange_holidays(day.year)
+
+def _session_bounds(day: date) -> tuple:
+    """(regular close, after-hours close) for a trading day."""
+    if day in early_close_days(day.year):
+        return EARLY_CLOSE, EARLY_AFTER_HOURS_CLOSE
+    return REGULAR_CLOSE, AFTER_HOURS_CLOSE
+
+def regular_close(day: date) -> datetime:
+    """When the regular session closes on a trading day (13:00 ET on early-close days)."""
+    return datetime.combine(day, _session_bounds(day)[0], tzinfo=EASTERN)
+
+def last_completed_trading_day(now: Optional[datetime] = None) -> date:
+    """The most recent trading day whose regular session has closed."""
+    now = (now or datetime.now(EASTERN)).astimezone(EASTERN)
+    day = now.date()
+    if is_trading_day(day) and now >= regular_close(day):
+        return day
+    day -= timedelta(days=1)
+    while not is_trading_day(day):
+        day -= timedelta(days=1)
+    return day
+
+def market_session(now: Optional[datetime] = None) -> str:
+    """Returns which trading session is active at the given time."""
+    now = (now or datetime.now(EASTERN)).astimezone(EASTERN)
+    if not is_trading_day(now.date()):
+        return CLOSED
+
+    clock = now.time()
+    regular_close, after_hours_close = _session_bounds(now.date())
+    if REGULAR_OPEN <= clock < regular_close:
+        return REGULAR
+    if PRE_MARKET_OPEN <= clock < REGULAR_OPEN:
+        return PRE_MARKET
+    if regular_close <= clock < after_hours_close:
+        return AFTER_HOURS
+    return CLOSED
+
+def next_session_open(now: Optional[datetime] = None) -> datetime:
+    """The next time any session (pre-market included) starts."""
+    now = (now or datetime.now(EASTERN)).astimezone(EASTERN)
+    day = now.date()
+    if is_trading_day(day) and now.time() < PRE_MARKET_OPEN:
+        return datetime.combine(day, PRE_MARKET_OPEN, tzinfo=EASTERN)
+    day += timedelta(days=1)
+    while not is_trading_day(day):
+        day += timedelta(days=1)
+    return datetime.combine(day, PRE_MARKET_OPEN, tzinfo=EASTERN)
+
+def quote_ttl_seconds(now: Optional[datetime] = None) -> float:
+    """
+    How long a quote fetched now stays fresh: short during the regular
+    session, longer in pre-market and after hours, and until the next
+    session opens while the market is closed.
+    """
+    now = (now or datetime.now(EASTERN)).astimezone(EASTERN)
+    session = market_session(now)
+    if session == REGULAR:
+        return QUOTE_TTL_REGULAR_SECONDS
+    if session in (PRE_MARKET, AFTER_HOURS):
+        return QUOTE_TTL_EXTENDED_SECONDS
+    return max((next_session_open(now) - now).total_seconds(), QUOTE_TTL_REGULAR_SECONDS)
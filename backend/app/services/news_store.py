@@ -0,0 +1,101 @@
+# FILE: backend/app/services/news_store.py
+# DESCRIPTION: Incremental, bounded per-ticker company news store.
+
+import os
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from app.services import finnhub_service
+
+NEWS_WINDOW_DAYS = int(os.getenv("NEWS_WINDOW_DAYS", "7"))
+NEWS_MAX_ARTICLES_PER_TICKER = int(os.getenv("NEWS_MAX_ARTICLES_PER_TICKER", "50"))
+NEWS_MAX_TICKERS = int(os.getenv("NEWS_MAX_TICKERS", "500"))
+NEWS_REFRESH_SECONDS = float(os.getenv("NEWS_REFRESH_SECONDS", "600"))
+
+# Only the fields we actually use are kept, to bound memory per article
+_ARTICLE_FIELDS = ("id", "datetime", "headline", "source", "url")
+
+
+class NewsStore:
+    """
+    Keeps a rolling window of recent articles per ticker, newest first.
+    Each refresh only asks Finnhub for articles since the newest one we
+    already hold, and at most one refresh per ticker runs at a time.
+    Only touched from the event loop that owns the Finnhub client.
+    """
+
+    def __init__(self, window_days: int, max_articles: int, max_tickers: int, refresh_seconds: float):
+        self.window_days = window_days
+        self.max_articles = max_articles
+        self.max_tickers = max_tickers
+        self.refresh_seconds = refresh_seconds
+        self._articles: "OrderedDict[str, List[dict]]" = OrderedDict()
+        self._refreshed_at: Dict[str, float] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def get_articles(self, ticker: str, limit: Optional[int] = None) -> List[dict]:
+        """Returns the newest articles for a ticker, refreshing the window if due."""
+        ticker = ticker.upper()
+        if time.monotonic() - self._refreshed_at.get(ticker, float("-inf")) >= self.refresh_seconds:
+            task = self._inflight.get(ticker)
+            if task is None:
+                task = asyncio.create_task(self._refresh(ticker))
+                self._inflight[ticker] = task
+                task.add_done_callback(lambda _: self._inflight.pop(ticker, None))
+            await asyncio.shield(task)
+
+        articles = self._articles.get(ticker, [])
+        if ticker in self._articles:
+            self._articles.move_to_end(ticker)
+        return articles[:limit] if limit is not None else list(articles)
+
+    async def get_headlines(self, ticker: str, limit: int = 3) -> List[str]:
+        """Returns the top-N newest headlines for a ticker."""
+        articles = await self.get_articles(ticker, limit)
+        return [article["headline"] for article in articles if article.get("headline")]
+
+    async def _refresh(self, ticker: str) -> None:
+        held = self._articles.get(ticker, [])
+        newest_ts = held[0]["datetime"] if held else None
+        since = datetime.fromtimestamp(newest_ts, tz=timezone.utc).date() if newest_ts else None
+
+        fetched = await finnhub_service.fetch_company_news(ticker, since=since)
+        if not isinstance(fetched, list):
+            # Failed fetches and error payloads ({"error": ...}) are retried on the next read
+            if fetched is not None:
+                print(f"⚠️ Unexpected news payload for {ticker}: {str(fetched)[:200]}")
+            return
+        self._refreshed_at[ticker] = time.monotonic()
+
+        # Finnhub filters by day, so drop anything we already hold
+        known_ids = {article["id"] for article in held}
+        fresh = [
+            {field: item.get(field) for field in _ARTICLE_FIELDS}
+            for item in fetched
+            if isinstance(item, dict) and isinstance(item.get("datetime"), (int, float))
+            and item["datetime"] and item.get("id") not in known_ids
+            and (newest_ts is None or item["datetime"] >= newest_ts)
+        ]
+
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=self.window_days)).timestamp()
+        merged = sorted(fresh + held, key=lambda article: article["datetime"], reverse=True)
+        self._articles[ticker] = [article for article in merged if article["datetime"] >= cutoff][:self.max_articles]
+        self._articles.move_to_end(ticker)
+
+        while len(self._articles) > self.max_tickers:
+            evicted, _ = self._articles.popitem(last=False)
+            self._refreshed_at.pop(evicted, None)
+
+        if fresh:
+            print(f"📰 {ticker}: {len(fresh)} new articles ({len(self._articles[ticker])} held)")
+
+
+news_store = NewsStore(
+    window_days=NEWS_WINDOW_DAYS,
+    max_articles=NEWS_MAX_ARTICLES_PER_TICKER,
+    max_tickers=NEWS_MAX_TICKERS,
+    refresh_seconds=NEWS_REFRESH_SECONDS,
+)
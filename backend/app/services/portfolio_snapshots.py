@@ -0,0 +1,212 @@
+# FILE: backend/app/services/portfolio_snapshots.py
+# DESCRIPTION: Daily end-of-day portfolio snapshots and history downsampling.
+#
+# After each trading day's close, every portfolio is valued in one batch:
+# holdings are loaded with one query, quotes for the union of all tickers are
+# fetched in one pass, and the rows are appended with a few batched INSERTs. The
+# unique (portfolio_id, snapshot_date) constraint makes reruns harmless, so
+# several workers can run the job without coordinating, and a rerun fills in
+# portfolios that were skipped because a quote was missing.
+
+import os
+import asyncio
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database.models import Holding, PortfolioSnapshot
+from app.database.session import async_engine, dialect_insert
+from app.services import finnhub_service, market_hours
+from app.services.finnhub_scheduler import Priority
+from app.services.valuation import value_portfolio
+
+# Give the closing prints time to settle before valuing portfolios
+SNAPSHOT_DELAY_MINUTES = float(os.getenv("PORTFOLIO_SNAPSHOT_DELAY_MINUTES", "30"))
+
+# Portfolios skipped because a quote failed are retried this many times
+SNAPSHOT_RETRIES = int(os.getenv("PORTFOLIO_SNAPSHOT_RETRIES", "3"))
+SNAPSHOT_RETRY_MINUTES = float(os.getenv("PORTFOLIO_SNAPSHOT_RETRY_MINUTES", "10"))
+
+# Rows per INSERT; each row binds 5 parameters and asyncpg allows 32767 per statement
+SNAPSHOT_INSERT_BATCH_SIZE = 1000
+
+_snapshot_task: Optional[asyncio.Task] = None
+
+
+def snapshot_time(day: date) -> datetime:
+    """When the snapshot for a trading day is taken."""
+    return market_hours.regular_close(day) + timedelta(minutes=SNAPSHOT_DELAY_MINUTES)
+
+
+def next_snapshot_time(now: Optional[datetime] = None) -> datetime:
+    now = (now or datetime.now(market_hours.EASTERN)).astimezone(market_hours.EASTERN)
+    day = now.date()
+    while not market_hours.is_trading_day(day) or snapshot_time(day) <= now:
+        day += timedelta(days=1)
+    return snapshot_time(day)
+
+
+async def take_snapshots(snapshot_date: date) -> Tuple[int, int]:
+    """
+    Records the current value of every portfolio that holds something under
+    snapshot_date. Portfolios already recorded for that date are left alone,
+    and so are portfolios with a holding that could not be priced, since
+    leaving it out would record a false dip. Returns the number of rows
+    written and the number of portfolios skipped as unpriced.
+    """
+    # The session is closed before the quote pass so no connection sits
+    # idle in a transaction while rate-limited fetches run
+    async with AsyncSession(async_engine) as session:
+        holdings = (await session.exec(
+            select(Holding.portfolio_id, Holding.ticker, Holding.quantity).order_by(Holding.portfolio_id)
+        )).all()
+    holdings_by_portfolio: Dict[int, List[Tuple[str, float]]] = {}
+    for portfolio_id, ticker, quantity in holdings:
+        holdings_by_portfolio.setdefault(portfolio_id, []).append((ticker, quantity))
+    if not holdings_by_portfolio:
+        return 0, 0
+
+    # One quote pass shared by every portfolio
+    tickers = sorted({ticker for _, ticker, _ in holdings})
+    quotes_map = await finnhub_service.fetch_multiple_stock_quotes(tickers, Priority.BACKGROUND)
+
+    rows = []
+    unpriced = 0
+    for portfolio_id, portfolio_holdings in holdings_by_portfolio.items():
+        valuation = value_portfolio(
+            [ticker for ticker, _ in portfolio_holdings],
+            [quantity for _, quantity in portfolio_holdings],
+            quotes_map
+        )
+        if not valuation.priced.all():
+            unpriced += 1
+            continue
+        rows.append({
+            "portfolio_id": portfolio_id,
+            "snapshot_date": snapshot_date,
+            "total_value": valuation.total_value,
+            "total_day_change": valuation.total_day_change,
+            "positions": {
+                ticker: [valuation.at(valuation.quantities, i), valuation.at(valuation.prices, i)]
+                for i, ticker in enumerate(valuation.tickers)
+            },
+        })
+
+    written = 0
+    async with AsyncSession(async_engine) as session:
+        insert = dialect_insert(session)
+        for start in range(0, len(rows), SNAPSHOT_INSERT_BATCH_SIZE):
+            statement = insert(PortfolioSnapshot).values(rows[start:start + SNAPSHOT_INSERT_BATCH_SIZE]).on_conflict_do_nothing(
+                index_elements=[PortfolioSnapshot.portfolio_id, PortfolioSnapshot.snapshot_date]
+            )
+            result = await session.exec(statement)
+            written += result.rowcount
+        await session.commit()
+    return written, unpriced
+
+
+async def _has_snapshots(snapshot_date: date) -> bool:
+    async with AsyncSession(async_engine) as session:
+        count = (await session.exec(
+            select(func.count(PortfolioSnapshot.id)).where(PortfolioSnapshot.snapshot_date == snapshot_date)
+        )).one()
+        return count > 0
+
+
+async def _run_snapshot(snapshot_date: date) -> None:
+    # Reruns only write the portfolios still missing, so unpriced ones are retried
+    for attempt in range(SNAPSHOT_RETRIES + 1):
+        if attempt:
+            await asyncio.sleep(SNAPSHOT_RETRY_MINUTES * 60)
+        start_time = time.time()
+        try:
+            written, unpriced = await take_snapshots(snapshot_date)
+            print(f"📸 Recorded {written} portfolio snapshots for {snapshot_date} in {time.time() - start_time:.2f}s")
+        except Exception as e:
+            # Never let one bad run kill the background task
+            print(f"❌ Portfolio snapshot for {snapshot_date} failed: {e}")
+            continue
+        if not unpriced:
+            return
+        print(f"⚠️ Skipped {unpriced} portfolios with unpriced holdings for {snapshot_date}")
+
+
+async def _run_forever() -> None:
+    # Catch up if the process was down when today's snapshot was due
+    now = datetime.now(market_hours.EASTERN)
+    today = now.date()
+    if market_hours.is_trading_day(today) and now >= snapshot_time(today):
+        try:
+            caught_up = await _has_snapshots(today)
+        except Exception as e:
+            # A database hiccup at boot must not kill the scheduler; take the snapshot anyway
+            print(f"❌ Checking today's portfolio snapshots failed: {e}")
+            caught_up = False
+        if not caught_up:
+            await _run_snapshot(today)
+
+    while True:
+        run_at = next_snapshot_time()
+        await asyncio.sleep(max((run_at - datetime.now(market_hours.EASTERN)).total_seconds(), 0))
+        await _run_snapshot(run_at.date())
+
+
+def start_snapshot_scheduler() -> None:
+    """Starts the daily snapshot loop on the running event loop."""
+    global _snapshot_task
+    if _snapshot_task is None:
+        _snapshot_task = asyncio.create_task(_run_forever())
+
+
+async def stop_snapshot_scheduler() -> None:
+    """Cancels the daily snapshot loop."""
+    global _snapshot_task
+    if _snapshot_task is None:
+        return
+    _snapshot_task.cancel()
+    try:
+        await _snapshot_task
+    except asyncio.CancelledError:
+        pass
+    except Exception as e:
+        # The loop already died; shutdown still has to close everything else
+        print(f"❌ Portfolio snapshot scheduler had stopped: {e}")
+    _snapshot_task = None
+
+
+def downsample_lttb(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: picks max_points indices that keep the
+    visual shape of the series (peaks and troughs survive, flat stretches
+    are thinned). The first and last points are always kept.
+    """
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n) if max_points >= n else np.array([0, n - 1])
+
+    # Interior points split into max_points - 2 buckets of near-equal size
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    selected = np.empty(max_points, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        # The next bucket's average is the third corner of the triangle
+        next_start, next_stop = edges[bucket + 1], edges[bucket + 2] if bucket + 2 < len(edges) else n
+        if next_stop <= next_start:
+            next_stop = next_start + 1
+        next_x, next_y = x[next_start:next_stop].mean(), y[next_start:next_stop].mean()
+
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
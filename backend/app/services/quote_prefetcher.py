@@ -0,0 +1,89 @@
+# FILE: backend/app/services/quote_prefetcher.py
+# DESCRIPTION: Background task that keeps quotes for every held ticker warm in the cache.
+
+import os
+import asyncio
+import time
+from typing import List, Optional
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database.models import Holding
+from app.database.session import async_engine
+from app.services import finnhub_service
+from app.services.finnhub_scheduler import Priority
+
+QUOTE_PREFETCH_INTERVAL_SECONDS = float(os.getenv("QUOTE_PREFETCH_INTERVAL_SECONDS", "45"))
+QUOTE_PREFETCH_BATCH_SIZE = int(os.getenv("QUOTE_PREFETCH_BATCH_SIZE", "25"))
+# Share of the Finnhub per-minute budget the prefetcher may spend; the rest is left for users
+QUOTE_PREFETCH_BUDGET_SHARE = float(os.getenv("QUOTE_PREFETCH_BUDGET_SHARE", "0.5"))
+
+_prefetch_task: Optional[asyncio.Task] = None
+
+async def get_held_tickers() -> List[str]:
+    """Returns the distinct set of tickers held across all portfolios."""
+    async with AsyncSession(async_engine) as session:
+        return list((await session.exec(select(Holding.ticker).distinct())).all())
+
+def pass_budget() -> int:
+    """Most quotes one pass may refresh, as a share of the calls a pass interval allows."""
+    calls_per_pass = finnhub_service.FINNHUB_CALLS_PER_MINUTE * QUOTE_PREFETCH_INTERVAL_SECONDS / 60
+    return max(1, int(calls_per_pass * QUOTE_PREFETCH_BUDGET_SHARE))
+
+async def _needing_refresh(tickers: List[str]) -> List[str]:
+    # Refresh anything that would expire before the next pass runs, soonest
+    # to expire (or missing) first, within the pass budget
+    remaining = await finnhub_service.quote_cache.attl_remaining_many(tickers)
+    due = [ticker for ticker in tickers if remaining.get(ticker, 0) <= QUOTE_PREFETCH_INTERVAL_SECONDS]
+    due.sort(key=lambda ticker: remaining.get(ticker, 0))
+    return due[:pass_budget()]
+
+async def refresh_held_quotes() -> int:
+    """
+    Refreshes cached quotes for held tickers that are missing or about to
+    expire, at most pass_budget() per pass. Requests go out in batches at
+    background priority, so user requests still jump the rate-limit queue.
+    Returns the number refreshed.
+    """
+    tickers = await get_held_tickers()
+    stale_tickers = await _needing_refresh(tickers)
+
+    for start in range(0, len(stale_tickers), QUOTE_PREFETCH_BATCH_SIZE):
+        batch = stale_tickers[start:start + QUOTE_PREFETCH_BATCH_SIZE]
+        await asyncio.gather(*(
+            finnhub_service.refresh_stock_quote(ticker, Priority.BACKGROUND)
+            for ticker in batch
+        ))
+
+    return len(stale_tickers)
+
+async def _run_forever() -> None:
+    while True:
+        start_time = time.time()
+        try:
+            refreshed = await refresh_held_quotes()
+            if refreshed:
+                print(f"🔄 Prefetched {refreshed} quotes in {time.time() - start_time:.2f}s")
+        except Exception as e:
+            # Never let one bad pass kill the background task
+            print(f"❌ Quote prefetch failed: {e}")
+        await asyncio.sleep(QUOTE_PREFETCH_INTERVAL_SECONDS)
+
+def start_prefetcher() -> None:
+    """Starts the background prefetch loop on the running event loop."""
+    global _prefetch_task
+    if _prefetch_task is None:
+        _prefetch_task = asyncio.create_task(_run_forever())
+
+async def stop_prefetcher() -> None:
+    """Cancels the background prefetch loop."""
+    global _prefetch_task
+    if _prefetch_task is None:
+        return
+    _prefetch_task.cancel()
+    try:
+        await _prefetch_task
+    except asyncio.CancelledError:
+        pass
+    _prefetch_task = None
@@ -0,0 +1,94 @@
+# FILE: backend/app/services/quote_stream.py
+# DESCRIPTION: Fans quote cache writes out to live portfolio streams.
+#
+# Streams do not poll Finnhub or the database. They subscribe to the tickers
+# they hold, and the quote cache tells this hub whenever one of those quotes
+# changes (the prefetcher and user requests keep held quotes fresh). An idle
+# stream is one small subscription object waiting on an asyncio.Event.
+
+import asyncio
+import threading
+from typing import Dict, Hashable, Iterable, Optional, Set
+
+from app.services import finnhub_service
+
+
+class QuoteSubscription:
+    """
+    A set of tickers one stream is watching. Updates that arrive while the
+    stream is busy are coalesced: only the newest quote per ticker is kept.
+    """
+
+    def __init__(self, tickers: Iterable[str], loop: asyncio.AbstractEventLoop):
+        self.tickers = frozenset(tickers)
+        self._loop = loop
+        self._pending: Dict[str, dict] = {}
+        self._event = asyncio.Event()
+
+    def _deliver(self, ticker: str, quote: dict) -> None:
+        # Always runs on the subscriber's event loop
+        self._pending[ticker] = quote
+        self._event.set()
+
+    async def wait(self, timeout: Optional[float] = None) -> Dict[str, dict]:
+        """
+        Waits for quote changes and returns them as {ticker: quote}. Returns
+        an empty dict if nothing changed within timeout seconds.
+        """
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return {}
+        self._event.clear()
+        pending, self._pending = self._pending, {}
+        return pending
+
+
+class QuoteHub:
+    """Routes quote cache writes to the subscriptions watching each ticker."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, Set[QuoteSubscription]] = {}
+
+    def subscribe(self, tickers: Iterable[str]) -> QuoteSubscription:
+        """Must be called from the event loop that will consume the updates."""
+        subscription = QuoteSubscription(tickers, asyncio.get_running_loop())
+        with self._lock:
+            for ticker in subscription.tickers:
+                self._subscribers.setdefault(ticker, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: QuoteSubscription) -> None:
+        with self._lock:
+            for ticker in subscription.tickers:
+                subscribers = self._subscribers.get(ticker)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[ticker]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len({subscription for subscribers in self._subscribers.values() for subscription in subscribers})
+
+    def publish(self, key: Hashable, quote: Optional[dict]) -> None:
+        """
+        Cache listener. May run on any thread, so delivery is handed to each
+        subscriber's own loop. Negative entries (None) are not news.
+        """
+        if quote is None:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers.get(key, ()))
+        for subscription in subscribers:
+            try:
+                subscription._loop.call_soon_threadsafe(subscription._deliver, key, quote)
+            except RuntimeError:
+                # The subscriber's loop has closed; it will be unsubscribed on cleanup
+                pass
+
+
+quote_hub = QuoteHub()
+finnhub_service.quote_cache.add_listener(quote_hub.publish)
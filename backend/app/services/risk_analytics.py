@@ -0,0 +1,230 @@
+# FILE: backend/app/services/risk_analytics.py
+# DESCRIPTION: Vectorized portfolio risk metrics from locally stored daily candles.
+#
+# Prices come from the candle store, never from live quotes, so a result only
+# depends on the holdings and the last completed trading day. Results are
+# cached under exactly that key: a portfolio's covariance work is done once a
+# day, and editing its holdings naturally gets a new cache entry.
+
+import os
+import asyncio
+import math
+from datetime import date, datetime, timezone
+from statistics import NormalDist
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from app.models.risk import HoldingRisk, PortfolioRisk
+from app.services import market_hours
+from app.services.cache import FRESH, TTLCache
+from app.services.candle_store import candle_store
+
+RISK_BENCHMARK_TICKER = os.getenv("RISK_BENCHMARK_TICKER", "SPY")
+RISK_LOOKBACK_DAYS = int(os.getenv("RISK_LOOKBACK_DAYS", "252"))  # Trading days of returns
+RISK_MIN_OBSERVATIONS = int(os.getenv("RISK_MIN_OBSERVATIONS", "60"))
+RISK_CONFIDENCE = float(os.getenv("RISK_CONFIDENCE", "0.95"))
+# How long a request waits for missing history before answering with what is stored
+RISK_BACKFILL_WAIT_SECONDS = float(os.getenv("RISK_BACKFILL_WAIT_SECONDS", "10"))
+# Results missing some history are only cached briefly so they fill in once backfilled
+RISK_INCOMPLETE_CACHE_SECONDS = float(os.getenv("RISK_INCOMPLETE_CACHE_SECONDS", "300"))
+# Longest run of missing closes (halts, late prints) carried forward; longer gaps exclude the holding
+RISK_MAX_FILL_DAYS = int(os.getenv("RISK_MAX_FILL_DAYS", "5"))
+TRADING_DAYS_PER_YEAR = 252
+
+# Keyed by (portfolio_id, as_of, holdings); a day is the longest an entry can be right
+risk_cache = TTLCache(max_entries=int(os.getenv("RISK_CACHE_MAX_ENTRIES", "500")), ttl_seconds=86400)
+
+# One backfill per ticker at a time, shared by concurrent requests
+_backfills: Dict[str, "asyncio.Task[None]"] = {}
+
+# (ticker, as_of) pairs a finished backfill could not bring up to date, so
+# tickers Finnhub has no candles for are not re-fetched on every request
+_no_history = TTLCache(max_entries=5000, ttl_seconds=86400)
+
+
+def _bar_date(timestamp: int) -> date:
+    # Finnhub daily bars are stamped at 00:00 UTC of the trading date
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).date()
+
+
+def _has_history(ticker: str, as_of: date) -> bool:
+    last = candle_store.last_timestamp(ticker, "D")
+    return last is not None and _bar_date(last) >= as_of
+
+
+async def _backfill_to(ticker: str, as_of: date) -> None:
+    await candle_store.backfill(ticker, "D")
+    if not await asyncio.to_thread(_has_history, ticker, as_of):
+        _no_history.set((ticker, as_of), True)
+
+
+def _backfill(ticker: str, as_of: date) -> "asyncio.Task[None]":
+    task = _backfills.get(ticker)
+    if task is None or task.done():
+        task = asyncio.create_task(_backfill_to(ticker, as_of))
+        _backfills[ticker] = task
+
+        def _finished(done: "asyncio.Task[None]", ticker=ticker) -> None:
+            if _backfills.get(ticker) is done:
+                del _backfills[ticker]
+            if not done.cancelled() and done.exception() is not None:
+                print(f"⚠️ Candle backfill failed for {ticker}: {done.exception()}")
+
+        task.add_done_callback(_finished)
+    return task
+
+
+async def ensure_history(tickers: Sequence[str], as_of: date, timeout: float = RISK_BACKFILL_WAIT_SECONDS) -> None:
+    """
+    Backfills daily candles for tickers whose stored history ends before
+    as_of. Waits up to timeout seconds; slower backfills keep running in the
+    background and are picked up by later requests. Tickers a backfill
+    already failed to bring up to as_of are not retried until the next day.
+    """
+    tickers = [ticker for ticker in tickers if not _no_history.get((ticker, as_of))]
+    # Checking history stats and maps files, so it runs with the other file work in a thread
+    missing = await asyncio.to_thread(lambda: [ticker for ticker in tickers if not _has_history(ticker, as_of)])
+    tasks = [_backfill(ticker, as_of) for ticker in missing]
+    if tasks:
+        await asyncio.wait(tasks, timeout=timeout)
+
+
+def price_matrix(tickers: Sequence[str], benchmark: str, as_of: date, lookback_days: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Aligns daily closes on the benchmark's trading dates up to as_of.
+    Returns (dates, closes, benchmark_closes): closes has one column per
+    ticker, NaN where the ticker has no bar on that date.
+    """
+    end = int(datetime.combine(as_of, datetime.max.time(), tzinfo=timezone.utc).timestamp())
+    # Calendar days comfortably covering lookback_days + 1 trading days
+    start = end - int((lookback_days + 1) * 1.6 + 10) * 86400
+
+    axis_candles = candle_store.read(benchmark, "D", start, end)[-(lookback_days + 1):]
+    dates = np.asarray(axis_candles["t"])
+    benchmark_closes = np.asarray(axis_candles["c"], dtype=np.float64)
+
+    closes = np.full((len(dates), len(tickers)), np.nan)
+    for j, ticker in enumerate(tickers):
+        candles = candle_store.read(ticker, "D", int(dates[0]) if len(dates) else start, end)
+        if not len(candles) or not len(dates):
+            continue
+        positions = np.searchsorted(candles["t"], dates)
+        found = positions < len(candles)
+        found[found] &= candles["t"][positions[found]] == dates[found]
+        closes[found, j] = candles["c"][positions[found]]
+    return dates, closes, benchmark_closes
+
+
+def compute_risk(
+    portfolio_id: int,
+    tickers: List[str],
+    quantities: np.ndarray,
+    as_of: date,
+    benchmark: str = RISK_BENCHMARK_TICKER,
+    lookback_days: int = RISK_LOOKBACK_DAYS,
+    confidence: float = RISK_CONFIDENCE
+) -> PortfolioRisk:
+    """Computes every metric in one pass over a (days x holdings) returns matrix."""
+    risk = PortfolioRisk(portfolio_id=portfolio_id, as_of=as_of, benchmark=benchmark, confidence=confidence)
+    dates, closes, benchmark_closes = price_matrix(tickers, benchmark, as_of, lookback_days)
+    if len(dates) < 2:
+        # Without the benchmark's history there is no date axis at all
+        risk.missing_history = [*tickers, benchmark]
+        return risk
+
+    # Carry a missing close forward over gaps of up to RISK_MAX_FILL_DAYS (halts, late prints)
+    day = np.arange(len(closes))[:, None]
+    rows = np.where(np.isnan(closes), 0, day)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    filled = closes[rows, np.arange(closes.shape[1])]
+    filled[day - rows > RISK_MAX_FILL_DAYS] = np.nan
+
+    # Use the window in which every included holding has prices; holdings
+    # with too little history, or a longer gap, are reported instead of
+    # shrinking the window
+    first_valid = np.argmax(~np.isnan(filled), axis=0)
+    has_any = ~np.all(np.isnan(filled), axis=0)
+    has_gap = np.any(np.isnan(filled) & (day >= first_valid), axis=0)
+    included = has_any & ~has_gap & (len(filled) - first_valid - 1 >= RISK_MIN_OBSERVATIONS)
+    risk.missing_history = [ticker for ticker, ok in zip(tickers, included) if not ok]
+    if not included.any():
+        return risk
+
+    start = int(first_valid[included].max())
+    prices = filled[start:, included]
+    held_tickers = [ticker for ticker, ok in zip(tickers, included) if ok]
+    returns = prices[1:] / prices[:-1] - 1.0
+
+    # Weights by value at the last close
+    values = quantities[included] * prices[-1]
+    total_value = float(values.sum())
+    weights = values / total_value if total_value > 0 else np.full(len(values), 1.0 / len(values))
+    portfolio_returns = returns @ weights
+    risk.observations = len(portfolio_returns)
+
+    annualize = math.sqrt(TRADING_DAYS_PER_YEAR)
+    holding_volatility = returns.std(axis=0, ddof=1) * annualize
+    sigma = float(portfolio_returns.std(ddof=1))
+    risk.annualized_volatility = sigma * annualize
+
+    # Beta of the portfolio and of every holding against the benchmark
+    holding_betas = np.full(len(held_tickers), np.nan)
+    benchmark_returns = benchmark_closes[start + 1:] / benchmark_closes[start:-1] - 1.0
+    if len(benchmark_returns) == len(portfolio_returns) and np.all(np.isfinite(benchmark_returns)):
+        benchmark_variance = benchmark_returns.var(ddof=1)
+        if benchmark_variance > 0:
+            centered = benchmark_returns - benchmark_returns.mean()
+            holding_betas = ((returns - returns.mean(axis=0)).T @ centered) / (len(centered) - 1) / benchmark_variance
+            risk.beta = float(weights @ holding_betas)
+
+    # Correlation matrix; constant series have undefined correlation (None)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        correlation = np.corrcoef(returns, rowvar=False) if len(held_tickers) > 1 else np.ones((1, 1))
+    correlation = np.atleast_2d(correlation)
+    risk.correlation = [[None if math.isnan(c) else round(float(c), 4) for c in row] for row in correlation]
+
+    # One-day VaR, reported as a positive loss
+    tail = (1.0 - confidence) * 100
+    risk.var_historical = float(-np.percentile(portfolio_returns, tail))
+    z = NormalDist().inv_cdf(1.0 - confidence)
+    risk.var_parametric = float(-(portfolio_returns.mean() + z * sigma))
+    risk.var_historical_amount = risk.var_historical * total_value
+    risk.var_parametric_amount = risk.var_parametric * total_value
+
+    growth = np.concatenate([[1.0], np.cumprod(1.0 + portfolio_returns)])
+    risk.max_drawdown = float((growth / np.maximum.accumulate(growth) - 1.0).min())
+
+    risk.holdings = [
+        HoldingRisk(
+            ticker=ticker,
+            weight=float(weights[i]),
+            annualized_volatility=float(holding_volatility[i]),
+            beta=None if math.isnan(holding_betas[i]) else float(holding_betas[i])
+        )
+        for i, ticker in enumerate(held_tickers)
+    ]
+    return risk
+
+
+async def get_portfolio_risk(portfolio_id: int, holdings: Sequence) -> PortfolioRisk:
+    """Risk metrics for a portfolio, computed at most once per trading day and holdings set."""
+    as_of = market_hours.last_completed_trading_day()
+    positions = sorted((holding.ticker, holding.quantity) for holding in holdings)
+    key = (portfolio_id, as_of, tuple(positions))
+    state, cached = risk_cache.lookup(key)
+    if state == FRESH:
+        return cached
+
+    if not positions:
+        return PortfolioRisk(portfolio_id=portfolio_id, as_of=as_of, benchmark=RISK_BENCHMARK_TICKER, confidence=RISK_CONFIDENCE)
+
+    tickers = [ticker for ticker, _ in positions]
+    await ensure_history([*tickers, RISK_BENCHMARK_TICKER], as_of)
+    quantities = np.array([quantity for _, quantity in positions], dtype=np.float64)
+    # Reading candle files and the matrix work stay off the event loop
+    risk = await asyncio.to_thread(compute_risk, portfolio_id, tickers, quantities, as_of)
+
+    complete = not risk.missing_history and risk.beta is not None
+    risk_cache.set(key, risk, ttl_seconds=None if complete else RISK_INCOMPLETE_CACHE_SECONDS)
+    return risk
@@ -0,0 +1,219 @@
+# FILE: backend/app/services/search_index.py
+# DESCRIPTION: In-memory ranked, typo-tolerant search over the supported tickers.
+#
+# Built from the ticker registry, so autocomplete never touches the database.
+# Results are ranked in tiers:
+#   0. exact ticker            ("AAPL")
+#   1. ticker prefix           ("AA"  -> AAPL, AAL, ...)
+#   2. name word prefixes      ("app" -> Apple Inc., "bank am" -> Bank of America)
+#   3. name substring          ("soft" -> Microsoft), as the old ILIKE search did
+#   4. fuzzy                   ("mircosoft", "nvdia"), via a trigram index and
+#                              a bounded edit distance
+# Later tiers are only searched while fewer than `limit` results were found.
+
+import re
+import bisect
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from app.services import ticker_registry
+
+# Substring and fuzzy tiers start at this many characters; shorter queries are too ambiguous
+FUZZY_MIN_LENGTH = 3
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _words(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+def _ticker_key(ticker: str) -> str:
+    # "BRK.B", "brk b" and "BRKB" all search the same
+    return "".join(_words(ticker))
+
+
+def _trigrams(word: str) -> Set[str]:
+    padded = f"${word}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Optimal string alignment distance (insertions, deletions, substitutions
+    and adjacent transpositions). Gives up early and returns limit + 1 once
+    the distance is known to exceed limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous_previous: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+def _max_typos(word: str) -> int:
+    if len(word) <= 3:
+        return 0
+    return 1 if len(word) <= 7 else 2
+
+
+class StockSearchIndex:
+    """Immutable search index over a {ticker: company name} mapping."""
+
+    def __init__(self, names: Mapping[str, str]):
+        self._names = dict(names)
+        # Sorted (key, ticker) pairs: a ticker prefix is one bisect range
+        self._ticker_keys = sorted((_ticker_key(ticker), ticker) for ticker in self._names)
+        self._name_words: Dict[str, Tuple[str, ...]] = {
+            ticker: tuple(_words(name)) for ticker, name in self._names.items()
+        }
+        self._normalized_names = {ticker: " ".join(words) for ticker, words in self._name_words.items()}
+
+        word_tickers: Dict[str, Set[str]] = {}
+        for ticker, words in self._name_words.items():
+            for word in words:
+                word_tickers.setdefault(word, set()).add(ticker)
+        # Sorted distinct name words: a word prefix is one bisect range
+        self._words = sorted(word_tickers)
+        self._word_tickers = {word: frozenset(tickers) for word, tickers in word_tickers.items()}
+
+        # Fuzzy matching works on the vocabulary (name words and ticker keys),
+        # so each distinct word is compared with the query at most once
+        vocabulary: Dict[str, Set[str]] = {word: set(tickers) for word, tickers in word_tickers.items()}
+        for ticker in self._names:
+            vocabulary.setdefault(_ticker_key(ticker), set()).add(ticker)
+        self._vocabulary = {word: frozenset(tickers) for word, tickers in vocabulary.items()}
+        trigram_words: Dict[str, Set[str]] = {}
+        for word in self._vocabulary:
+            for trigram in _trigrams(word):
+                trigram_words.setdefault(trigram, set()).add(word)
+        self._trigram_words = {trigram: frozenset(words) for trigram, words in trigram_words.items()}
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def _tickers_with_prefix(self, key: str) -> Iterable[str]:
+        start = bisect.bisect_left(self._ticker_keys, (key,))
+        for ticker_key, ticker in self._ticker_keys[start:]:
+            if not ticker_key.startswith(key):
+                break
+            yield ticker
+
+    def _tickers_with_word_prefix(self, prefix: str) -> Set[str]:
+        tickers: Set[str] = set()
+        start = bisect.bisect_left(self._words, prefix)
+        for word in self._words[start:]:
+            if not word.startswith(prefix):
+                break
+            tickers |= self._word_tickers[word]
+        return tickers
+
+    def _fuzzy_tickers(self, query_word: str) -> Dict[str, int]:
+        """Maps each stock with a word within the typo budget of query_word to its typo count."""
+        distances = {ticker: 0 for ticker in self._tickers_with_word_prefix(query_word)}
+        limit = _max_typos(query_word)
+        if limit == 0:
+            return distances
+
+        query_trigrams = _trigrams(query_word)
+        shared: Dict[str, int] = {}
+        for trigram in query_trigrams:
+            for word in self._trigram_words.get(trigram, ()):
+                shared[word] = shared.get(word, 0) + 1
+        # Each typo destroys at most three of the query's trigrams
+        min_shared = max(1, len(query_trigrams) - 3 * limit)
+
+        for word, count in shared.items():
+            if count < min_shared:
+                continue
+            # Compare against the whole word and against its prefix of the
+            # same length, so half-typed words with a typo still match
+            distance = min(
+                _edit_distance(query_word, word, limit),
+                _edit_distance(query_word, word[:len(query_word)], limit)
+            )
+            if distance > limit:
+                continue
+            for ticker in self._vocabulary[word]:
+                if distance < distances.get(ticker, limit + 1):
+                    distances[ticker] = distance
+        return distances
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, str]]:
+        """Returns up to limit (ticker, name) pairs, best match first."""
+        query_words = _words(query)
+        key = "".join(query_words)
+        if not key:
+            return []
+
+        # ticker -> sort key; the first tier to find a ticker decides its rank
+        ranked: Dict[str, tuple] = {}
+
+        def add(ticker: str, rank: tuple) -> None:
+            if ticker not in ranked:
+                ranked[ticker] = rank
+
+        for ticker in self._tickers_with_prefix(key):
+            add(ticker, (0,) if _ticker_key(ticker) == key else (1, len(ticker), ticker))
+
+        if len(ranked) < limit:
+            matches = self._tickers_with_word_prefix(query_words[0])
+            for query_word in query_words[1:]:
+                matches &= self._tickers_with_word_prefix(query_word)
+            if len(query_words) > 1:
+                # "jp morgan" should still find "JPMorgan"
+                matches |= self._tickers_with_word_prefix(key)
+            phrase = " ".join(query_words)
+            for ticker in matches:
+                # Names that start with the query beat names that merely contain its words
+                starts = 0 if self._normalized_names[ticker].startswith(phrase) else 1
+                add(ticker, (2, starts, len(self._names[ticker]), ticker))
+
+        if len(ranked) < limit and len(key) >= FUZZY_MIN_LENGTH:
+            phrase = " ".join(query_words)
+            for ticker, name in self._normalized_names.items():
+                if phrase in name:
+                    add(ticker, (3, name.index(phrase), ticker))
+
+        if len(ranked) < limit and len(key) >= FUZZY_MIN_LENGTH:
+            # Every query word must match some word of the stock within its typo budget
+            totals = self._fuzzy_tickers(query_words[0])
+            for query_word in query_words[1:]:
+                distances = self._fuzzy_tickers(query_word)
+                totals = {ticker: total + distances[ticker] for ticker, total in totals.items() if ticker in distances}
+            for ticker, total in totals.items():
+                add(ticker, (4, total, len(self._names[ticker]), ticker))
+
+        best = sorted(ranked, key=ranked.__getitem__)[:limit]
+        return [(ticker, self._names[ticker]) for ticker in best]
+
+
+_index: Optional[StockSearchIndex] = None
+_index_registry: Optional[ticker_registry.TickerRegistry] = None
+
+
+def get_search_index() -> StockSearchIndex:
+    """
+    Returns the index for the current ticker registry, rebuilding it the
+    first time it is used after the registry is reloaded.
+    """
+    global _index, _index_registry
+    registry = ticker_registry.get_registry()
+    if _index is None or _index_registry is not registry:
+        index = StockSearchIndex({ticker: info.name for ticker, info in registry.info.items()})
+        # Swap both together; concurrent rebuilds just build the same index twice
+        _index, _index_registry = index, registry
+    return _index
+
+
+def search_stocks(query: str, limit: int = 10) -> List[Tuple[str, str]]:
+    return get_search_index().search(query, limit)
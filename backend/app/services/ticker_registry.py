@@ -0,0 +1,128 @@
+# FILE: backend/app/services/ticker_registry.py
+# DESCRIPTION: Process-wide, immutable snapshot of the supported tickers.
+#
+# SupportedTicker only changes when app/scripts/ticker-script.py repopulates it,
+# yet every holding add and portfolio view used to query it. The registry is
+# loaded once in the app lifespan and swapped wholesale when a cheap
+# fingerprint query (row count, highest id, total name length) shows the
+# table was rewritten.
+
+import os
+import asyncio
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Iterable, Mapping, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database.models import SupportedTicker
+from app.database.session import async_engine
+
+TICKER_REGISTRY_RELOAD_SECONDS = float(os.getenv("TICKER_REGISTRY_RELOAD_SECONDS", "300"))
+
+
+class TickerInfo(NamedTuple):
+    name: str
+    index_name: str
+
+
+class TickerRegistry:
+    """
+    Read-only view of SupportedTicker. Instances are never mutated; a reload
+    builds a new one, so readers can hold a reference without locking.
+    """
+
+    __slots__ = ("tickers", "info", "version")
+
+    def __init__(self, info: Dict[str, TickerInfo], version: Tuple[int, ...]):
+        self.info: Mapping[str, TickerInfo] = MappingProxyType(info)
+        self.tickers: FrozenSet[str] = frozenset(info)
+        # Changes whenever the table is repopulated
+        self.version = version
+
+    def is_supported(self, ticker: str) -> bool:
+        return ticker.upper() in self.tickers
+
+    def name(self, ticker: str) -> Optional[str]:
+        info = self.info.get(ticker.upper())
+        return info.name if info else None
+
+    def names(self, tickers: Iterable[str]) -> Dict[str, str]:
+        """Maps each supported ticker to its company name; unknown tickers are left out."""
+        return {ticker: self.info[ticker].name for ticker in tickers if ticker in self.info}
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+
+_registry = TickerRegistry({}, (0, 0, 0))
+_reload_task: Optional[asyncio.Task] = None
+
+
+def get_registry() -> TickerRegistry:
+    return _registry
+
+
+async def _table_version(session: AsyncSession) -> Tuple[int, ...]:
+    # SQLite can reuse ids after the table is emptied, so ids alone may repeat
+    count, max_id, name_length = (await session.exec(
+        select(
+            func.count(SupportedTicker.id),
+            func.max(SupportedTicker.id),
+            func.sum(func.length(SupportedTicker.name))
+        )
+    )).one()
+    return count, max_id or 0, name_length or 0
+
+
+async def load_registry(force: bool = True) -> TickerRegistry:
+    """
+    Loads SupportedTicker into a new registry and makes it current. Without
+    force, the table is only read if its fingerprint changed.
+    """
+    global _registry
+    async with AsyncSession(async_engine) as session:
+        version = await _table_version(session)
+        if not force and version == _registry.version:
+            return _registry
+        if version[0] == 0 and len(_registry):
+            # The ticker script clears the table before re-adding rows; keep
+            # serving the current registry rather than rejecting every ticker
+            return _registry
+        rows = (await session.exec(
+            select(SupportedTicker.ticker, SupportedTicker.name, SupportedTicker.index_name)
+        )).all()
+
+    _registry = TickerRegistry(
+        {ticker.upper(): TickerInfo(name, index_name) for ticker, name, index_name in rows},
+        version
+    )
+    print(f"📇 Loaded {len(_registry)} supported tickers")
+    return _registry
+
+
+async def _reload_loop() -> None:
+    while True:
+        await asyncio.sleep(TICKER_REGISTRY_RELOAD_SECONDS)
+        try:
+            await load_registry(force=False)
+        except Exception as e:
+            print(f"⚠️ Ticker registry reload failed: {e}")
+
+
+def start_registry_reloader() -> None:
+    global _reload_task
+    if _reload_task is None or _reload_task.done():
+        _reload_task = asyncio.create_task(_reload_loop())
+
+
+async def stop_registry_reloader() -> None:
+    global _reload_task
+    if _reload_task is not None:
+        _reload_task.cancel()
+        try:
+            await _reload_task
+        except asyncio.CancelledError:
+            pass
+        _reload_task = None
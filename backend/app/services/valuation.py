@@ -0,0 +1,101 @@
+# FILE: backend/app/services/valuation.py
+# DESCRIPTION: Vectorized portfolio valuation shared by the portfolio API and the AI agent.
+
+import math
+from dataclasses import dataclass
+from typing import List, Mapping, Optional, Sequence
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class PortfolioValuation:
+    """
+    Per-holding arrays (aligned with `tickers`, NaN where unknown) and
+    portfolio totals.
+
+    Rules shared by every caller:
+    - A holding is priced when its quote has a positive current price.
+      Unpriced holdings contribute nothing to any total.
+    - The day change is the quote's day change, or price - previous close
+      when the quote omits it.
+    - The day change percent is measured against the previous-close value
+      of the priced holdings that have a previous close.
+    """
+    tickers: List[str]
+    quantities: np.ndarray
+    prices: np.ndarray
+    previous_closes: np.ndarray
+    day_change_percents: np.ndarray
+    values: np.ndarray
+    day_changes: np.ndarray
+    priced: np.ndarray
+    total_value: float
+    total_previous_value: float
+    total_day_change: float
+    total_day_change_percent: Optional[float]
+    biggest_mover_index: Optional[int]
+
+    def at(self, array: np.ndarray, index: int) -> Optional[float]:
+        """Reads one element as a float, mapping NaN to None."""
+        value = float(array[index])
+        return None if math.isnan(value) else value
+
+
+def _column(quotes: Sequence[Optional[dict]], field: str) -> np.ndarray:
+    return np.array(
+        [quote.get(field) if quote and quote.get(field) is not None else np.nan for quote in quotes],
+        dtype=np.float64
+    )
+
+def value_portfolio(
+    tickers: Sequence[str],
+    quantities: Sequence[float],
+    quotes_map: Mapping[str, Optional[dict]]
+) -> PortfolioValuation:
+    """Values a set of holdings against a ticker -> quote mapping."""
+    quotes = [quotes_map.get(ticker) for ticker in tickers]
+    quantity = np.asarray(quantities, dtype=np.float64)
+    price = _column(quotes, "current_price")
+    previous_close = _column(quotes, "previous_close")
+    day_change_per_share = _column(quotes, "day_change")
+    day_change_percent = _column(quotes, "day_change_percent")
+
+    with np.errstate(invalid="ignore"):
+        priced = np.isfinite(price) & (price > 0)
+    day_change_per_share = np.where(
+        np.isfinite(day_change_per_share), day_change_per_share, price - previous_close
+    )
+
+    values = np.where(priced, quantity * price, np.nan)
+    day_changes = np.where(priced, quantity * day_change_per_share, np.nan)
+
+    has_previous = priced & np.isfinite(previous_close)
+    total_value = float(np.nansum(values))
+    total_previous_value = float(np.sum(quantity * previous_close, where=has_previous))
+    total_day_change = float(np.nansum(day_changes))
+    comparable_day_change = float(np.sum(np.nan_to_num(day_changes), where=has_previous))
+    total_day_change_percent = (
+        comparable_day_change / total_previous_value * 100 if total_previous_value > 0 else None
+    )
+
+    biggest_mover_index = None
+    if priced.any():
+        movement = np.where(priced, np.abs(np.nan_to_num(day_change_percent)), -1.0)
+        biggest_mover_index = int(np.argmax(movement))
+
+    return PortfolioValuation(
+        tickers=list(tickers),
+        quantities=quantity,
+        prices=price,
+        previous_closes=previous_close,
+        day_change_percents=day_change_percent,
+        values=values,
+        day_changes=day_changes,
+        priced=priced,
+        total_value=total_value,
+        total_previous_value=total_previous_value,
+        total_day_change=total_day_change,
+        total_day_change_percent=total_day_change_percent,
+        biggest_mover_index=biggest_mover_index,
+    )
@@ -0,0 +1,5 @@
+import os
+
+# app.database.session refuses to import without a database URL; the unit
+# tests never open a connection, so an in-memory SQLite URL is enough
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
@@ -0,0 +1,212 @@
+import asyncio
+import random
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.services import agent_service, finnhub_service, news_store
+from app.services.finnhub_scheduler import FinnhubScheduler, Priority
+from app.services.news_store import NewsStore
+from app.services.agent_service import (
+    MarkdownStreamCleaner,
+    PortfolioPerformance,
+    StockPerformance,
+    analysis_cache_key,
+    clean_markdown_formatting,
+)
+
+MODEL_OUTPUTS = [
+    "### **Daily Performance Analysis:**\n\nToday your portfolio rose **+1.20%** ($540.12), led by *NVDA*.\n\n"
+    "### **Biggest Mover Spotlight:**\n\nNVDA gained 4.1% after earnings.\n",
+    "Daily Performance Analysis:\n\nA quiet day.\n\n\n\nBiggest Mover Spotlight:\n\n  AAPL   slipped 0.4%.  \n",
+    "## Overall Portfolio Assessment\n- Tech is **62%** of the value\n- Energy is `8%`\n* Cash is low\n\n"
+    "#### **1. Rebalance**\n1. **Trim** NVDA\n2. Add bonds\n",
+    "\n\n   \nRecommendations and Outlook:\r\n\r\nHold __steady__ and ~~panic~~ review ✅ **monthly**.\n\n\n",
+    "🔹 **Risk:** concentration in a single name, with a -5% drawdown possible on weak guidance",
+]
+
+
+def _stream(text: str, rng: random.Random) -> str:
+    cleaner = MarkdownStreamCleaner()
+    out = []
+    position = 0
+    while position < len(text):
+        size = rng.randint(1, 12)
+        out.append(cleaner.feed(text[position:position + size]))
+        position += size
+    out.append(cleaner.flush())
+    return "".join(out)
+
+
+@pytest.mark.parametrize("text", MODEL_OUTPUTS)
+def test_streamed_text_matches_the_batch_cleaner(text):
+    rng = random.Random(11)
+    expected = clean_markdown_formatting(text)
+    for _ in range(50):
+        assert _stream(text, rng) == expected
+
+
+def test_blank_line_after_a_header_is_kept():
+    text = "### **Daily Performance Analysis:**\n\nToday the portfolio rose."
+
+    assert clean_markdown_formatting(text) == "Daily Performance Analysis:\n\nToday the portfolio rose."
+
+
+def test_unfinished_line_is_released_at_word_boundaries():
+    cleaner = MarkdownStreamCleaner()
+
+    assert cleaner.feed("Today the port") == "Today the"
+    assert cleaner.feed("folio **rose") == " portfolio"
+    assert cleaner.feed("** today") == ""
+    assert cleaner.flush() == " rose today"
+
+
+def _performance(day_change_percent: float = 1.0, price: float = 100.0, quantity: float = 10) -> PortfolioPerformance:
+    holding = StockPerformance(
+        ticker="AAPL", day_change_percent=day_change_percent, current_price=price,
+        quantity=quantity, current_value=price * quantity
+    )
+    return PortfolioPerformance(
+        total_value=holding.current_value,
+        total_day_change_percent=day_change_percent,
+        total_day_change_amount=0.0,
+        biggest_mover=holding,
+        holdings=[holding],
+    )
+
+
+@pytest.fixture
+def bucket(monkeypatch):
+    monkeypatch.setattr(agent_service, "ANALYSIS_CACHE_BUCKET_PERCENT", 0.25)
+
+
+def test_quotes_within_a_bucket_share_a_key(bucket):
+    news = ["Apple beats estimates"]
+    key = analysis_cache_key(1, _performance(1.0, 100.0), news)
+
+    assert analysis_cache_key(1, _performance(1.05, 99.9), news) == key
+    assert analysis_cache_key(1, _performance(0.9, 99.95), news) == key
+
+
+def test_moves_into_another_bucket_change_the_key(bucket):
+    news = ["Apple beats estimates"]
+    key = analysis_cache_key(1, _performance(1.0, 100.0), news)
+
+    assert analysis_cache_key(1, _performance(1.3, 100.0), news) != key
+    assert analysis_cache_key(1, _performance(1.0, 100.5), news) != key
+
+
+def test_quantity_news_and_portfolio_change_the_key(bucket):
+    news = ["Apple beats estimates"]
+    key = analysis_cache_key(1, _performance(), news)
+
+    assert analysis_cache_key(1, _performance(quantity=11), news) != key
+    assert analysis_cache_key(1, _performance(), news + ["Apple unveils a new phone"]) != key
+    assert analysis_cache_key(1, _performance(), []) != key
+    assert analysis_cache_key(2, _performance(), news) != key
+
+
+def test_headlines_are_not_queued_behind_a_background_pass(monkeypatch):
+    sent = []
+
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def send(path, params):
+            sent.append(params["symbol"])
+            if params["symbol"] == "HELD0":
+                await gate.wait()
+            body = [] if path == "/company-news" else {"c": 1.0}
+            return httpx.Response(200, json=body, request=httpx.Request("GET", "https://finnhub.io" + path))
+
+        scheduler = FinnhubScheduler(send, calls_per_minute=60000, burst=100, max_concurrency=1)
+        scheduler.start()
+        monkeypatch.setattr(finnhub_service, "_scheduler", scheduler)
+        monkeypatch.setattr(finnhub_service, "FINNHUB_API_KEY", "test")
+        monkeypatch.setattr(news_store, "news_store", NewsStore(7, 50, 10, 600))
+
+        # A prefetch pass: the first job holds the only slot, the rest queue behind it
+        background = [
+            asyncio.create_task(scheduler.submit("/quote", {"symbol": f"HELD{i}"}, Priority.BACKGROUND))
+            for i in range(10)
+        ]
+        await asyncio.sleep(0.01)
+        headlines = asyncio.create_task(agent_service.get_news_for_stock("NVDA"))
+        await asyncio.sleep(0.01)
+        gate.set()
+        await headlines
+        await asyncio.gather(*background)
+        await scheduler.stop()
+
+    asyncio.run(scenario())
+    assert sent[:2] == ["HELD0", "NVDA"]
+
+
+def test_slow_headlines_fall_back_to_none(monkeypatch):
+    performance = _performance()
+
+    async def fake_candidates(tickers, quantities):
+        return ["AAPL"]
+
+    async def fake_performance(portfolio):
+        return performance
+
+    async def slow_news(ticker, limit=3):
+        await asyncio.sleep(10)
+        return ["too late"]
+
+    monkeypatch.setattr(agent_service, "_news_candidates", fake_candidates)
+    monkeypatch.setattr(agent_service, "get_portfolio_performance", fake_performance)
+    monkeypatch.setattr(agent_service, "get_news_for_stock", slow_news)
+    monkeypatch.setattr(agent_service, "ANALYSIS_NEWS_TIMEOUT_SECONDS", 0.05)
+    portfolio = SimpleNamespace(holdings=[SimpleNamespace(ticker="AAPL", quantity=10)])
+
+    assert asyncio.run(agent_service.gather_analysis_inputs(portfolio)) == (performance, [])
+
+
+def test_concurrent_streams_share_one_llm_call(monkeypatch):
+    calls = []
+
+    class FakeChain:
+        def __init__(self):
+            self.gate = asyncio.Event()
+
+        async def astream(self, inputs):
+            calls.append(inputs)
+            yield SimpleNamespace(content="Daily Performance ")
+            await self.gate.wait()
+            yield SimpleNamespace(content="Analysis:\n\nAll **good**.")
+
+    chain = FakeChain()
+    performance = _performance()
+
+    async def fake_inputs(portfolio):
+        return performance, ["Apple beats estimates"]
+
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test")
+    monkeypatch.setattr(agent_service, "gather_analysis_inputs", fake_inputs)
+    monkeypatch.setattr(agent_service, "_get_chains", lambda: (None, chain))
+    monkeypatch.setattr(agent_service, "analysis_cache", agent_service.TTLCache(max_entries=10, ttl_seconds=60))
+    portfolio = SimpleNamespace(id=1, holdings=[])
+
+    async def collect():
+        return [event async for event in agent_service.stream_analysis(portfolio)]
+
+    async def scenario():
+        first = asyncio.create_task(collect())
+        await asyncio.sleep(0.01)
+        # Joins after the first tokens went out; it replays them, then follows live
+        second = asyncio.create_task(collect())
+        await asyncio.sleep(0.01)
+        chain.gate.set()
+        return await first, await second
+
+    first, second = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert first == second
+    expected = f"{agent_service.ANALYSIS_HEADER}Daily Performance Analysis:\n\nAll good."
+    assert first[-1] == ("done", expected)
+    assert "".join(text for event, text in first if event == "token") == expected
+    assert agent_service._streams_in_flight == {}
@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.cache import FRESH, MISS, STALE, TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A controllable time.monotonic; advance it with clock.advance(seconds)."""
+    class Clock:
+        now = 1000.0
+
+        def advance(self, seconds: float) -> None:
+            self.now += seconds
+
+    fake = Clock()
+    monkeypatch.setattr(time, "monotonic", lambda: fake.now)
+    return fake
+
+
+def test_rejects_non_positive_size():
+    with pytest.raises(ValueError):
+        TTLCache(max_entries=0, ttl_seconds=1)
+
+
+def test_entries_go_fresh_then_stale_then_missing(clock):
+    cache = TTLCache(max_entries=10, ttl_seconds=10, stale_seconds=5)
+    cache.set("AAPL", {"p": 1})
+
+    assert cache.lookup("AAPL") == (FRESH, {"p": 1})
+    clock.advance(10)
+    assert cache.lookup("AAPL") == (STALE, {"p": 1})
+    assert cache.get("AAPL") is None
+    clock.advance(5)
+    assert cache.lookup("AAPL") == (MISS, None)
+    assert len(cache) == 0
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["stale_hits"], stats["misses"], stats["expirations"]) == (1, 2, 1, 1)
+
+
+def test_cached_none_is_not_a_miss(clock):
+    cache = TTLCache(max_entries=10, ttl_seconds=10)
+    cache.set("ZZZZ", None)
+    assert cache.lookup("ZZZZ") == (FRESH, None)
+    assert cache.lookup("AAPL") == (MISS, None)
+
+
+def test_per_entry_ttl_overrides_default(clock):
+    cache = TTLCache(max_entries=10, ttl_seconds=10, stale_seconds=5)
+    cache.set("AAPL", 1, ttl_seconds=60, stale_seconds=0)
+
+    clock.advance(30)
+    assert cache.ttl_remaining("AAPL") == 30
+    clock.advance(30)
+    assert cache.lookup("AAPL") == (MISS, None)
+
+
+def test_evicts_least_recently_used(clock):
+    cache = TTLCache(max_entries=2, ttl_seconds=10)
+    cache.set("A", 1)
+    cache.set("B", 2)
+    cache.lookup("A")  # B is now the least recently used
+    cache.set("C", 3)
+
+    assert cache.lookup("B") == (MISS, None)
+    assert cache.get("A") == 1 and cache.get("C") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_peek_does_not_refresh_lru_or_count(clock):
+    cache = TTLCache(max_entries=2, ttl_seconds=10, stale_seconds=5)
+    cache.set("A", 1)
+    cache.set("B", 2)
+    assert cache.peek("A").value == 1
+    cache.set("C", 3)
+
+    assert cache.peek("A") is None
+    assert cache.stats()["hits"] == 0
+
+    clock.advance(12)
+    entries = cache.peek_many(["B", "C", "D"])
+    assert set(entries) == {"B", "C"}
+    assert not cache.is_fresh(entries["B"])
+    assert cache.ttl_remaining("B") is None
+
+
+def test_listeners_hear_changed_values_only(clock):
+    cache = TTLCache(max_entries=10, ttl_seconds=10)
+    heard = []
+    cache.add_listener(lambda key, value: heard.append((key, value)))
+    cache.add_listener(lambda key, value: 1 / 0)  # A failing listener never fails the write
+
+    cache.set("AAPL", 1)
+    cache.set("AAPL", 1)
+    cache.set("AAPL", 2)
+    assert heard == [("AAPL", 1), ("AAPL", 2)]
+
+
+def test_async_variants(clock):
+    cache = TTLCache(max_entries=10, ttl_seconds=10)
+
+    async def scenario():
+        await cache.aset("AAPL", 1)
+        await cache.aset("MSFT", 2, ttl_seconds=0, stale_seconds=10)
+        state = await cache.alookup("AAPL")
+        remaining = await cache.attl_remaining_many(["AAPL", "MSFT"])
+        await cache.adelete("AAPL")
+        return state, remaining, await cache.apeek("AAPL")
+
+    assert asyncio.run(scenario()) == ((FRESH, 1), {"AAPL": 10}, None)
@@ -0,0 +1,185 @@
+import asyncio
+import json
+import socket
+import time
+
+import pytest
+
+from app.services.cache import FRESH, MISS, STALE
+from app.services.cache_backends import RedisCache, SQLiteCache
+
+from tests.fake_redis import FakeRedisServer
+
+
+@pytest.fixture
+def redis_server():
+    with FakeRedisServer() as server:
+        yield server
+
+
+def _unused_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# --- Redis ---
+
+def test_redis_set_get_delete_round_trip(redis_server):
+    cache = RedisCache(redis_server.url, ttl_seconds=60, stale_seconds=30, prefix="t:")
+    cache.set("AAPL", {"current_price": 200.0})
+
+    assert cache.lookup("AAPL") == (FRESH, {"current_price": 200.0})
+    stored, expires_at = redis_server.data[b"t:AAPL"]
+    assert json.loads(stored)["value"] == {"current_price": 200.0}
+    # The key lives on the server until the end of its stale window
+    assert 85 < expires_at - time.time() <= 90
+
+    set_command = next(args for args in redis_server.commands if args[0] == b"SET")
+    assert set_command[3] == b"PX"
+
+    cache.delete("AAPL")
+    assert cache.lookup("AAPL") == (MISS, None)
+
+
+def test_redis_serves_stale_entries_then_drops_them(redis_server):
+    cache = RedisCache(redis_server.url, ttl_seconds=60, prefix="t:")
+    cache.set("MSFT", {"current_price": 1.0}, ttl_seconds=-1, stale_seconds=60)
+    assert cache.lookup("MSFT") == (STALE, {"current_price": 1.0})
+
+    cache.set("MSFT", {"current_price": 1.0}, ttl_seconds=-1, stale_seconds=0.001)
+    time.sleep(0.01)
+    assert cache.lookup("MSFT") == (MISS, None)
+
+
+def test_redis_is_fresh_uses_wall_clock_expiry(redis_server):
+    cache = RedisCache(redis_server.url, ttl_seconds=60, prefix="t:")
+    cache.set("AAPL", {"p": 1})
+    cache.set("MSFT", {"p": 2}, ttl_seconds=-1, stale_seconds=60)
+
+    entries = cache.peek_many(["AAPL", "MSFT"])
+    assert cache.is_fresh(entries["AAPL"])
+    assert not cache.is_fresh(entries["MSFT"])
+
+
+def test_redis_peek_many_uses_one_mget(redis_server):
+    cache = RedisCache(redis_server.url, ttl_seconds=60, prefix="t:")
+    cache.set("AAPL", {"p": 1})
+    cache.set("NVDA", None)
+    redis_server.commands.clear()
+
+    entries = cache.peek_many(["AAPL", "NVDA", "MISSING"])
+
+    assert {key: entry.value for key, entry in entries.items()} == {"AAPL": {"p": 1}, "NVDA": None}
+    assert [args[0] for args in redis_server.commands] == [b"MGET"]
+
+
+def test_redis_error_replies_are_misses(redis_server):
+    cache = RedisCache(redis_server.url, ttl_seconds=60, prefix="t:")
+    cache.set("AAPL", {"p": 1})
+    redis_server.fail_with = "ERR out of memory"
+
+    assert cache.lookup("AAPL") == (MISS, None)
+    assert cache.peek("AAPL") is None
+    cache.set("AAPL", {"p": 2})
+    cache.delete("AAPL")
+    assert cache.stats()["errors"] == 4
+
+
+def test_redis_unreachable_server_is_a_miss():
+    cache = RedisCache(f"redis://127.0.0.1:{_unused_port()}/0", ttl_seconds=60)
+    assert cache.lookup("AAPL") == (MISS, None)
+    cache.set("AAPL", {"p": 1})
+    cache.delete("AAPL")
+    assert cache.stats()["errors"] == 3
+
+
+def test_redis_corrupt_payload_is_a_miss(redis_server):
+    cache = RedisCache(redis_server.url, ttl_seconds=60, prefix="t:")
+    redis_server.data[b"t:AAPL"] = (b"not json", None)
+    assert cache.lookup("AAPL") == (MISS, None)
+
+
+def test_redis_async_methods(redis_server):
+    cache = RedisCache(redis_server.url, ttl_seconds=60, prefix="t:")
+
+    async def scenario():
+        await cache.aset("AAPL", {"p": 1})
+        state = await cache.alookup("AAPL")
+        entries = await cache.apeek_many(["AAPL"])
+        await cache.adelete("AAPL")
+        return state, entries["AAPL"].value, await cache.apeek("AAPL")
+
+    assert asyncio.run(scenario()) == ((FRESH, {"p": 1}), {"p": 1}, None)
+
+
+# --- SQLite ---
+
+@pytest.fixture
+def sqlite_path(tmp_path):
+    return str(tmp_path / "cache.sqlite3")
+
+
+def test_sqlite_round_trip_and_negative_entries(sqlite_path):
+    cache = SQLiteCache(sqlite_path, max_entries=10, ttl_seconds=60)
+    cache.set("AAPL", {"p": 1})
+    cache.set("ZZZZ", None)
+
+    assert cache.lookup("AAPL") == (FRESH, {"p": 1})
+    assert cache.lookup("ZZZZ") == (FRESH, None)
+    cache.delete("AAPL")
+    assert cache.lookup("AAPL") == (MISS, None)
+
+
+def test_sqlite_is_shared_between_instances(sqlite_path):
+    SQLiteCache(sqlite_path, max_entries=10, ttl_seconds=60).set("AAPL", {"p": 1})
+    assert SQLiteCache(sqlite_path, max_entries=10, ttl_seconds=60).lookup("AAPL") == (FRESH, {"p": 1})
+
+
+def test_sqlite_reads_do_not_write(sqlite_path):
+    cache = SQLiteCache(sqlite_path, max_entries=10, ttl_seconds=60)
+    cache.set("AAPL", {"p": 1})
+    conn = cache._connection()
+    before = conn.total_changes
+
+    cache.lookup("AAPL")
+    cache.peek_many(["AAPL", "MSFT"])
+
+    assert conn.total_changes == before
+
+
+def test_sqlite_evicts_least_recently_read(sqlite_path):
+    cache = SQLiteCache(sqlite_path, max_entries=2, ttl_seconds=60)
+    cache.set("A", 1)
+    time.sleep(0.01)
+    cache.set("B", 2)
+    time.sleep(0.01)
+    # Reading A is remembered and flushed with the next write
+    cache.lookup("A")
+    cache.set("C", 3)
+
+    assert set(cache.peek_many(["A", "B", "C"])) == {"A", "C"}
+
+
+def test_sqlite_peek_many_reads_in_batches(sqlite_path):
+    cache = SQLiteCache(sqlite_path, max_entries=2000, ttl_seconds=60)
+    keys = [f"T{i}" for i in range(1200)]
+    for key in keys[::100]:
+        cache.set(key, {"k": key})
+
+    entries = cache.peek_many(keys)
+
+    assert sorted(entries) == sorted(keys[::100])
+
+
+def test_sqlite_async_methods(sqlite_path):
+    cache = SQLiteCache(sqlite_path, max_entries=10, ttl_seconds=60)
+
+    async def scenario():
+        await cache.aset("AAPL", {"p": 1})
+        state = await cache.alookup("AAPL")
+        remaining = await cache.attl_remaining_many(["AAPL", "MSFT"])
+        await cache.adelete("AAPL")
+        return state, set(remaining), await cache.apeek("AAPL")
+
+    assert asyncio.run(scenario()) == ((FRESH, {"p": 1}), {"AAPL"}, None)
@@ -0,0 +1,62 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.services import finnhub_service
+from app.services.candle_store import CANDLE_DTYPE, CandleStore
+
+
+def _candles(timestamps, closes) -> np.ndarray:
+    candles = np.zeros(len(timestamps), dtype=CANDLE_DTYPE)
+    candles["t"] = timestamps
+    candles["c"] = closes
+    return candles
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CandleStore(str(tmp_path))
+
+
+def test_missing_series_is_empty(store):
+    assert len(store.read("AAPL")) == 0
+    assert store.last_timestamp("AAPL") is None
+
+
+def test_append_merges_sorted_and_newest_bar_wins(store):
+    store.append("AAPL", "D", _candles([300, 100], [3.0, 1.0]))
+    assert store.append("aapl", "D", _candles([200, 300], [2.0, 3.5])) == 3
+
+    candles = store.read("AAPL")
+    assert candles["t"].tolist() == [100, 200, 300]
+    assert candles["c"].tolist() == [1.0, 2.0, 3.5]
+    assert store.last_timestamp("AAPL") == 300
+
+
+def test_read_range_is_inclusive(store):
+    store.append("AAPL", "D", _candles([100, 200, 300, 400], [1.0, 2.0, 3.0, 4.0]))
+
+    assert store.read("AAPL", start=200, end=300)["t"].tolist() == [200, 300]
+    assert store.read("AAPL", start=250)["t"].tolist() == [300, 400]
+    assert store.read("AAPL", end=50)["t"].tolist() == []
+
+
+def test_unsupported_resolution_is_rejected(store):
+    with pytest.raises(ValueError):
+        store.read("AAPL", resolution="W")
+
+
+def test_backfill_starts_from_the_last_stored_bar(store, monkeypatch):
+    requested = []
+
+    async def fake_fetch(ticker, resolution, from_ts, to_ts, priority):
+        requested.append(from_ts)
+        return {"t": [300, 400], "o": [0, 0], "h": [0, 0], "l": [0, 0], "c": [3.5, 4.0], "v": [0, 0]}
+
+    monkeypatch.setattr(finnhub_service, "fetch_stock_candles", fake_fetch)
+    store.append("AAPL", "D", _candles([200, 300], [2.0, 3.0]))
+
+    assert asyncio.run(store.backfill("AAPL")) == 2
+    assert requested == [300]
+    assert store.read("AAPL")["c"].tolist() == [2.0, 3.5, 4.0]
@@ -0,0 +1,217 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.services.finnhub_scheduler import FinnhubRateLimitError, FinnhubScheduler, Priority, SlidingWindow
+
+
+def _response(status_code: int, json=None, headers=None) -> httpx.Response:
+    request = httpx.Request("GET", "https://finnhub.io/api/v1/quote")
+    return httpx.Response(status_code, json=json, headers=headers, request=request)
+
+
+def _scheduler(send, **kwargs) -> FinnhubScheduler:
+    options = {"calls_per_minute": 60000, "burst": 100, "max_concurrency": 1, **kwargs}
+    return FinnhubScheduler(send, **options)
+
+
+def test_most_urgent_queued_job_runs_first():
+    sent = []
+
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def send(path, params):
+            sent.append(params["symbol"])
+            if params["symbol"] == "FIRST":
+                await gate.wait()
+            return _response(200, json={"symbol": params["symbol"]})
+
+        scheduler = _scheduler(send)
+        scheduler.start()
+        # FIRST holds the only slot while the others queue up behind it
+        first = asyncio.create_task(scheduler.submit("/quote", {"symbol": "FIRST"}, Priority.BACKGROUND))
+        await asyncio.sleep(0.01)
+        jobs = [
+            asyncio.create_task(scheduler.submit("/quote", {"symbol": symbol}, priority))
+            for symbol, priority in [
+                ("NEWS", Priority.NEWS),
+                ("BACKGROUND", Priority.BACKGROUND),
+                ("INTERACTIVE", Priority.INTERACTIVE),
+                ("INTERACTIVE2", Priority.INTERACTIVE),
+            ]
+        ]
+        await asyncio.sleep(0.01)
+        gate.set()
+        results = await asyncio.gather(first, *jobs)
+        await scheduler.stop()
+        return results
+
+    results = asyncio.run(scenario())
+    assert sent == ["FIRST", "INTERACTIVE", "INTERACTIVE2", "NEWS", "BACKGROUND"]
+    assert results[0] == {"symbol": "FIRST"}
+
+
+def test_429_pauses_for_retry_after_then_retries():
+    responses = [_response(429, headers={"Retry-After": "0.2"}), _response(200, json={"c": 1.0})]
+
+    async def scenario():
+        async def send(path, params):
+            return responses.pop(0)
+
+        scheduler = _scheduler(send)
+        scheduler.start()
+        start = time.monotonic()
+        result = await scheduler.submit("/quote", {"symbol": "AAPL"})
+        elapsed = time.monotonic() - start
+        await scheduler.stop()
+        return result, elapsed, scheduler.rate_limited_responses
+
+    result, elapsed, rate_limited = asyncio.run(scenario())
+    assert result == {"c": 1.0}
+    assert elapsed >= 0.2
+    assert rate_limited == 1
+
+
+def test_gives_up_after_max_retries():
+    async def scenario():
+        async def send(path, params):
+            return _response(429, headers={"Retry-After": "0"})
+
+        scheduler = _scheduler(send, max_retries=2)
+        scheduler.start()
+        try:
+            with pytest.raises(FinnhubRateLimitError):
+                await scheduler.submit("/quote", {"symbol": "AAPL"})
+        finally:
+            await scheduler.stop()
+        return scheduler.rate_limited_responses
+
+    assert asyncio.run(scenario()) == 3
+
+
+def test_other_errors_reach_the_caller():
+    async def scenario():
+        async def send(path, params):
+            return _response(500)
+
+        scheduler = _scheduler(send)
+        scheduler.start()
+        try:
+            with pytest.raises(httpx.HTTPStatusError):
+                await scheduler.submit("/quote", {"symbol": "AAPL"})
+        finally:
+            await scheduler.stop()
+
+    asyncio.run(scenario())
+
+
+def test_backoff_without_retry_after_is_exponential_and_capped():
+    async def scenario():
+        scheduler = _scheduler(None, max_backoff_seconds=5)
+        return [
+            scheduler._retry_after_seconds(_response(429), attempt) for attempt in (1, 2, 3, 4)
+        ] + [
+            scheduler._retry_after_seconds(_response(429, headers={"Retry-After": "120"}), 1),
+            scheduler._retry_after_seconds(_response(429, headers={"Retry-After": "soon"}), 2),
+        ]
+
+    assert asyncio.run(scenario()) == [1, 2, 4, 5, 5, 2]
+
+
+def test_promoted_job_jumps_the_queue_and_runs_once():
+    sent = []
+
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def send(path, params):
+            sent.append(params["symbol"])
+            if params["symbol"] == "FIRST":
+                await gate.wait()
+            return _response(200, json={"symbol": params["symbol"]})
+
+        scheduler = _scheduler(send)
+        scheduler.start()
+        first = asyncio.create_task(scheduler.submit("/quote", {"symbol": "FIRST"}, Priority.BACKGROUND))
+        await asyncio.sleep(0.01)
+        jobs = [
+            asyncio.create_task(scheduler.submit("/quote", {"symbol": "OLDER"}, Priority.BACKGROUND)),
+            asyncio.create_task(scheduler.submit("/quote", {"symbol": "JOINED"}, Priority.BACKGROUND, key="JOINED")),
+        ]
+        await asyncio.sleep(0.01)
+        scheduler.promote("JOINED", Priority.INTERACTIVE)
+        # Promoting to a less urgent priority is a no-op
+        scheduler.promote("JOINED", Priority.NEWS)
+        gate.set()
+        results = await asyncio.gather(first, *jobs)
+        await scheduler.stop()
+        return results
+
+    results = asyncio.run(scenario())
+    assert sent == ["FIRST", "JOINED", "OLDER"]
+    assert results[2] == {"symbol": "JOINED"}
+
+
+def test_interactive_miss_promotes_a_background_refresh(monkeypatch):
+    from app.services import finnhub_service
+
+    submitted = []
+
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def send(path, params):
+            submitted.append(params["symbol"])
+            if params["symbol"] == "FIRST":
+                await gate.wait()
+            return _response(200, json={"c": 10.0, "d": 1.0, "dp": 10.0, "pc": 9.0})
+
+        scheduler = _scheduler(send)
+        scheduler.start()
+        monkeypatch.setattr(finnhub_service, "_scheduler", scheduler)
+        monkeypatch.setattr(finnhub_service, "FINNHUB_API_KEY", "test")
+        first = asyncio.create_task(scheduler.submit("/quote", {"symbol": "FIRST"}, Priority.BACKGROUND))
+        older = asyncio.create_task(scheduler.submit("/quote", {"symbol": "OLDER"}, Priority.BACKGROUND))
+        await asyncio.sleep(0.01)
+
+        finnhub_service.revalidate_stock_quote("PROMO")
+        await asyncio.sleep(0.01)
+        quote = asyncio.create_task(finnhub_service.refresh_stock_quote("PROMO", Priority.INTERACTIVE))
+        await asyncio.sleep(0.01)
+        gate.set()
+        await asyncio.gather(first, older)
+        result = await quote
+        await scheduler.stop()
+        return result
+
+    result = asyncio.run(scenario())
+    assert submitted == ["FIRST", "PROMO", "OLDER"]
+    assert result["current_price"] == 10.0
+
+
+def test_sliding_window_holds_calls_past_the_limit():
+    async def scenario():
+        window = SlidingWindow(limit=3, window_seconds=0.2)
+        start = time.monotonic()
+        for _ in range(3):
+            await window.acquire()
+        immediate = time.monotonic() - start
+        full = window.available
+        await window.acquire()
+        return immediate, full, time.monotonic() - start
+
+    immediate, full, elapsed = asyncio.run(scenario())
+    assert immediate < 0.05
+    assert full == 0
+    assert elapsed >= 0.2
+
+
+def test_burst_never_exceeds_the_per_minute_limit():
+    async def scenario():
+        scheduler = _scheduler(None, calls_per_minute=10, burst=100)
+        return scheduler.stats()["tokens_available"]
+
+    assert asyncio.run(scenario()) == 10
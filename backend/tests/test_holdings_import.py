@@ -0,0 +1,69 @@
+import pytest
+
+from app.services.holdings_import import ImportRow, parse_quantity, rows_from_csv
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("1,250.5", 1250.5),
+    (" 10 ", 10.0),
+    ("0.25", 0.25),
+    ("0", None),
+    ("-5", None),
+    ("nan", None),
+    ("inf", None),
+    ("ten", None),
+    ("", None),
+])
+def test_parse_quantity(raw, expected):
+    assert parse_quantity(raw) == expected
+
+
+def test_header_is_found_below_account_details():
+    text = (
+        "Account,Individual ...1234\n"
+        "Generated,2025-06-30\n"
+        "\n"
+        "Description,Symbol,Price,Shares\n"
+        "Apple Inc,aapl,201.50,\"1,250.5\"\n"
+        "Microsoft,MSFT,480.00,3\n"
+    )
+
+    assert rows_from_csv(text) == [
+        ImportRow(5, "AAPL", 1250.5),
+        ImportRow(6, "MSFT", 3.0),
+    ]
+
+
+def test_header_names_are_case_insensitive_and_trimmed():
+    assert rows_from_csv(" Ticker ,QTY\nnvda,2\n") == [ImportRow(2, "NVDA", 2.0)]
+
+
+def test_byte_order_mark_does_not_hide_the_header():
+    assert rows_from_csv("\ufeffticker,quantity\nAAPL,1\n") == [ImportRow(2, "AAPL", 1.0)]
+
+
+def test_headerless_rows_are_ticker_then_quantity():
+    assert rows_from_csv("AAPL,10\n\nmsft,2.5\n") == [
+        ImportRow(1, "AAPL", 10.0),
+        ImportRow(3, "MSFT", 2.5),
+    ]
+
+
+def test_headerless_csv_without_a_quantity_column_is_rejected():
+    with pytest.raises(ValueError):
+        rows_from_csv("Name,Notes\nApple,long term\n")
+
+
+def test_bad_rows_are_reported_with_their_line():
+    rows = rows_from_csv("symbol,shares\nAAPL,abc\n,5\nMSFT\n")
+
+    assert rows == [
+        ImportRow(2, "AAPL", None, "Invalid quantity 'abc'"),
+        ImportRow(3, "", 5.0, "Missing ticker"),
+        ImportRow(4, "MSFT", None, "Invalid quantity ''"),
+    ]
+
+
+def test_empty_csv_has_no_rows():
+    assert rows_from_csv("") == []
+    assert rows_from_csv("\n , \n") == []
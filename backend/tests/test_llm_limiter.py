@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from app.services.llm_limiter import LLMLimiter, LLMOverloadedError
+
+
+async def _call(limiter: LLMLimiter, hold: float) -> str:
+    try:
+        async with limiter.slot():
+            await asyncio.sleep(hold)
+        return "ran"
+    except LLMOverloadedError:
+        return "shed"
+
+
+def test_burst_is_shed_immediately_beyond_the_queue():
+    async def scenario():
+        limiter = LLMLimiter(max_concurrency=1, max_queue=1, queue_timeout=1.0)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        tasks = [asyncio.create_task(_call(limiter, 0.05)) for _ in range(8)]
+        # The overflow is rejected before the first call even finishes
+        await asyncio.sleep(0.01)
+        shed_early = sum(task.done() for task in tasks)
+        results = await asyncio.gather(*tasks)
+        return limiter, shed_early, results, loop.time() - started
+
+    limiter, shed_early, results, elapsed = asyncio.run(scenario())
+    assert results.count("ran") == 2
+    assert results.count("shed") == 6
+    assert shed_early == 6
+    assert limiter.rejected == 6
+    assert limiter.timed_out == 0
+    assert elapsed < 0.5
+
+
+def test_is_full_counts_callers_still_waiting_for_the_semaphore():
+    async def scenario():
+        limiter = LLMLimiter(max_concurrency=2, max_queue=1, queue_timeout=1.0)
+        tasks = [asyncio.create_task(_call(limiter, 0.05)) for _ in range(3)]
+        await asyncio.sleep(0)
+        full = limiter.is_full()
+        await asyncio.gather(*tasks)
+        return full, limiter.is_full()
+
+    assert asyncio.run(scenario()) == (True, False)
+
+
+def test_waiter_times_out_when_no_slot_frees_up():
+    async def scenario():
+        limiter = LLMLimiter(max_concurrency=1, max_queue=4, queue_timeout=0.05)
+        results = await asyncio.gather(_call(limiter, 0.3), _call(limiter, 0))
+        return limiter, results
+
+    limiter, results = asyncio.run(scenario())
+    assert results == ["ran", "shed"]
+    assert limiter.timed_out == 1
+    assert limiter.stats()["running"] == 0
+    assert limiter.stats()["waiting"] == 0
+
+
+def test_slot_is_released_when_the_call_fails():
+    async def scenario():
+        limiter = LLMLimiter(max_concurrency=1, max_queue=0, queue_timeout=0.1)
+        with pytest.raises(RuntimeError):
+            async with limiter.slot():
+                raise RuntimeError("upstream failed")
+        return await _call(limiter, 0)
+
+    assert asyncio.run(scenario()) == "ran"
+
+
+def test_rejects_non_positive_concurrency():
+    with pytest.raises(ValueError):
+        LLMLimiter(max_concurrency=0, max_queue=1, queue_timeout=1.0)
@@ -0,0 +1,74 @@
+from datetime import date, datetime
+
+from app.services import market_hours
+from app.services.market_hours import EASTERN
+
+
+def _et(*args) -> datetime:
+    return datetime(*args, tzinfo=EASTERN)
+
+
+def test_2025_holidays_match_the_nyse_calendar():
+    assert market_hours.exchange_holidays(2025) == {
+        date(2025, 1, 1), date(2025, 1, 20), date(2025, 2, 17), date(2025, 4, 18),
+        date(2025, 5, 26), date(2025, 6, 19), date(2025, 7, 4), date(2025, 9, 1),
+        date(2025, 11, 27), date(2025, 12, 25),
+    }
+
+
+def test_weekend_holidays_are_observed_on_the_nearest_weekday():
+    holidays = market_hours.exchange_holidays(2026)
+    assert date(2026, 7, 3) in holidays       # July 4th is a Saturday
+    assert date(2026, 4, 3) in holidays       # Good Friday
+    assert date(2027, 12, 24) in market_hours.exchange_holidays(2027)  # Christmas on a Saturday
+
+
+def test_saturday_new_year_is_not_observed_the_year_before():
+    assert date(2021, 12, 31) not in market_hours.exchange_holidays(2021)
+    assert date(2021, 12, 31) not in market_hours.exchange_holidays(2022)
+    assert market_hours.is_trading_day(date(2021, 12, 31))
+
+
+def test_juneteenth_only_from_2022():
+    assert date(2021, 6, 18) not in market_hours.exchange_holidays(2021)
+    assert date(2022, 6, 20) in market_hours.exchange_holidays(2022)
+
+
+def test_early_closes_skip_days_that_are_not_trading_days():
+    assert market_hours.early_close_days(2025) == {date(2025, 7, 3), date(2025, 11, 28), date(2025, 12, 24)}
+    # July 3rd 2026 is the observed Independence Day, so only two early closes remain
+    assert market_hours.early_close_days(2026) == {date(2026, 11, 27), date(2026, 12, 24)}
+
+
+def test_sessions_on_a_regular_day():
+    assert market_hours.market_session(_et(2025, 3, 12, 3, 59)) == market_hours.CLOSED
+    assert market_hours.market_session(_et(2025, 3, 12, 4, 0)) == market_hours.PRE_MARKET
+    assert market_hours.market_session(_et(2025, 3, 12, 9, 30)) == market_hours.REGULAR
+    assert market_hours.market_session(_et(2025, 3, 12, 16, 0)) == market_hours.AFTER_HOURS
+    assert market_hours.market_session(_et(2025, 3, 12, 20, 0)) == market_hours.CLOSED
+
+
+def test_sessions_on_an_early_close_day():
+    assert market_hours.regular_close(date(2025, 11, 28)) == _et(2025, 11, 28, 13, 0)
+    assert market_hours.market_session(_et(2025, 11, 28, 13, 30)) == market_hours.AFTER_HOURS
+    assert market_hours.market_session(_et(2025, 11, 28, 17, 0)) == market_hours.CLOSED
+
+
+def test_holidays_and_weekends_are_closed():
+    assert market_hours.market_session(_et(2025, 11, 27, 12, 0)) == market_hours.CLOSED
+    assert market_hours.market_session(_et(2025, 3, 15, 12, 0)) == market_hours.CLOSED
+
+
+def test_last_completed_trading_day_skips_holidays():
+    # Before the close on the Monday after Good Friday, the last completed day is Thursday
+    assert market_hours.last_completed_trading_day(_et(2025, 4, 21, 10, 0)) == date(2025, 4, 17)
+    assert market_hours.last_completed_trading_day(_et(2025, 4, 21, 16, 0)) == date(2025, 4, 21)
+
+
+def test_quote_ttl_while_closed_lasts_until_the_next_session():
+    # Friday 20:00 before a Monday holiday: the next session is Tuesday 04:00
+    now = _et(2025, 1, 17, 20, 0)
+    assert market_hours.next_session_open(now) == _et(2025, 1, 21, 4, 0)
+    assert market_hours.quote_ttl_seconds(now) == (_et(2025, 1, 21, 4, 0) - now).total_seconds()
+    assert market_hours.quote_ttl_seconds(_et(2025, 1, 17, 10, 0)) == market_hours.QUOTE_TTL_REGULAR_SECONDS
+    assert market_hours.quote_ttl_seconds(_et(2025, 1, 17, 18, 0)) == market_hours.QUOTE_TTL_EXTENDED_SECONDS
@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services import finnhub_service
+from app.services.news_store import NewsStore
+
+
+def _article(article_id: int, age_hours: float, headline: str = None) -> dict:
+    return {
+        "id": article_id,
+        "datetime": int(time.time() - age_hours * 3600),
+        "headline": headline or f"headline {article_id}",
+        "source": "test",
+        "url": f"https://example.com/{article_id}",
+        "summary": "dropped",
+    }
+
+
+@pytest.fixture
+def responses(monkeypatch):
+    """Queue of payloads fetch_company_news returns, one per call."""
+    queue = []
+    calls = []
+
+    async def fake_fetch(ticker, since=None):
+        calls.append((ticker, since))
+        return queue.pop(0)
+
+    monkeypatch.setattr(finnhub_service, "fetch_company_news", fake_fetch)
+    return queue, calls
+
+
+def _store(refresh_seconds: float = 600) -> NewsStore:
+    return NewsStore(window_days=7, max_articles=50, max_tickers=10, refresh_seconds=refresh_seconds)
+
+
+def test_headlines_are_newest_first_and_trimmed(responses):
+    queue, _ = responses
+    queue.append([_article(1, 5), _article(2, 1), _article(3, 3)])
+
+    headlines = asyncio.run(_store().get_headlines("aapl", limit=2))
+
+    assert headlines == ["headline 2", "headline 3"]
+
+
+def test_refresh_only_adds_articles_newer_than_held(responses):
+    queue, calls = responses
+    queue.append([_article(1, 5)])
+    queue.append([_article(1, 5), _article(2, 1)])
+    store = _store(refresh_seconds=0)
+
+    async def scenario():
+        await store.get_articles("AAPL")
+        return await store.get_articles("AAPL")
+
+    articles = asyncio.run(scenario())
+    assert [article["id"] for article in articles] == [2, 1]
+    assert "summary" not in articles[0]
+    assert calls[1][1] is not None
+
+
+def test_failed_fetch_is_retried_on_next_read(responses):
+    queue, calls = responses
+    queue.extend([None, [_article(1, 1)]])
+    store = _store()
+
+    async def scenario():
+        first = await store.get_headlines("AAPL")
+        second = await store.get_headlines("AAPL")
+        return first, second
+
+    assert asyncio.run(scenario()) == ([], ["headline 1"])
+    assert len(calls) == 2
+
+
+def test_error_payload_is_ignored_and_retried(responses):
+    queue, calls = responses
+    queue.extend([{"error": "You don't have access to this resource."}, [_article(1, 1)]])
+    store = _store()
+
+    async def scenario():
+        first = await store.get_headlines("AAPL")
+        second = await store.get_headlines("AAPL")
+        return first, second
+
+    assert asyncio.run(scenario()) == ([], ["headline 1"])
+
+
+def test_malformed_items_are_skipped(responses):
+    queue, _ = responses
+    queue.append(["not an article", {"id": 9, "datetime": "yesterday"}, _article(1, 1)])
+
+    assert asyncio.run(_store().get_headlines("AAPL")) == ["headline 1"]
+
+
+def test_successful_empty_fetch_is_not_repeated_within_the_interval(responses):
+    queue, calls = responses
+    queue.append([])
+    store = _store()
+
+    async def scenario():
+        await store.get_headlines("AAPL")
+        await store.get_headlines("AAPL")
+
+    asyncio.run(scenario())
+    assert len(calls) == 1
@@ -0,0 +1,134 @@
+import asyncio
+from datetime import date, datetime
+
+import numpy as np
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database.models import Holding, Portfolio, PortfolioSnapshot
+from app.services import finnhub_service, portfolio_snapshots
+from app.services.market_hours import EASTERN
+from app.services.portfolio_snapshots import downsample_lttb
+
+
+def test_next_snapshot_skips_holidays_and_follows_early_closes(monkeypatch):
+    monkeypatch.setattr(portfolio_snapshots, "SNAPSHOT_DELAY_MINUTES", 30)
+    # Wednesday evening before Thanksgiving: the next close is Friday's 13:00 early close
+    now = datetime(2025, 11, 26, 17, 0, tzinfo=EASTERN)
+    assert portfolio_snapshots.next_snapshot_time(now) == datetime(2025, 11, 28, 13, 30, tzinfo=EASTERN)
+    # Before the close the snapshot is still due today
+    now = datetime(2025, 11, 26, 12, 0, tzinfo=EASTERN)
+    assert portfolio_snapshots.next_snapshot_time(now) == datetime(2025, 11, 26, 16, 30, tzinfo=EASTERN)
+
+
+def test_unpriced_portfolios_are_skipped_until_a_rerun_prices_them(monkeypatch, tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'snapshots.db'}")
+    monkeypatch.setattr(portfolio_snapshots, "async_engine", engine)
+    quotes = {"AAPL": {"current_price": 200.0, "previous_close": 190.0}, "MSFT": None}
+
+    async def fake_fetch(tickers, priority=None):
+        return {ticker: quotes[ticker] for ticker in tickers}
+
+    monkeypatch.setattr(finnhub_service, "fetch_multiple_stock_quotes", fake_fetch)
+
+    async def scenario():
+        async with engine.begin() as connection:
+            await connection.run_sync(SQLModel.metadata.create_all)
+        async with AsyncSession(engine) as session:
+            session.add_all([Portfolio(id=1, name="a", user_id="u"), Portfolio(id=2, name="b", user_id="u")])
+            session.add_all([
+                Holding(portfolio_id=1, ticker="AAPL", quantity=2),
+                Holding(portfolio_id=2, ticker="AAPL", quantity=1),
+                Holding(portfolio_id=2, ticker="MSFT", quantity=3),
+            ])
+            await session.commit()
+
+        first = await portfolio_snapshots.take_snapshots(date(2025, 11, 26))
+        quotes["MSFT"] = {"current_price": 400.0, "previous_close": 410.0}
+        second = await portfolio_snapshots.take_snapshots(date(2025, 11, 26))
+        async with AsyncSession(engine) as session:
+            rows = (await session.exec(select(PortfolioSnapshot).order_by(PortfolioSnapshot.portfolio_id))).all()
+        await engine.dispose()
+        return first, second, rows
+
+    first, second, rows = asyncio.run(scenario())
+
+    assert first == (1, 1)
+    assert second == (1, 0)
+    assert [(row.portfolio_id, row.total_value) for row in rows] == [(1, 400.0), (2, 1400.0)]
+
+
+def test_short_series_are_returned_whole():
+    x = np.arange(5, dtype=float)
+    assert downsample_lttb(x, x, 5).tolist() == [0, 1, 2, 3, 4]
+    assert downsample_lttb(x, x, 50).tolist() == [0, 1, 2, 3, 4]
+
+
+def test_fewer_than_three_points_keeps_the_endpoints():
+    x = np.arange(10, dtype=float)
+    assert downsample_lttb(x, x, 2).tolist() == [0, 9]
+
+
+def test_selection_is_sorted_and_keeps_endpoints():
+    rng = np.random.default_rng(7)
+    x = np.arange(1000, dtype=float)
+    y = np.cumsum(rng.normal(size=1000))
+
+    selected = downsample_lttb(x, y, 100)
+
+    assert len(selected) == 100
+    assert selected[0] == 0 and selected[-1] == 999
+    assert np.all(np.diff(selected) > 0)
+
+
+def test_peaks_and_troughs_survive():
+    x = np.arange(500, dtype=float)
+    y = np.zeros(500)
+    y[123] = 50.0
+    y[321] = -40.0
+
+    selected = downsample_lttb(x, y, 20)
+
+    assert 123 in selected
+    assert 321 in selected
+
+
+def test_catch_up_survives_a_database_error_at_boot(monkeypatch):
+    taken = []
+
+    async def failing_check(snapshot_date):
+        raise OSError("database is starting up")
+
+    async def fake_take(snapshot_date):
+        taken.append(snapshot_date)
+        return 0, 0
+
+    monkeypatch.setattr(portfolio_snapshots, "_has_snapshots", failing_check)
+    monkeypatch.setattr(portfolio_snapshots, "take_snapshots", fake_take)
+    monkeypatch.setattr(portfolio_snapshots.market_hours, "is_trading_day", lambda day: True)
+    monkeypatch.setattr(portfolio_snapshots, "snapshot_time", lambda day: datetime(2000, 1, 1, tzinfo=EASTERN))
+    monkeypatch.setattr(portfolio_snapshots, "next_snapshot_time", lambda: datetime(2100, 1, 1, tzinfo=EASTERN))
+
+    async def scenario():
+        portfolio_snapshots.start_snapshot_scheduler()
+        await asyncio.sleep(0.01)
+        await portfolio_snapshots.stop_snapshot_scheduler()
+
+    asyncio.run(scenario())
+    assert len(taken) == 1
+
+
+def test_stopping_tolerates_a_scheduler_that_already_failed(monkeypatch):
+    async def broken_loop():
+        raise OSError("connection refused")
+
+    monkeypatch.setattr(portfolio_snapshots, "_run_forever", broken_loop)
+
+    async def scenario():
+        portfolio_snapshots.start_snapshot_scheduler()
+        await asyncio.sleep(0.01)
+        await portfolio_snapshots.stop_snapshot_scheduler()
+
+    asyncio.run(scenario())
+    assert portfolio_snapshots._snapshot_task is None
@@ -0,0 +1,28 @@
+import asyncio
+
+from app.services import finnhub_service, quote_prefetcher
+from app.services.cache import TTLCache
+
+
+def test_pass_refreshes_soonest_to_expire_first_within_budget(monkeypatch):
+    cache = TTLCache(max_entries=100, ttl_seconds=60)
+    cache.set("FRESH", {}, ttl_seconds=600)
+    cache.set("SOON", {}, ttl_seconds=5)
+    cache.set("LATER", {}, ttl_seconds=30)
+    monkeypatch.setattr(finnhub_service, "quote_cache", cache)
+    monkeypatch.setattr(finnhub_service, "FINNHUB_CALLS_PER_MINUTE", 60)
+    monkeypatch.setattr(quote_prefetcher, "QUOTE_PREFETCH_INTERVAL_SECONDS", 45)
+    # 45 calls fit in a pass interval; the prefetcher may spend a twentieth of them
+    monkeypatch.setattr(quote_prefetcher, "QUOTE_PREFETCH_BUDGET_SHARE", 0.05)
+
+    due = asyncio.run(quote_prefetcher._needing_refresh(["FRESH", "LATER", "MISSING", "SOON"]))
+
+    assert quote_prefetcher.pass_budget() == 2
+    assert due == ["MISSING", "SOON"]
+
+
+def test_budget_is_at_least_one_quote(monkeypatch):
+    monkeypatch.setattr(finnhub_service, "FINNHUB_CALLS_PER_MINUTE", 1)
+    monkeypatch.setattr(quote_prefetcher, "QUOTE_PREFETCH_BUDGET_SHARE", 0.1)
+
+    assert quote_prefetcher.pass_budget() == 1
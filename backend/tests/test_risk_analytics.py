@@ -0,0 +1,143 @@
+import asyncio
+from datetime import date, datetime, timezone
+
+import numpy as np
+import pytest
+
+from app.services import risk_analytics
+from app.services.cache import TTLCache
+from app.services.candle_store import CANDLE_DTYPE, CandleStore
+
+AS_OF = date(2025, 6, 30)
+DAYS = 120
+
+
+def _timestamps(count: int) -> np.ndarray:
+    end = int(datetime(AS_OF.year, AS_OF.month, AS_OF.day, tzinfo=timezone.utc).timestamp())
+    return end - np.arange(count)[::-1] * 86400
+
+
+def _store_closes(store: CandleStore, ticker: str, closes, timestamps=None) -> None:
+    timestamps = _timestamps(len(closes)) if timestamps is None else timestamps
+    candles = np.zeros(len(closes), dtype=CANDLE_DTYPE)
+    candles["t"] = timestamps
+    candles["c"] = closes
+    store.append(ticker, "D", candles)
+
+
+def _from_returns(returns: np.ndarray) -> np.ndarray:
+    return 100.0 * np.concatenate([[1.0], np.cumprod(1.0 + returns)])
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = CandleStore(str(tmp_path))
+    monkeypatch.setattr(risk_analytics, "candle_store", store)
+    monkeypatch.setattr(risk_analytics, "RISK_MIN_OBSERVATIONS", 20)
+    return store
+
+
+@pytest.fixture
+def benchmark_returns(store):
+    returns = np.random.default_rng(3).normal(0.0005, 0.01, DAYS - 1)
+    _store_closes(store, "SPY", _from_returns(returns))
+    return returns
+
+
+def _risk(tickers, quantities):
+    return risk_analytics.compute_risk(1, tickers, np.asarray(quantities, dtype=np.float64), AS_OF, benchmark="SPY", lookback_days=DAYS)
+
+
+def test_beta_matches_the_benchmark_multiple(store, benchmark_returns):
+    _store_closes(store, "ONE", _from_returns(benchmark_returns))
+    _store_closes(store, "TWO", _from_returns(2 * benchmark_returns))
+
+    risk = _risk(["ONE", "TWO"], [1, 1])
+
+    betas = {holding.ticker: holding.beta for holding in risk.holdings}
+    assert betas["ONE"] == pytest.approx(1.0)
+    assert betas["TWO"] == pytest.approx(2.0)
+    weights = {holding.ticker: holding.weight for holding in risk.holdings}
+    assert risk.beta == pytest.approx(weights["ONE"] + 2 * weights["TWO"])
+    assert risk.observations == DAYS - 1
+    assert risk.missing_history == []
+
+
+def test_var_is_a_positive_loss_scaled_by_value(store, benchmark_returns):
+    _store_closes(store, "ONE", _from_returns(benchmark_returns))
+
+    risk = _risk(["ONE"], [10])
+
+    total_value = 10 * _from_returns(benchmark_returns)[-1]
+    assert risk.var_historical == pytest.approx(-np.percentile(benchmark_returns, 5))
+    assert risk.var_historical > 0 and risk.var_parametric > 0
+    assert risk.var_historical_amount == pytest.approx(risk.var_historical * total_value)
+    assert risk.var_parametric_amount == pytest.approx(risk.var_parametric * total_value)
+
+
+def test_max_drawdown_is_peak_to_trough(store, benchmark_returns):
+    closes = np.full(DAYS, 100.0)
+    closes[40:] = 120.0
+    closes[60:] = 60.0
+    closes[80:] = 90.0
+    _store_closes(store, "ONE", closes)
+
+    assert _risk(["ONE"], [1]).max_drawdown == pytest.approx(-0.5)
+
+
+def test_short_gaps_are_filled_and_long_gaps_exclude_the_holding(store, benchmark_returns, monkeypatch):
+    monkeypatch.setattr(risk_analytics, "RISK_MAX_FILL_DAYS", 3)
+    closes = _from_returns(benchmark_returns)
+    timestamps = _timestamps(DAYS)
+    short_gap = np.ones(DAYS, dtype=bool)
+    short_gap[50:53] = False
+    long_gap = np.ones(DAYS, dtype=bool)
+    long_gap[50:54] = False
+    _store_closes(store, "SHORT", closes[short_gap], timestamps[short_gap])
+    _store_closes(store, "LONG", closes[long_gap], timestamps[long_gap])
+
+    risk = _risk(["LONG", "SHORT"], [1, 1])
+
+    assert [holding.ticker for holding in risk.holdings] == ["SHORT"]
+    assert risk.missing_history == ["LONG"]
+    assert risk.observations == DAYS - 1
+
+
+def test_window_starts_at_the_latest_included_history(store, benchmark_returns):
+    closes = _from_returns(benchmark_returns)
+    _store_closes(store, "OLD", closes)
+    _store_closes(store, "NEWER", closes[-50:])
+    # Too little history to include: reported instead of shrinking the window
+    _store_closes(store, "NEWEST", closes[-10:])
+
+    risk = _risk(["NEWER", "NEWEST", "OLD"], [1, 1, 1])
+
+    assert risk.observations == 49
+    assert risk.missing_history == ["NEWEST"]
+    assert [holding.ticker for holding in risk.holdings] == ["NEWER", "OLD"]
+
+
+def test_missing_benchmark_reports_everything(store):
+    risk = _risk(["ONE"], [1])
+
+    assert risk.missing_history == ["ONE", "SPY"]
+    assert risk.holdings == []
+
+
+def test_tickers_without_candles_are_backfilled_once_per_day(store, monkeypatch):
+    monkeypatch.setattr(risk_analytics, "_no_history", TTLCache(max_entries=10, ttl_seconds=86400))
+    backfilled = []
+
+    async def fake_backfill(ticker, resolution="D"):
+        backfilled.append(ticker)
+        return 0
+
+    monkeypatch.setattr(store, "backfill", fake_backfill)
+
+    async def scenario():
+        await risk_analytics.ensure_history(["NODATA"], AS_OF)
+        await risk_analytics.ensure_history(["NODATA"], AS_OF)
+        await risk_analytics.ensure_history(["NODATA"], date(2025, 7, 1))
+
+    asyncio.run(scenario())
+    assert backfilled == ["NODATA", "NODATA"]
@@ -0,0 +1,69 @@
+import pytest
+
+from app.services.search_index import StockSearchIndex, _edit_distance
+
+NAMES = {
+    "AAPL": "Apple Inc.",
+    "AAL": "American Airlines Group Inc.",
+    "AA": "Alcoa Corporation",
+    "MSFT": "Microsoft Corporation",
+    "NVDA": "NVIDIA Corporation",
+    "BAC": "Bank of America Corporation",
+    "JPM": "JPMorgan Chase & Co.",
+    "BRK.B": "Berkshire Hathaway Inc.",
+    "APP": "AppLovin Corporation",
+}
+
+
+@pytest.fixture(scope="module")
+def index():
+    return StockSearchIndex(NAMES)
+
+
+def _tickers(results):
+    return [ticker for ticker, _ in results]
+
+
+def test_edit_distance_counts_transpositions_and_gives_up_early():
+    assert _edit_distance("nvdia", "nvidia", 2) == 1
+    assert _edit_distance("mircosoft", "microsoft", 2) == 1
+    assert _edit_distance("apple", "apple", 1) == 0
+    assert _edit_distance("apple", "orange", 1) == 2
+    assert _edit_distance("a", "abcdef", 2) == 3
+
+
+def test_exact_ticker_ranks_first_then_ticker_prefixes(index):
+    assert _tickers(index.search("AA"))[:3] == ["AA", "AAL", "AAPL"]
+    assert _tickers(index.search("aapl"))[0] == "AAPL"
+
+
+def test_ticker_punctuation_is_ignored(index):
+    assert _tickers(index.search("brk b"))[0] == "BRK.B"
+    assert _tickers(index.search("BRKB"))[0] == "BRK.B"
+
+
+def test_name_word_prefixes(index):
+    assert "AAPL" in _tickers(index.search("appl"))
+    assert _tickers(index.search("bank am")) == ["BAC"]
+    assert _tickers(index.search("jp morgan")) == ["JPM"]
+
+
+def test_name_substring(index):
+    assert _tickers(index.search("soft")) == ["MSFT"]
+
+
+def test_typos_are_tolerated(index):
+    assert _tickers(index.search("mircosoft")) == ["MSFT"]
+    assert _tickers(index.search("nvdia")) == ["NVDA"]
+    assert _tickers(index.search("berkshre hath")) == ["BRK.B"]
+
+
+def test_short_queries_are_not_fuzzy(index):
+    assert index.search("zz") == []
+    assert index.search("  ") == []
+
+
+def test_limit_and_results_carry_names(index):
+    results = index.search("a", limit=2)
+    assert len(results) == 2
+    assert results[0] == ("AA", "Alcoa Corporation")
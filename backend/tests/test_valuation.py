@@ -0,0 +1,76 @@
+import math
+
+import pytest
+
+from app.services.valuation import value_portfolio
+
+
+def _quote(price, previous_close=None, day_change=None, day_change_percent=None) -> dict:
+    return {
+        "current_price": price,
+        "previous_close": previous_close,
+        "day_change": day_change,
+        "day_change_percent": day_change_percent,
+    }
+
+
+def test_totals_over_priced_holdings():
+    valuation = value_portfolio(
+        ["AAPL", "MSFT"],
+        [2, 1],
+        {"AAPL": _quote(200.0, 190.0, 10.0, 5.26), "MSFT": _quote(400.0, 410.0, -10.0, -2.44)},
+    )
+
+    assert valuation.total_value == 800.0
+    assert valuation.total_day_change == 10.0
+    assert valuation.total_previous_value == 790.0
+    assert valuation.total_day_change_percent == pytest.approx(10.0 / 790.0 * 100)
+    assert valuation.values.tolist() == [400.0, 400.0]
+    assert valuation.tickers[valuation.biggest_mover_index] == "AAPL"
+
+
+def test_unpriced_holdings_contribute_nothing():
+    valuation = value_portfolio(
+        ["AAPL", "ZZZZ", "BAD"],
+        [1, 5, 3],
+        {"AAPL": _quote(100.0, 90.0, 10.0, 11.1), "ZZZZ": None, "BAD": _quote(0.0, 50.0, -50.0, -100.0)},
+    )
+
+    assert valuation.priced.tolist() == [True, False, False]
+    assert valuation.total_value == 100.0
+    assert valuation.total_day_change == 10.0
+    assert valuation.at(valuation.values, 1) is None
+    assert valuation.at(valuation.prices, 2) == 0.0
+    # The -100% move of an unpriced holding is not the biggest mover
+    assert valuation.biggest_mover_index == 0
+
+
+def test_day_change_falls_back_to_previous_close():
+    valuation = value_portfolio(["AAPL"], [3], {"AAPL": _quote(110.0, 100.0)})
+
+    assert valuation.total_day_change == 30.0
+    assert valuation.total_day_change_percent == pytest.approx(10.0)
+
+
+def test_percent_ignores_holdings_without_previous_close():
+    valuation = value_portfolio(
+        ["AAPL", "NEW"],
+        [1, 1],
+        {"AAPL": _quote(110.0, 100.0, 10.0), "NEW": _quote(50.0, None, 5.0)},
+    )
+
+    assert valuation.total_day_change == 15.0
+    assert valuation.total_previous_value == 100.0
+    assert valuation.total_day_change_percent == pytest.approx(10.0)
+
+
+def test_empty_and_unpriced_portfolios():
+    empty = value_portfolio([], [], {})
+    assert empty.total_value == 0.0
+    assert empty.total_day_change_percent is None
+    assert empty.biggest_mover_index is None
+
+    unpriced = value_portfolio(["ZZZZ"], [1], {})
+    assert unpriced.total_value == 0.0
+    assert unpriced.biggest_mover_index is None
+    assert math.isnan(unpriced.values[0])
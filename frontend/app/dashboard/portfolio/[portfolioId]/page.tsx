@@ -228,7 +228,11 @@ export default function PortfolioDetailPage() {
     setDisclaimerAutoCollapsed(false)
     
     try {
-      const response = await apiClient.getAiAnalysis(portfolioId)
+      // Show text as soon as the first tokens arrive instead of waiting for the whole answer
+      const response = await apiClient.streamAiAnalysis(portfolioId, (text) => {
+        setAiAnalysisResult(text)
+        setAiAnalysisLoading(false)
+      })
 
       if (response.data) {
         setAiAnalysisResult(response.data.analysis)
@@ -9,6 +9,7 @@ interface ApiResponse<T> {
   data?: T
   error?: string
   status: number
+  retryAfter?: number // Seconds, from the Retry-After header of a 429/503
 }
 
 interface Portfolio {
@@ -32,6 +33,25 @@ interface Holding {
   total_day_change?: number
 }
 
+interface PortfolioDashboard {
+  portfolios: Portfolio[]
+  total_value?: number
+  total_day_change_percent?: number
+  total_day_change?: number
+}
+
+interface PortfolioValuePoint {
+  date: string
+  total_value: number
+  total_day_change: number
+}
+
+interface PortfolioHistory {
+  portfolio_id: number
+  points: PortfolioValuePoint[]
+  downsampled: boolean
+}
+
 interface PortfolioCreate {
   name: string
 }
@@ -41,6 +61,22 @@ interface HoldingCreate {
   quantity: number
 }
 
+interface HoldingBulkRowResult {
+  row: number
+  ticker: string
+  quantity?: number
+  status: 'created' | 'updated' | 'error'
+  error?: string
+  holding?: Holding
+}
+
+interface HoldingBulkResult {
+  created: number
+  updated: number
+  failed: number
+  rows: HoldingBulkRowResult[]
+}
+
 interface SupportedStock {
   ticker: string
   name: string
@@ -163,10 +199,28 @@ class ApiClient {
     })
   }
 
+  // Every portfolio valued in one request (one quote fetch for all tickers)
+  async getPortfolioDashboard(): Promise<ApiResponse<PortfolioDashboard>> {
+    return this.request<PortfolioDashboard>('/api/portfolios/dashboard')
+  }
+
   async getPortfolioDetails(portfolioId: string): Promise<ApiResponse<Portfolio>> {
     return this.request<Portfolio>(`/api/portfolios/${portfolioId}`)
   }
 
+  // End-of-day values; long ranges come back downsampled to maxPoints
+  async getPortfolioHistory(
+    portfolioId: string,
+    options: { start?: string; end?: string; maxPoints?: number } = {}
+  ): Promise<ApiResponse<PortfolioHistory>> {
+    const params = new URLSearchParams()
+    if (options.start) params.set('start', options.start)
+    if (options.end) params.set('end', options.end)
+    if (options.maxPoints) params.set('max_points', String(options.maxPoints))
+    const query = params.toString()
+    return this.request<PortfolioHistory>(`/api/portfolios/${portfolioId}/history${query ? `?${query}` : ''}`)
+  }
+
   async deletePortfolio(portfolioId: string): Promise<ApiResponse<void>> {
     return this.request<void>(`/api/portfolios/${portfolioId}`, {
       method: 'DELETE',
@@ -181,6 +235,25 @@ class ApiClient {
     })
   }
 
+  // Many holdings in one request and one transaction
+  async addHoldings(portfolioId: string, holdings: HoldingCreate[]): Promise<ApiResponse<HoldingBulkResult>> {
+    return this.request<HoldingBulkResult>(`/api/portfolios/${portfolioId}/holdings/bulk`, {
+      method: 'POST',
+      body: JSON.stringify({ holdings }),
+    })
+  }
+
+  // Brokerage CSV export with ticker/symbol and quantity/shares columns
+  async importHoldingsCsv(portfolioId: string, csv: string): Promise<ApiResponse<HoldingBulkResult>> {
+    return this.request<HoldingBulkResult>(`/api/portfolios/${portfolioId}/holdings/bulk`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'text/csv',
+      },
+      body: csv,
+    })
+  }
+
   async removeHolding(holdingId: number): Promise<ApiResponse<void>> {
     return this.request<void>(`/api/portfolios/holdings/${holdingId}`, {
       method: 'DELETE',
@@ -204,16 +277,87 @@ class ApiClient {
   }
 
   // AI analysis
-  async getAiAnalysis(portfolioId: string): Promise<ApiResponse<{ analysis: string }>> {
+  async getAiAnalysis(portfolioId: string, options: { bypassCache?: boolean } = {}): Promise<ApiResponse<{ analysis: string }>> {
     return this.request<{ analysis: string }>('/api/agent/explain-performance', {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
       },
-      body: JSON.stringify({ portfolio_id: parseInt(portfolioId) }),
+      body: JSON.stringify({ portfolio_id: parseInt(portfolioId), bypass_cache: options.bypassCache ?? false }),
     })
   }
 
+  // Streams the analysis as server-sent events; onText receives the text assembled so far
+  async streamAiAnalysis(
+    portfolioId: string,
+    onText: (text: string) => void,
+    options: { bypassCache?: boolean } = {}
+  ): Promise<ApiResponse<{ analysis: string }>> {
+    try {
+      const response = await fetch(`${API_BASE_URL}/api/agent/explain-performance/stream`, {
+        method: 'POST',
+        headers: this.getAuthHeaders(),
+        body: JSON.stringify({ portfolio_id: parseInt(portfolioId), bypass_cache: options.bypassCache ?? false }),
+      })
+      if (!response.ok || !response.body) {
+        // Errors are plain JSON responses ({"detail": ...}), not events
+        let detail: string | undefined
+        if (response.headers.get('content-type')?.includes('application/json')) {
+          try {
+            detail = (await response.json())?.detail
+          } catch (jsonError) {
+            console.warn('Failed to parse JSON error response:', jsonError)
+          }
+        }
+        const retryAfter = parseInt(response.headers.get('Retry-After') ?? '', 10)
+        if (Number.isNaN(retryAfter)) {
+          return { error: detail || `HTTP error ${response.status}`, status: response.status }
+        }
+        return {
+          error: `${detail || `HTTP error ${response.status}`} (retry in ${retryAfter}s)`,
+          status: response.status,
+          retryAfter,
+        }
+      }
+
+      const reader = response.body.getReader()
+      const decoder = new TextDecoder()
+      let buffer = ''
+      let text = ''
+      for (;;) {
+        const { done, value } = await reader.read()
+        if (done) break
+        buffer += decoder.decode(value, { stream: true })
+
+        // Events are separated by a blank line
+        let boundary
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+          const block = buffer.slice(0, boundary)
+          buffer = buffer.slice(boundary + 2)
+          const event = block.match(/^event: (.*)$/m)?.[1]
+          const data = block.match(/^data: (.*)$/m)?.[1]
+          if (!event || !data) continue
+
+          const payload = JSON.parse(data) as { text: string }
+          if (event === 'token') {
+            text += payload.text
+            onText(text)
+          } else if (event === 'done') {
+            // The final text is authoritative and replaces the streamed one
+            onText(payload.text)
+            return { data: { analysis: payload.text }, status: response.status }
+          } else if (event === 'error') {
+            return { error: payload.text, status: response.status }
+          }
+        }
+      }
+      return { error: 'Analysis stream ended unexpectedly', status: response.status }
+    } catch (error) {
+      console.error('API stream failed:', error)
+      return { error: 'Network error. Please check your connection.', status: 0 }
+    }
+  }
+
   // Account management
   async getAccountDataSummary(): Promise<ApiResponse<{
     portfolios_count: number
@@ -236,4 +380,4 @@ class ApiClient {
 }
 
 export const apiClient = new ApiClient()
-export type { Portfolio, Holding, PortfolioCreate, HoldingCreate, SupportedStock } 
\ No newline at end of file
+export type { Portfolio, PortfolioDashboard, PortfolioHistory, PortfolioValuePoint, Holding, PortfolioCreate, HoldingCreate, HoldingBulkResult, HoldingBulkRowResult, SupportedStock } 
\ No newline at end of file